@@ -6,7 +6,68 @@ save_path = 'save_data'
 # 使用的模型路径
 model_path = 'models/best.pt'
 
+# 推理后端：'torch' 使用PyTorch，'onnx' 使用ONNX Runtime（CPU，首次使用时自动导出并缓存.onnx），
+# 'openvino' 使用 quantize_int8.py 生成的INT8量化模型
+backend = 'torch'
+# ONNX Runtime 算子内/算子间线程数，0 表示由onnxruntime自动决定
+onnx_intra_threads = 0
+onnx_inter_threads = 0
+
 
 names = {0: 'crazing', 1: 'inclusion', 2: 'patches', 3: 'pitted_surface', 4: 'rolled-in_scale', 5: 'scratches'}
 CH_names = ["开裂", '内含杂质', '斑块斑点',"点蚀表面", '轧制氧化皮', '划痕']
 
+# 检测框标签字体，需包含中文字形；加载失败时标签改用英文类别名
+label_font = 'Font/platech.ttf'
+# 目标下拉框切换时缓存的绘制结果数量
+render_cache_size = 64
+
+# 检测置信度阈值与NMS的IOU阈值
+conf = 0.3
+iou = 0.7
+
+
+# 推理输入尺寸，与训练参数 imgsz 保持一致
+imgsz = 416
+
+# 批量检测时每批图片数量，0 表示根据可用内存自动选择
+batch_size = 0
+# 批量检测的解码线程数，以及预读深度（提前解码的图片数，不足一批时按一批）
+decode_workers = 4
+prefetch_depth = 16
+
+# 检测结果磁盘缓存：以图片内容哈希、权重哈希与检测参数为键，重复检测未变化的图片时直接读取，0 表示关闭
+result_cache_dir = 'save_data/result_cache'
+result_cache_mb = 256
+
+# 视频/摄像头流水线的丢帧策略：'drop_oldest' 丢弃最旧帧，'drop_newest' 丢弃新帧，'every_n' 每N帧检测一帧
+stream_policy = 'drop_oldest'
+stream_every_n = 2
+# 流水线各级队列长度，越小延迟越低
+stream_queue_size = 2
+# 视频/摄像头检测时结果表格只保留最近的行数
+stream_table_rows = 5000
+# 结果表格合并刷新的间隔，毫秒
+table_flush_interval = 100
+
+# INT8 量化：校准图片数量，以及相对训练记录允许的最大 mAP 下降（绝对值），超出则不发布量化模型
+int8_calib_images = 300
+int8_max_map_drop = 0.01
+train_results_csv = 'yolov12-Steel/runs/detect/yolov12s_300e/results.csv'
+
+# 切片推理：边长超过 tile_size 的大图切成 tile_size×tile_size 的重叠小块分批检测，0 表示关闭
+tile_size = 0
+# 相邻切块的重叠比例
+tile_overlap = 0.2
+# 跨块合并方式：'nms' 非极大值抑制，'wbf' 加权框融合；以及合并时判定为同一目标的IOU阈值
+tile_merge = 'nms'
+tile_merge_iou = 0.5
+# 每次模型调用处理的切块数量
+tile_batch_size = 8
+
+# 检测流程各阶段耗时统计：是否记录，以及每个阶段保留的最近次数（分位数按这些耗时计算）
+latency_stats = True
+latency_window = 1024
+# 界面定时导出耗时统计的文件，扩展名 .prom 为 Prometheus 文本格式，.json 为JSON，空字符串表示不导出；导出间隔，秒
+latency_export_path = 'save_data/latency.prom'
+latency_export_interval = 10
@@ -1,31 +1,39 @@
 # -*- coding: utf-8 -*-
 import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QMessageBox,
-                             QWidget, QHeaderView, QTableWidgetItem, QAbstractItemView,
+                             QWidget, QHeaderView, QTableView, QAbstractItemView,
                              QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QLabel,
-                             QLineEdit, QTableWidget, QComboBox, QFrame, QSplitter,
+                             QLineEdit, QComboBox, QFrame, QSplitter,
                              QGroupBox, QProgressBar as QProgressBarWidget)
 import sys
 import os
-from PIL import ImageFont
-from ultralytics import YOLO
 
 sys.path.append('UIProgram')
-# 保留原有的import接口，但不使用
-try:
-    from UIProgram.UiMain import Ui_MainWindow
-    from UIProgram.QssLoader import QSSLoader
-    from UIProgram.precess_bar import ProgressBar
-except:
-    print("原有UI模块导入失败，使用新的现代化界面")
+# 保留原有的import接口，但不使用；UiMain 会加载五万多行的 ui_sources_rc，
+# 因此改为首次访问 MainProgram.Ui_MainWindow 等名称时才导入，不拖慢启动
+LEGACY_UI = {'Ui_MainWindow': 'UIProgram.UiMain', 'QSSLoader': 'UIProgram.QssLoader',
+             'ProgressBar': 'UIProgram.precess_bar'}
+
+
+def __getattr__(name):
+    if name in LEGACY_UI:
+        import importlib
+        return getattr(importlib.import_module(LEGACY_UI[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal, QCoreApplication, QPropertyAnimation, QEasingCurve, QRect
 from PyQt5.QtGui import QFont, QPixmap, QPalette, QColor, QLinearGradient
 import detect_tools as tools
+from detect_qt import DetectionTableModel, FrameDisplay, to_display
+from detect_worker import DetectWorker
+from latency import STAGES, profiler
+from overlay import RenderCache
+from batch_infer import list_images
+from stream_session import StreamSession
 import cv2
 import Config
 import numpy as np
-import torch
 
 
 class ModernButton(QPushButton):
@@ -140,13 +148,12 @@ class MainWindow(QMainWindow):
         """)
 
         # 初始化变量
-        self.conf = 0.3
-        self.iou = 0.7
+        self.conf = Config.conf
+        self.iou = Config.iou
         self.show_width = 770
         self.show_height = 480
         self.org_path = None
         self.is_camera_open = False
-        self.cap = None
 
         # 创建UI
         self.setupUI()
@@ -187,6 +194,9 @@ class MainWindow(QMainWindow):
             }
         """)
 
+        # 状态栏显示视频流水线各阶段帧率
+        self.statusBar().setStyleSheet("QStatusBar { color: #CCCCCC; font-size: 13px; }")
+
     def create_left_panel(self):
         """创建左侧面板"""
         left_widget = QWidget()
@@ -221,11 +231,13 @@ class MainWindow(QMainWindow):
         table_card = ModernCard("检测结果与位置信息")
         table_layout = QVBoxLayout()
 
-        self.tableWidget = QTableWidget()
-        self.tableWidget.setColumnCount(5)
-        self.tableWidget.setHorizontalHeaderLabels(['序号', '文件路径', '类别', '置信度', '坐标位置'])
-        self.tableWidget.setStyleSheet("""
-            QTableWidget {
+        # 表格只为可见行取数据，结果保存在列式存储中
+        self.table_model = DetectionTableModel(flush_interval=Config.table_flush_interval, parent=self)
+        self.tableView = QTableView()
+        self.tableView.setModel(self.table_model)
+        self.table_model.rowsInserted.connect(self.tableView.scrollToBottom)
+        self.tableView.setStyleSheet("""
+            QTableView {
                 background-color: #2D2D2D;
                 border: 1px solid #404040;
                 border-radius: 8px;
@@ -233,11 +245,11 @@ class MainWindow(QMainWindow):
                 color: #FFFFFF;
                 font-size: 13px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #404040;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #4CAF50;
                 color: white;
             }
@@ -251,7 +263,7 @@ class MainWindow(QMainWindow):
             }
         """)
 
-        table_layout.addWidget(self.tableWidget)
+        table_layout.addWidget(self.tableView)
         table_card.layout().addLayout(table_layout)
         left_layout.addWidget(table_card)
 
@@ -520,6 +532,22 @@ class MainWindow(QMainWindow):
         result_card.layout().addLayout(result_layout)
         right_layout.addWidget(result_card)
 
+        # 耗时统计区域：各阶段最近耗时的分位数，定时刷新
+        stats_card = ModernCard("耗时统计")
+        self.stats_lb = QLabel("暂无数据")
+        self.stats_lb.setTextFormat(Qt.RichText)
+        self.stats_lb.setStyleSheet("""
+            QLabel {
+                color: #CCCCCC;
+                font-size: 12px;
+                padding: 2px;
+                background-color: #333333;
+                border-radius: 4px;
+            }
+        """)
+        stats_card.layout().addWidget(self.stats_lb)
+        right_layout.addWidget(stats_card)
+
         # 操作区域
         action_card = ModernCard("操作")
         action_layout = QHBoxLayout()
@@ -571,37 +599,52 @@ class MainWindow(QMainWindow):
 
     def initMain(self):
         """初始化主要组件"""
-        self.device = 0 if torch.cuda.is_available() else 'cpu'
-        print(f"使用设备: {self.device}")
-
-        # 加载检测模型
-        try:
-            self.model = YOLO(Config.model_path, task='detect')
-            self.model(np.zeros((48, 48, 3)), device=self.device)
-            print("✓ 模型加载成功")
-        except Exception as e:
-            print(f"✗ 模型加载失败: {e}")
-
-        # 字体加载
-        try:
-            self.fontC = ImageFont.truetype("Font/platech.ttf", 25, 0)
-            print("✓ 字体加载成功")
-        except Exception as e:
-            print(f"✗ 字体加载失败，使用默认字体: {e}")
+        # 检测模型在检测线程中加载并预热，窗口先显示；模型就绪前提交的检测任务排队等待
+        self.detector = DetectWorker(Config.model_path, None, self.conf, self.iou)
+        self.detector.detected.connect(self.on_detect_result)
+        self.detector.failed.connect(self.show_detect_error)
+        self.detector.ready.connect(self.on_model_ready)
+        self.detector.load_failed.connect(self.on_model_failed)
+        self.detector.start()
+        QApplication.instance().aboutToQuit.connect(self.detector.stop)
+
+        # 状态栏右侧的模型状态指示
+        self.model_lb = QLabel("● 模型加载中")
+        self.model_lb.setStyleSheet("color: #FF9800; padding: 0px 8px;")
+        self.statusBar().addPermanentWidget(self.model_lb)
 
         # 用于绘制不同颜色矩形框
         self.colors = tools.Colors()
 
+        # 显示缓冲区，逐帧复用
+        self.display = FrameDisplay(self.label_show, self.show_width, self.show_height)
+        # 目标下拉框切换时的绘制缓存
+        self.render_cache = RenderCache(self.detector.renderer, to_display, Config.render_cache_size)
+
+        # 视频/摄像头检测会话
+        self.session = StreamSession(self.detector, self.render_frame, parent=self)
+        self.session.frame_ready.connect(self.show_detect_result)
+        self.session.stats_ready.connect(self.show_stream_stats)
+        self.session.failed.connect(self.on_stream_failed)
+        self.session.finished.connect(self.on_stream_finished)
+        QApplication.instance().aboutToQuit.connect(self.session.stop)
+
         # 定时器
-        self.timer_camera = QTimer()
         self.timer_save_video = QTimer()
 
+        # 耗时统计面板每秒刷新，并按 Config.latency_export_interval 导出供监控采集
+        self.last_export = time.time()
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.show_latency_stats)
+        self.stats_timer.start(1000)
+        QApplication.instance().aboutToQuit.connect(self.export_latency_stats)
+
         # 表格设置
         self.setup_table()
 
     def setup_table(self):
         """设置表格"""
-        table = self.tableWidget
+        table = self.tableView
         table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         table.verticalHeader().setDefaultSectionSize(40)
         table.setColumnWidth(0, 80)
@@ -619,11 +662,7 @@ class MainWindow(QMainWindow):
 
     def open_img(self):
         """打开图片文件"""
-        if self.cap:
-            self.video_stop()
-            self.is_camera_open = False
-            self.CaplineEdit.setText('摄像头未开启')
-            self.cap = None
+        self.close_stream()
 
         file_path, _ = QFileDialog.getOpenFileName(None, '打开图片', './', "Image files (*.jpg *.jpeg *.png *.bmp)")
         if not file_path:
@@ -631,30 +670,43 @@ class MainWindow(QMainWindow):
 
         self.comboBox.setDisabled(False)
         self.org_path = file_path
-        self.org_img = tools.img_cvread(self.org_path)
-
-        # 目标检测
-        t1 = time.time()
-        self.results = self.model(self.org_path, conf=self.conf, iou=self.iou)[0]
-        t2 = time.time()
-        take_time_str = '{:.3f} s'.format(t2 - t1)
-        self.time_lb.setText(take_time_str)
-
-        location_list = self.results.boxes.xyxy.tolist()
-        self.location_list = [list(map(int, e)) for e in location_list]
-        cls_list = self.results.boxes.cls.tolist()
-        self.cls_list = [int(i) for i in cls_list]
-        self.conf_list = self.results.boxes.conf.tolist()
-        self.conf_list = ['%.2f %%' % (each * 100) for each in self.conf_list]
-
-        now_img = self.results.plot()
-        self.draw_img = now_img
-        self.img_width, self.img_height = self.get_resize_size(now_img)
-        resize_cvimg = cv2.resize(now_img, (self.img_width, self.img_height))
-        pix_img = tools.cvimg_to_qpiximg(resize_cvimg)
-        self.label_show.setPixmap(pix_img)
+
+        # 目标检测交给检测线程，结果通过信号返回
+        self.detector.clear()
+        self.table_model.set_capacity(0)
+        self.detector.submit('image', path=self.org_path)
+
+    def on_detect_result(self, res):
+        """检测线程返回结果"""
+        if res['gen'] != self.detector.generation:
+            return
+
+        if res['mode'] == 'batch':
+            # 批量结果每批只刷新一次界面：先写入表格，再显示本批最后一张
+            items = res['items']
+            for item in items[:-1]:
+                self.table_model.append(item['det'], item['path'])
+            res = items[-1]
+        self.show_detect_result(res)
+
+    def show_detect_result(self, res):
+        """显示一张图片或一帧的检测结果"""
+
+        self.results = res['results']
+        self.org_img = res['img']
+        self.location_list = res['location_list']
+        self.cls_list = res['cls_list']
+        self.conf_list = res['conf_list']
+        self.time_lb.setText('{:.3f} s'.format(res['take_time']))
+
+        now_img = res['draw_img']
+        if res['mode'] != 'frame':
+            self.draw_img = now_img
+            self.PiclineEdit.setText(res['path'])
+        # 视频帧已在绘制线程中缩放，直接交给显示缓冲区
+        show_img = res.get('show_img')
+        self.img_width, self.img_height = self.display.show(now_img if show_img is None else show_img)
         self.label_show.setAlignment(Qt.AlignCenter)
-        self.PiclineEdit.setText(self.org_path)
 
         target_nums = len(self.cls_list)
         self.label_nums.setText(str(target_nums))
@@ -681,9 +733,50 @@ class MainWindow(QMainWindow):
             self.label_xmax.setText('0')
             self.label_ymax.setText('0')
 
-        self.tableWidget.setRowCount(0)
-        self.tableWidget.clearContents()
-        self.tabel_info_show(self.location_list, self.cls_list, self.conf_list, path=self.org_path)
+        if res['mode'] == 'image':
+            self.table_model.clear()
+        self.table_model.append(res['det'], res['path'])
+
+    def on_model_ready(self, info):
+        """模型加载并预热完成"""
+        print(f"✓ 模型加载成功: {info['backend']} / {info['device']}，用时 {info['load_time']:.1f} s")
+        self.model_lb.setText(f"● 模型就绪 ({info['backend']})")
+        self.model_lb.setStyleSheet("color: #4CAF50; padding: 0px 8px;")
+
+    def on_model_failed(self, msg):
+        print(f"✗ 模型加载失败: {msg}")
+        self.model_lb.setText("● 模型加载失败")
+        self.model_lb.setStyleSheet("color: #F44336; padding: 0px 8px;")
+
+    def show_detect_error(self, job, msg):
+        """检测失败时提示错误；单张图片失败时清除上一次的结果，批量检测保留已完成批次的结果"""
+        if job['gen'] != self.detector.generation:
+            return
+        target = self.org_path if job['mode'] == 'batch' else job['path']
+        print(f"✗ 检测失败 {target}: {msg}")
+        if job['mode'] != 'batch':
+            self.clear_detect_result()
+        self.comboBox.setDisabled(False)
+        self.statusBar().showMessage(f'检测失败: {msg}', 5000)
+        QMessageBox.information(self, '提示', f'检测失败: {target}\n{msg}')
+
+    def clear_detect_result(self):
+        """清除界面上的检测结果，避免显示或保存上一次的结果"""
+        for name in ('results', 'draw_img'):
+            if hasattr(self, name):
+                delattr(self, name)
+        self.table_model.clear(capacity=0)
+        self.comboBox.clear()
+        self.label_show.clear()
+        self.label_show.setText("图像显示区域\n请选择图片或视频文件")
+        self.time_lb.setText('0.000 s')
+        self.label_nums.setText('0')
+        self.type_lb.setText('无')
+        self.label_conf.setText('0.00%')
+        self.label_xmin.setText('0')
+        self.label_ymin.setText('0')
+        self.label_xmax.setText('0')
+        self.label_ymax.setText('0')
 
     def combox_change(self):
         """下拉框改变"""
@@ -692,17 +785,19 @@ class MainWindow(QMainWindow):
 
         com_text = self.comboBox.currentText()
         if com_text == '全部':
+            index = None
             cur_box = self.location_list
-            cur_img = self.results.plot()
             if self.cls_list:
                 self.type_lb.setText(Config.CH_names[self.cls_list[0]])
                 self.label_conf.setText(str(self.conf_list[0]))
         else:
             index = int(com_text.split('_')[-1])
             cur_box = [self.location_list[index]]
-            cur_img = self.results[index].plot()
             self.type_lb.setText(Config.CH_names[self.cls_list[index]])
             self.label_conf.setText(str(self.conf_list[index]))
+        # 缓存中为显示尺寸、显示格式的图像，重复选择同一目标时直接显示
+        size = self.display.fit_size(self.results.orig_img.shape)
+        cur_img = self.render_cache.get(self.results, index, size)
 
         if cur_box:
             self.label_xmin.setText(str(cur_box[0][0]))
@@ -710,38 +805,28 @@ class MainWindow(QMainWindow):
             self.label_xmax.setText(str(cur_box[0][2]))
             self.label_ymax.setText(str(cur_box[0][3]))
 
-        resize_cvimg = cv2.resize(cur_img, (self.img_width, self.img_height))
-        pix_img = tools.cvimg_to_qpiximg(resize_cvimg)
         self.label_show.clear()
-        self.label_show.setPixmap(pix_img)
+        self.display.show(cur_img)
         self.label_show.setAlignment(Qt.AlignCenter)
 
     def vedio_show(self):
         """显示视频"""
-        if self.is_camera_open:
-            self.is_camera_open = False
-            self.CaplineEdit.setText('摄像头未开启')
-
         video_path = self.get_video_path()
         if not video_path:
             return None
-        self.cap = cv2.VideoCapture(video_path)
-        self.video_start()
-        self.comboBox.setDisabled(True)
+        self.close_stream()
+        self.video_start(video_path)
 
     def camera_show(self):
         """摄像头功能"""
-        self.is_camera_open = not self.is_camera_open
-        if self.is_camera_open:
-            self.CaplineEdit.setText('摄像头开启')
-            self.cap = cv2.VideoCapture(0)
-            self.video_start()
-            self.comboBox.setDisabled(True)
+        if not self.is_camera_open:
+            self.close_stream()
+            self.is_camera_open = self.video_start(0)
+            if self.is_camera_open:
+                self.CaplineEdit.setText('摄像头开启')
         else:
-            self.CaplineEdit.setText('摄像头未开启')
-            if self.cap:
-                self.cap.release()
-                cv2.destroyAllWindows()
+            self.close_stream()
+            cv2.destroyAllWindows()
             self.label_show.clear()
             self.label_show.setText("图像显示区域\n请选择图片或视频文件")
 
@@ -767,69 +852,18 @@ class MainWindow(QMainWindow):
 
     def detact_batch_imgs(self):
         """批量检测图片"""
-        if self.cap:
-            self.video_stop()
-            self.is_camera_open = False
-            self.CaplineEdit.setText('摄像头未开启')
-            self.cap = None
+        self.close_stream()
 
         directory = QFileDialog.getExistingDirectory(self, "选取文件夹", "./")
         if not directory:
             return
 
         self.org_path = directory
-        img_suffix = ['jpg', 'png', 'jpeg', 'bmp']
-
-        for file_name in os.listdir(directory):
-            full_path = os.path.join(directory, file_name)
-            if os.path.isfile(full_path) and file_name.split('.')[-1].lower() in img_suffix:
-                img_path = full_path
-                self.org_img = tools.img_cvread(img_path)
-
-                t1 = time.time()
-                self.results = self.model(img_path, conf=self.conf, iou=self.iou)[0]
-                t2 = time.time()
-                take_time_str = '{:.3f} s'.format(t2 - t1)
-                self.time_lb.setText(take_time_str)
-
-                location_list = self.results.boxes.xyxy.tolist()
-                self.location_list = [list(map(int, e)) for e in location_list]
-                cls_list = self.results.boxes.cls.tolist()
-                self.cls_list = [int(i) for i in cls_list]
-                self.conf_list = self.results.boxes.conf.tolist()
-                self.conf_list = ['%.2f %%' % (each * 100) for each in self.conf_list]
-
-                now_img = self.results.plot()
-                self.draw_img = now_img
-
-                self.img_width, self.img_height = self.get_resize_size(now_img)
-                resize_cvimg = cv2.resize(now_img, (self.img_width, self.img_height))
-                pix_img = tools.cvimg_to_qpiximg(resize_cvimg)
-                self.label_show.setPixmap(pix_img)
-                self.label_show.setAlignment(Qt.AlignCenter)
-                self.PiclineEdit.setText(img_path)
-
-                target_nums = len(self.cls_list)
-                self.label_nums.setText(str(target_nums))
-
-                choose_list = ['全部']
-                target_names = [Config.names[id] + '_' + str(index) for index, id in enumerate(self.cls_list)]
-                choose_list = choose_list + target_names
-
-                self.comboBox.clear()
-                self.comboBox.addItems(choose_list)
-
-                if target_nums >= 1:
-                    self.type_lb.setText(Config.CH_names[self.cls_list[0]])
-                    self.label_conf.setText(str(self.conf_list[0]))
-                    self.label_xmin.setText(str(self.location_list[0][0]))
-                    self.label_ymin.setText(str(self.location_list[0][1]))
-                    self.label_xmax.setText(str(self.location_list[0][2]))
-                    self.label_ymax.setText(str(self.location_list[0][3]))
-
-                self.tabel_info_show(self.location_list, self.cls_list, self.conf_list, path=img_path)
-                self.tableWidget.scrollToBottom()
-                QApplication.processEvents()
+
+        # 整个文件夹作为一个任务提交，检测线程按批推理并按批返回结果
+        self.detector.clear()
+        self.table_model.set_capacity(0)
+        self.detector.submit('batch', paths=list_images(directory))
 
     # === 辅助方法 ===
 
@@ -841,95 +875,85 @@ class MainWindow(QMainWindow):
         self.VideolineEdit.setText(file_path)
         return file_path
 
-    def video_start(self):
-        self.tableWidget.setRowCount(0)
-        self.tableWidget.clearContents()
+    def video_start(self, source):
+        """开始视频或摄像头检测，source为视频路径或摄像头编号"""
+        if self.detector.loaded.is_set() and self.detector.model is None:
+            QMessageBox.information(self, '提示', '模型加载失败，无法检测！')
+            return False
+        self.detector.clear()
+        # 视频流持续追加结果，表格只保留最近的行
+        self.table_model.clear(capacity=Config.stream_table_rows)
         self.comboBox.clear()
-        self.timer_camera.start(30)
-        self.timer_camera.timeout.connect(self.open_frame)
-
-    def video_stop(self):
-        if hasattr(self, 'cap') and self.cap:
-            self.cap.release()
-        self.timer_camera.stop()
-
-    def open_frame(self):
-        ret, now_img = self.cap.read()
-        if ret:
-            t1 = time.time()
-            results = self.model(now_img, conf=self.conf, iou=self.iou)[0]
-            t2 = time.time()
-            take_time_str = '{:.3f} s'.format(t2 - t1)
-            self.time_lb.setText(take_time_str)
-
-            location_list = results.boxes.xyxy.tolist()
-            self.location_list = [list(map(int, e)) for e in location_list]
-            cls_list = results.boxes.cls.tolist()
-            self.cls_list = [int(i) for i in cls_list]
-            self.conf_list = results.boxes.conf.tolist()
-            self.conf_list = ['%.2f %%' % (each * 100) for each in self.conf_list]
-
-            now_img = results.plot()
-            self.img_width, self.img_height = self.get_resize_size(now_img)
-            resize_cvimg = cv2.resize(now_img, (self.img_width, self.img_height))
-            pix_img = tools.cvimg_to_qpiximg(resize_cvimg)
-            self.label_show.setPixmap(pix_img)
-            self.label_show.setAlignment(Qt.AlignCenter)
-
-            target_nums = len(self.cls_list)
-            self.label_nums.setText(str(target_nums))
-
-            choose_list = ['全部']
-            target_names = [Config.names[id] + '_' + str(index) for index, id in enumerate(self.cls_list)]
-            choose_list = choose_list + target_names
-
-            self.comboBox.clear()
-            self.comboBox.addItems(choose_list)
-
-            if target_nums >= 1:
-                self.type_lb.setText(Config.CH_names[self.cls_list[0]])
-                self.label_conf.setText(str(self.conf_list[0]))
-                self.label_xmin.setText(str(self.location_list[0][0]))
-                self.label_ymin.setText(str(self.location_list[0][1]))
-                self.label_xmax.setText(str(self.location_list[0][2]))
-                self.label_ymax.setText(str(self.location_list[0][3]))
+        if not self.session.start(source):
+            QMessageBox.information(self, '提示', f'无法打开视频源: {source}')
+            return False
+        self.comboBox.setDisabled(True)
+        return True
 
-            self.tabel_info_show(self.location_list, self.cls_list, self.conf_list, path="实时检测")
-        else:
-            self.video_stop()
+    def close_stream(self):
+        """关闭当前视频/摄像头会话"""
+        self.session.stop()
+        if self.is_camera_open:
+            self.is_camera_open = False
+            self.CaplineEdit.setText('摄像头未开启')
+
+    def reset_stream_ui(self):
+        """会话自行结束后关闭视频源并恢复界面状态"""
+        self.close_stream()
+        self.comboBox.setDisabled(False)
+        self.VideolineEdit.clear()
+
+    def on_stream_finished(self):
+        """视频读取完毕，会话已停止"""
+        print("✓ 视频检测完成")
+        self.reset_stream_ui()
+        self.statusBar().showMessage('视频检测完成', 5000)
+
+    def on_stream_failed(self, msg):
+        """视频/摄像头检测出错，会话已停止"""
+        print(f"✗ 视频检测失败: {msg}")
+        self.reset_stream_ui()
+        QMessageBox.information(self, '提示', f'视频检测出错，已停止: {msg}')
+
+    def render_frame(self, item):
+        # 流水线绘制线程中调用，完成绘制与缩放
+        item = self.detector.pack_result(item, item['results'], item['take_time'])
+        now_img = item['draw_img']
+        item['show_img'] = self.display.prepare(now_img)
+        return item
+
+    def show_stream_stats(self, stats):
+        """状态栏显示流水线各阶段帧率"""
+        self.statusBar().showMessage('采集 {:.1f} fps | 推理 {:.1f} fps | 显示 {:.1f} fps | 丢帧 {}'.format(
+            stats['capture_fps'], stats['infer_fps'], stats['render_fps'], stats['dropped']))
+
+    def show_latency_stats(self):
+        """刷新耗时统计面板：每列一个阶段，每行一个分位数，单位毫秒"""
+        stats = profiler.snapshot()
+        if stats:
+            header = ''.join('<th align="right">{}</th>'.format(STAGES.get(name, name)) for name in stats)
+            rows = ''.join('<tr><td>{}</td>{}</tr>'.format(q, ''.join(
+                '<td align="right">{:.1f}</td>'.format(s[q] * 1000) for s in stats.values()))
+                for q in ('p50', 'p95', 'p99'))
+            self.stats_lb.setText('<table width="100%"><tr><th align="left">ms</th>' + header + '</tr>'
+                                  + rows + '</table>')
+        if time.time() - self.last_export >= Config.latency_export_interval:
+            self.export_latency_stats()
+
+    def export_latency_stats(self):
+        """导出耗时统计到 Config.latency_export_path"""
+        self.last_export = time.time()
+        if not Config.latency_export_path or not profiler.stages:
+            return
+        try:
+            profiler.export(Config.latency_export_path)
+        except OSError as e:
+            print(f"✗ 耗时统计导出失败: {e}")
 
     def get_resize_size(self, img):
-        _img = img.copy()
-        img_height, img_width, depth = _img.shape
-        ratio = img_width / img_height
-        if ratio >= self.show_width / self.show_height:
-            self.img_width = self.show_width
-            self.img_height = int(self.img_width / ratio)
-        else:
-            self.img_height = self.show_height
-            self.img_width = int(self.img_height * ratio)
+        self.img_width, self.img_height = self.display.fit_size(img.shape)
         return self.img_width, self.img_height
 
-    def tabel_info_show(self, locations, clses, confs, path=None):
-        for location, cls, conf in zip(locations, clses, confs):
-            row_count = self.tableWidget.rowCount()
-            self.tableWidget.insertRow(row_count)
-
-            items = [
-                QTableWidgetItem(str(row_count + 1)),
-                QTableWidgetItem(str(path) if path else ""),
-                QTableWidgetItem(str(Config.CH_names[cls])),
-                QTableWidgetItem(str(conf)),
-                QTableWidgetItem(str(location))
-            ]
-
-            for i, item in enumerate(items):
-                if i in [0, 2, 3]:
-                    item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-                self.tableWidget.setItem(row_count, i, item)
-
-        self.tableWidget.scrollToBottom()
-
 
 if __name__ == "__main__":
     print("=== 现代化检测系统启动 ===")
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# 批量检测辅助工具：图片列表、自适应批大小、多线程预读解码
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psutil
+
+import detect_core as core
+from latency import span
+
+IMG_SUFFIX = ['jpg', 'png', 'jpeg', 'bmp']
+
+# 单张图片推理时占用内存相对输入张量的估计倍数（含中间特征图）
+ACTIVATION_FACTOR = 40
+
+
+def list_images(directory):
+    """列出文件夹中的图片文件，按文件名排序"""
+    img_list = []
+    for file_name in sorted(os.listdir(directory)):
+        full_path = os.path.join(directory, file_name)
+        if os.path.isfile(full_path) and file_name.split('.')[-1].lower() in IMG_SUFFIX:
+            img_list.append(full_path)
+    return img_list
+
+
+def auto_batch_size(imgsz, max_batch=64, mem_fraction=0.25):
+    """
+    根据当前可用内存估算批大小
+    :param imgsz: 模型输入尺寸
+    :param max_batch: 批大小上限
+    :param mem_fraction: 允许批量推理占用的可用内存比例
+    :return: 批大小，至少为1
+    """
+    per_img = imgsz * imgsz * 3 * 4 * ACTIVATION_FACTOR
+    available = psutil.virtual_memory().available * mem_fraction
+    return max(1, min(max_batch, int(available // per_img)))
+
+
+def iter_batches(items, batch_size):
+    """按批大小切分列表"""
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+def read_batch(paths, digest=False):
+    """
+    读取一批图片，跳过无法解码的文件
+    :param digest: 为True时同时返回各文件内容的哈希（由读入的同一份数据计算，不重复读文件）
+    """
+    batch_paths, batch_imgs, digests = [], [], []
+    for path in paths:
+        _, img, content_digest, _ = read_image(path, digest)
+        if img is not None:
+            batch_paths.append(path)
+            batch_imgs.append(img)
+            digests.append(content_digest)
+    if digest:
+        return batch_paths, batch_imgs, digests
+    return batch_paths, batch_imgs
+
+
+# JPEG 中记录图像尺寸的 SOF 段标记（不含 DHT/JPG/DAC）
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(data):
+    """逐段扫描JPEG文件头获取(宽, 高)，不解码；不是JPEG或无法识别时返回None"""
+    buf = memoryview(data)
+    if len(buf) < 4 or buf[0] != 0xFF or buf[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(buf):
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:  # 段之间的填充字节
+            i += 1
+        elif marker in SOF_MARKERS:
+            return (buf[i + 7] << 8) | buf[i + 8], (buf[i + 5] << 8) | buf[i + 6]
+        else:
+            i += 2 + ((buf[i + 2] << 8) | buf[i + 3])
+    return None
+
+
+def reduce_factor(size, imgsz):
+    """
+    长边达到 imgsz 的 2/4/8 倍时可直接缩小解码
+    :param size: 原图(宽, 高)
+    :return: 缩小倍数，不缩小时为1
+    """
+    for factor in (8, 4, 2):
+        if max(size) >= imgsz * factor:
+            return factor
+    return 1
+
+
+def read_image(path, digest=False, imgsz=0):
+    """
+    读取并解码一张图片
+    :param digest: 为True时同时计算文件内容哈希
+    :param imgsz: 大于0时，远大于该尺寸的JPEG缩小解码
+    :return: (路径, 图像, 哈希, 缩放比例)，无法读取时图像为None；缩放比例为原图与解码图像的边长比，检测框乘以该比例即为原图坐标
+    """
+    from result_cache import bytes_digest
+
+    with span('decode'):
+        try:
+            data = np.fromfile(path, dtype=np.uint8)
+        except OSError:
+            return path, None, None, 1.0
+        size = jpeg_size(data) if imgsz else None
+        factor = reduce_factor(size, imgsz) if size else 1
+        img = core.img_decode(data, factor)
+    scale = size[0] / img.shape[1] if img is not None and factor > 1 else 1.0
+    return path, img, bytes_digest(data) if digest and img is not None else None, scale
+
+
+class PrefetchLoader:
+    # 多线程预读解码：按输入顺序迭代返回 read_image 的结果，最多提前 depth 张图片，
+    # OpenCV 解码时释放GIL，多个线程可同时解码；当前图片推理时后续图片已在解码
+    # 用法:
+    #   loader = PrefetchLoader(paths, workers=4, depth=16)
+    #   for path, img, digest, scale in loader: ...
+    #   print(loader.summary())
+    def __init__(self, paths, workers=4, depth=16, digest=False, imgsz=0):
+        """
+        :param workers: 解码线程数
+        :param depth: 预读深度，已提交解码但尚未取走的图片数上限
+        :param digest: 为True时同时计算文件内容哈希
+        :param imgsz: 大于0时，远大于该尺寸的JPEG缩小解码（IMREAD_REDUCED_*）
+        """
+        self.paths = list(paths)
+        self.workers = max(1, workers)
+        self.depth = max(1, depth)
+        self.digest = digest
+        self.imgsz = imgsz
+        self.lock = threading.Lock()
+        # 吞吐量计数
+        self.images = 0  # 已解码图片数
+        self.failed = 0  # 无法读取的图片数
+        self.reduced = 0  # 缩小解码的图片数
+        self.decode_time = 0.0  # 各线程读取与解码的累计用时
+        self.wait_time = 0.0  # 使用方等待解码结果的累计用时
+        self.elapsed = 0.0  # 迭代总用时
+
+    def __len__(self):
+        return len(self.paths)
+
+    def load(self, path):
+        t1 = time.perf_counter()
+        item = read_image(path, self.digest, self.imgsz)
+        t2 = time.perf_counter()
+        with self.lock:
+            self.decode_time += t2 - t1
+            if item[1] is None:
+                self.failed += 1
+            else:
+                self.images += 1
+                self.reduced += item[3] != 1.0
+        return item
+
+    def __iter__(self):
+        if not self.paths:
+            return
+        t_start = time.perf_counter()
+        pending = collections.deque()
+        todo = iter(self.paths)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for path in todo:
+                    pending.append(pool.submit(self.load, path))
+                    if len(pending) >= self.depth:
+                        break
+                while pending:
+                    future = pending.popleft()
+                    next_path = next(todo, None)
+                    if next_path is not None:
+                        pending.append(pool.submit(self.load, next_path))
+                    t1 = time.perf_counter()
+                    item = future.result()
+                    self.wait_time += time.perf_counter() - t1
+                    yield item
+            finally:
+                # 提前结束迭代时取消尚未开始的解码
+                for future in pending:
+                    future.cancel()
+                self.elapsed = time.perf_counter() - t_start
+
+    def stats(self, elapsed=None):
+        """
+        吞吐量计数
+        :param elapsed: 使用方的总用时，默认为迭代用时；最后一批在迭代结束后才推理，传入总用时更准确
+        decode_fps 为解码线程全部忙碌时可达到的解码速度，throughput_fps 为实际处理速度；
+        wait_ratio 为使用方等待解码的时间占比，较高时瓶颈在解码，接近0时瓶颈在推理
+        """
+        done = self.images + self.failed
+        elapsed = elapsed or self.elapsed
+        decode_ms = self.decode_time / done * 1000 if done else 0.0
+        return {'images': self.images, 'failed': self.failed, 'reduced': self.reduced,
+                'decode_ms': decode_ms,
+                'decode_fps': self.workers * 1000 / decode_ms if decode_ms else 0.0,
+                'throughput_fps': done / elapsed if elapsed else 0.0,
+                'wait_ratio': self.wait_time / elapsed if elapsed else 0.0}
+
+    def summary(self, elapsed=None):
+        s = self.stats(elapsed)
+        bottleneck = '解码' if s['wait_ratio'] > 0.2 else '推理'
+        return (f"解码 {s['decode_ms']:.1f} ms/张 × {self.workers} 线程 (上限 {s['decode_fps']:.1f} 张/秒), "
+                f"实际 {s['throughput_fps']:.1f} 张/秒, 等待解码 {s['wait_ratio'] * 100:.1f}%, 瓶颈: {bottleneck}")
+
+
+class BatchPrefetcher:
+    # 迭代返回(路径列表, 图像列表)，digest 为True时为(路径列表, 图像列表, 哈希列表)，跳过无法解码的文件；
+    # 由 PrefetchLoader 多线程预读，当前批推理时下一批已在解码
+    def __init__(self, paths, batch_size, digest=False, workers=4, depth=0):
+        """
+        :param depth: 预读深度，不足一批时按一批计算
+        """
+        self.batch_size = batch_size
+        self.digest = digest
+        self.loader = PrefetchLoader(paths, workers, max(depth, batch_size), digest)
+
+    def __len__(self):
+        return (len(self.loader) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        batch_paths, batch_imgs, digests = [], [], []
+        for path, img, content_digest, _ in self.loader:
+            if img is not None:
+                batch_paths.append(path)
+                batch_imgs.append(img)
+                digests.append(content_digest)
+            if len(batch_imgs) >= self.batch_size:
+                yield (batch_paths, batch_imgs, digests) if self.digest else (batch_paths, batch_imgs)
+                batch_paths, batch_imgs, digests = [], [], []
+        if batch_imgs:
+            yield (batch_paths, batch_imgs, digests) if self.digest else (batch_paths, batch_imgs)
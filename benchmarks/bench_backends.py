@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# 推理后端性能对比：在 TestFiles/ 上比较 PyTorch CPU 与 ONNX Runtime
+# 用法: python benchmarks/bench_backends.py --batch-sizes 1,8 --threads 4
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import Config
+from batch_infer import iter_batches, list_images, read_batch
+from detect_backends import BACKENDS, load_backend
+
+
+def bench(backend, imgs, batch_size, rounds):
+    """重复推理 rounds 轮，返回平均每张用时与吞吐量"""
+    backend(imgs[:batch_size], conf=Config.conf, iou=Config.iou)  # 预热
+    total_time, total_imgs, total_boxes = 0.0, 0, 0
+    for _ in range(rounds):
+        for batch in iter_batches(imgs, batch_size):
+            t1 = time.perf_counter()
+            results = backend(batch, conf=Config.conf, iou=Config.iou)
+            total_time += time.perf_counter() - t1
+            total_imgs += len(batch)
+            total_boxes += sum(len(r.boxes) for r in results)
+    return {
+        'backend': backend.name,
+        'batch_size': batch_size,
+        'images': total_imgs,
+        'ms_per_img': total_time / total_imgs * 1000,
+        'img_per_s': total_imgs / total_time,
+        'boxes_per_img': total_boxes / total_imgs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='推理后端性能对比')
+    parser.add_argument('--source', default='TestFiles', help='测试图片文件夹')
+    parser.add_argument('--model', default=Config.model_path, help='.pt 权重路径')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='参与对比的后端，逗号分隔')
+    parser.add_argument('--batch-sizes', default='1,8', help='批大小，逗号分隔')
+    parser.add_argument('--rounds', type=int, default=3, help='重复轮数')
+    parser.add_argument('--threads', type=int, default=0, help='CPU线程数，0为默认')
+    parser.add_argument('--output', default=None, help='结果JSON路径')
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+        Config.onnx_intra_threads = args.threads
+
+    _, imgs = read_batch(list_images(args.source))
+    print(f'测试图片: {len(imgs)} 张, imgsz={Config.imgsz}, threads={args.threads or "默认"}')
+
+    rows = []
+    for name in args.backends.split(','):
+        t1 = time.perf_counter()
+        backend = load_backend(name, args.model, 'cpu', Config.imgsz)
+        load_time = time.perf_counter() - t1
+        for batch_size in map(int, args.batch_sizes.split(',')):
+            row = bench(backend, imgs, batch_size, args.rounds)
+            row['load_s'] = load_time
+            rows.append(row)
+            print('{backend:>6} batch={batch_size:<3} {ms_per_img:8.2f} ms/张 {img_per_s:8.1f} 张/秒 '
+                  '平均目标数 {boxes_per_img:.2f} 加载 {load_s:.2f} s'.format(**row))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
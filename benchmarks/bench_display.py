@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# 单帧显示开销对比：原有 copy → resize → cvtColor → QPixmap 路径与 FrameDisplay BGRA 显示通道
+# 用法: python benchmarks/bench_display.py  （无显示器时设置 QT_QPA_PLATFORM=offscreen）
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QLabel
+
+import detect_tools as tools
+from detect_qt import FrameDisplay, fit_size
+
+SHOW_WIDTH, SHOW_HEIGHT = 770, 480
+FRAME_SIZES = {'416x416': (416, 416), '1080p': (1080, 1920), '4K': (2160, 3840)}
+
+
+def legacy_show(label, img):
+    # 改造前 MainWindow 的显示流程
+    _img = img.copy()
+    width, height = fit_size(_img.shape, SHOW_WIDTH, SHOW_HEIGHT)
+    resize_cvimg = cv2.resize(img, (width, height))
+    label.setPixmap(tools.cvimg_to_qpiximg(resize_cvimg))
+
+
+def timeit(fn, frames, repeat):
+    fn(frames[0])  # 预热
+    t1 = time.perf_counter()
+    for i in range(repeat):
+        fn(frames[i % len(frames)])
+    return (time.perf_counter() - t1) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单帧显示开销对比')
+    parser.add_argument('--repeat', type=int, default=200, help='每种情况重复次数')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    label = QLabel()
+    buffered = FrameDisplay(label, SHOW_WIDTH, SHOW_HEIGHT)
+    qt_scaled = FrameDisplay(label, SHOW_WIDTH, SHOW_HEIGHT, qt_scale=True)
+
+    print(f"{'帧尺寸':<10}{'原流程':>12}{'FrameDisplay':>14}{'Qt缩放':>12}{'已缩放帧':>12}  (ms/帧)")
+    for name, (h, w) in FRAME_SIZES.items():
+        frames = [np.random.randint(0, 255, (h, w, 3), dtype=np.uint8) for _ in range(4)]
+        # 流水线绘制线程已缩放好的帧，显示端只需转换到显示缓冲区
+        small = [buffered.prepare(f) for f in frames]
+        row = [timeit(lambda f: legacy_show(label, f), frames, args.repeat),
+               timeit(buffered.show, frames, args.repeat),
+               timeit(qt_scaled.show, frames, args.repeat),
+               timeit(buffered.show, small, args.repeat)]
+        print(f'{name:<10}' + ''.join(f'{t:>12.3f}' for t in row))
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
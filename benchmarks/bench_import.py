@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# 无界面进程的冷启动导入耗时：每条导入语句在新的子进程中重复执行，取中位数，并列出被顺带加载的重型依赖
+# MainProgram 一行为界面启动时的导入，PIL、torch 与 ultralytics 都应推迟到首次检测时加载
+# 「改造前」一行模拟 detect_tools 在模块级导入 PyQt5.QtGui 与 PIL 时，批量检测等后台进程的导入开销
+# 用法: python benchmarks/bench_import.py --repeat 10
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from latency import ljust
+
+CASES = {
+    '改造前 detect_tools': 'import PyQt5.QtGui, PIL.Image, PIL.ImageDraw, PIL.ImageFont, detect_tools',
+    'detect_tools': 'import detect_tools',
+    'detect_core': 'import detect_core',
+    'batch_infer': 'import batch_infer',
+    'detect_backends': 'import detect_backends',
+    'MainProgram': 'import MainProgram',
+}
+# 检查是否被加载的重型依赖
+HEAVY = ('PyQt5', 'PIL', 'torch', 'ultralytics')
+# 各导入语句不允许加载的重型依赖，出现时以非零状态退出，防止启动耗时回退
+FORBIDDEN = {
+    'detect_core': HEAVY,
+    'batch_infer': HEAVY,
+    'detect_backends': HEAVY,
+    'MainProgram': ('PIL', 'torch', 'ultralytics'),
+}
+
+PROBE = '''
+import sys, time
+t = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - t
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+'''
+
+
+def measure(statement, repeat):
+    """返回导入耗时的中位数（毫秒）与被加载的重型依赖"""
+    times, loaded = [], ''
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY)],
+                                      cwd=ROOT, text=True).split()
+        times.append(float(out[0]) * 1000)
+        loaded = out[1] if len(out) > 1 else ''
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='无界面进程的冷启动导入耗时')
+    parser.add_argument('--repeat', type=int, default=10, help='每条导入语句的重复次数')
+    args = parser.parse_args()
+
+    print(ljust('导入', 24) + f"{'中位数 ms':>10}  加载的重型依赖")
+    failed = []
+    for name, statement in CASES.items():
+        elapsed, loaded = measure(statement, args.repeat)
+        print(ljust(name, 24) + f'{elapsed:>10.1f}  {loaded or "-"}')
+        unexpected = [m for m in loaded.split(',') if m in FORBIDDEN.get(name, ())]
+        if unexpected:
+            failed.append(f'{name} 加载了 {", ".join(unexpected)}')
+
+    for message in failed:
+        print(f'✗ {message}')
+    if failed:
+        sys.exit(1)
+    print('✓ 导入检查通过')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# YOLO标注读取与坐标转换耗时对比：逐行 split + eval + 逐框转换的原实现、整文件解析 + 数组批量转换，
+# 以及从 label_index 的索引文件读取（检查指纹与不检查两种方式）
+# 用法: python benchmarks/bench_labels.py data/train/labels --imgsz 416
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np
+
+import Config
+from detect_core import read_yolo_label_dir, xyxy_to_yolo, yolo_to_xyxy
+from label_index import build_index, load_split
+
+
+def legacy_yolo_to_location(w, h, yolo_data):
+    # 改造前的逐框转换
+    x_, y_, w_, h_ = yolo_data
+    return [int(w * x_ - 0.5 * w * w_), int(h * y_ - 0.5 * h * h_),
+            int(w * x_ + 0.5 * w * w_), int(h * y_ + 0.5 * h * h_)]
+
+
+def legacy_location_to_yolo(w, h, locations):
+    x1, y1, x2, y2 = locations
+    return [float('%.5f' % v) for v in ((x1 + x2) / 2 / w, (y1 + y2) / 2 / h, (x2 - x1) / w, (y2 - y1) / h)]
+
+
+def run_legacy(label_dir, size):
+    # 改造前 draw_yolo_data 的读取方式，转换为两点坐标后再转回YOLO格式
+    count = 0
+    for name in sorted(os.listdir(label_dir)):
+        with open(os.path.join(label_dir, name), 'r') as f:
+            for each in f.readlines():
+                temp = each.split()
+                x_, y_, w_, h_ = eval(temp[1]), eval(temp[2]), eval(temp[3]), eval(temp[4])
+                legacy_location_to_yolo(size, size, legacy_yolo_to_location(size, size, [x_, y_, w_, h_]))
+                count += 1
+    return count
+
+
+def run_vectorized(label_dir, size):
+    labels = read_yolo_label_dir(label_dir)
+    boxes = np.concatenate([b for _, b in labels.values()])
+    xyxy_to_yolo(yolo_to_xyxy(boxes, size, size, as_int=True), size, size)
+    return len(boxes)
+
+
+def run_index(label_dir, size, check):
+    index = load_split(os.path.dirname(os.path.normpath(label_dir)), check=check)
+    xyxy_to_yolo(yolo_to_xyxy(index.boxes, size, size, as_int=True), size, size)
+    return len(index.boxes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLO标注读取与坐标转换耗时对比')
+    parser.add_argument('label_dir', nargs='?', default='data/train/labels', help='标注文件夹')
+    parser.add_argument('--imgsz', type=int, default=Config.imgsz, help='图像尺寸')
+    args = parser.parse_args()
+
+    files = len(os.listdir(args.label_dir))
+    build_index(os.path.dirname(os.path.normpath(args.label_dir)))  # 先建立索引
+    cases = (('逐行 eval + 逐框转换', run_legacy), ('整文件解析 + 数组转换', run_vectorized),
+             ('标注索引 检查指纹', lambda d, s: run_index(d, s, True)),
+             ('标注索引 不检查指纹', lambda d, s: run_index(d, s, False)))
+    for name, fn in cases:
+        t1 = time.perf_counter()
+        count = fn(args.label_dir, args.imgsz)
+        print(f'{name}: {files} 个文件 {count} 个框, {(time.perf_counter() - t1) * 1000:.1f} ms')
+
+    # 只比较坐标转换（往返），标注已读入内存
+    boxes = np.concatenate([b for _, b in read_yolo_label_dir(args.label_dir).values()])
+    rows = boxes.astype(np.float64).tolist()
+    size = args.imgsz
+    t1 = time.perf_counter()
+    for row in rows:
+        legacy_location_to_yolo(size, size, legacy_yolo_to_location(size, size, row))
+    t2 = time.perf_counter()
+    xyxy_to_yolo(yolo_to_xyxy(boxes, size, size, as_int=True), size, size)
+    t3 = time.perf_counter()
+    print(f'仅坐标转换 {len(rows)} 个框: 逐框 {(t2 - t1) * 1000:.1f} ms, 数组 {(t3 - t2) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# 检测记录写入开销对比：原 insert_rows（每次读取整个CSV统计行数）、带旁路计数的 insert_rows 与 DetectionLog
+# 用法: python benchmarks/bench_log.py --calls 2000 --rows 5
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np
+
+import detect_tools as tools
+from detection_log import CSV_HEADER, DetectionLog
+
+
+def legacy_insert_rows(path, lines, header):
+    # 改造前的 insert_rows
+    no_header = False
+    if not os.path.exists(path):
+        no_header = True
+        start_num = 1
+    else:
+        start_num = len(open(path).readlines())
+    with open(path, 'a', newline='') as f:
+        csv_write = csv.writer(f)
+        if no_header:
+            csv_write.writerow(header)
+        for each_list in lines:
+            csv_write.writerow([start_num] + each_list)
+            start_num += 1
+
+
+def run_rows(fn, path, calls, rows):
+    """每次调用写入 rows 行，返回前后两半调用各自的平均耗时（毫秒），用于观察是否随日志增长变慢"""
+    line = ['TestFiles/demo.jpg', 'crazing', '91.00 %', [10, 20, 30, 40]]
+    times = []
+    for _ in range(calls):
+        t1 = time.perf_counter()
+        fn(path, [line] * rows, CSV_HEADER)
+        times.append(time.perf_counter() - t1)
+    half = calls // 2
+    return np.mean(times[:half]) * 1000, np.mean(times[half:]) * 1000
+
+
+def run_log(path, fmt, calls, rows):
+    det = np.tile(np.array([[10, 20, 30, 40, 0.91, 0]], dtype=np.float32), (rows, 1))
+    times = []
+    with DetectionLog(path, fmt=fmt, append=False) as log:
+        for _ in range(calls):
+            t1 = time.perf_counter()
+            log.append(det, 'TestFiles/demo.jpg')
+            times.append(time.perf_counter() - t1)
+    half = calls // 2
+    return np.mean(times[:half]) * 1000, np.mean(times[half:]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检测记录写入开销对比')
+    parser.add_argument('--calls', type=int, default=2000, help='写入次数（图片/帧数）')
+    parser.add_argument('--rows', type=int, default=5, help='每次写入的行数（目标数）')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        cases = [('insert_rows 原实现', lambda: run_rows(legacy_insert_rows, os.path.join(tmp, 'a.csv'),
+                                                         args.calls, args.rows)),
+                 ('insert_rows 旁路计数', lambda: run_rows(tools.insert_rows, os.path.join(tmp, 'b.csv'),
+                                                          args.calls, args.rows)),
+                 ('DetectionLog csv', lambda: run_log(os.path.join(tmp, 'c.csv'), 'csv', args.calls, args.rows)),
+                 ('DetectionLog npz', lambda: run_log(os.path.join(tmp, 'd'), 'npz', args.calls, args.rows))]
+        print(f'{args.calls} 次写入，每次 {args.rows} 行')
+        print(f"{'方式':<24}{'前半程':>10}{'后半程':>10}  (ms/次)")
+        for name, fn in cases:
+            first, second = fn()
+            print(f'{name:<24}{first:>10.3f}{second:>10.3f}')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
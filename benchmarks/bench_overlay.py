@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# 检测框绘制开销对比：results.plot()、逐框 PIL 写字的原 drawRectBox 与 OverlayRenderer
+# 用法: python benchmarks/bench_overlay.py --boxes 120
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+import Config
+import detect_tools as tools
+from overlay import OverlayRenderer, default_font, load_font
+
+FRAME_SIZES = {'416x416': (416, 416), '1080p': (1080, 1920), '4K': (2160, 3840)}
+
+
+def random_detections(height, width, num, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, [width * 0.9, height * 0.9], size=(num, 2))
+    wh = rng.uniform(0.02, 0.1, size=(num, 2)) * [width, height]
+    boxes = np.concatenate([xy, xy + wh], axis=1).astype(np.float32)
+    return boxes, rng.integers(0, len(Config.names), num), rng.uniform(0.3, 1.0, num).astype(np.float32)
+
+
+def legacy_draw(img, boxes, cls, conf, font, colors):
+    # 改造前的 drawRectBox：每个框都把整幅图像转换为 PIL 写字再转回
+    img = img.copy()
+    for box, c, p in zip(boxes.astype(int).tolist(), cls, conf):
+        color = colors(c, True)
+        cv2.rectangle(img, (box[0], box[1]), (box[2], box[3]), color, 2)
+        cv2.rectangle(img, (box[0] - 1, box[1] - 25), (box[0] + 60, box[1]), color, -1, cv2.LINE_AA)
+        pil_img = Image.fromarray(img)
+        ImageDraw.Draw(pil_img).text((box[0] + 2, box[1] - 27), '%s %.2f' % (Config.CH_names[c], p),
+                                     (255, 255, 255), font=font)
+        img = np.array(pil_img)
+    return img
+
+
+def make_results(img, boxes, cls, conf):
+    """构造 ultralytics Results，用于对比 results.plot()，未安装时返回None"""
+    try:
+        import torch
+        from ultralytics.engine.results import Results
+    except ImportError:
+        return None
+    data = np.concatenate([boxes, conf[:, None], cls[:, None]], axis=1).astype(np.float32)
+    return Results(img, path='bench.jpg', names=Config.names, boxes=torch.from_numpy(data))
+
+
+def timeit(fn, repeat):
+    fn()  # 预热，同时生成标签贴图缓存
+    t1 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t1) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检测框绘制开销对比')
+    parser.add_argument('--boxes', type=int, default=120, help='每帧检测框数量')
+    parser.add_argument('--repeat', type=int, default=20, help='每种情况重复次数')
+    args = parser.parse_args()
+
+    renderer = OverlayRenderer()
+    colors = tools.Colors()
+    font = load_font(Config.label_font, 25) or default_font(25)
+
+    print(f'每帧 {args.boxes} 个检测框')
+    print(f"{'帧尺寸':<10}{'plot()':>12}{'drawRectBox':>14}{'Overlay':>12}  (ms/帧)")
+    for name, (h, w) in FRAME_SIZES.items():
+        img = np.random.randint(0, 255, (h, w, 3), dtype=np.uint8)
+        boxes, cls, conf = random_detections(h, w, args.boxes)
+        results = make_results(img, boxes, cls, conf)
+        row = [timeit(results.plot, args.repeat) if results is not None else float('nan'),
+               timeit(lambda: legacy_draw(img, boxes, cls, conf, font, colors), max(args.repeat // 4, 1)),
+               timeit(lambda: renderer.draw(img, boxes, cls, conf), args.repeat)]
+        print(f'{name:<10}' + ''.join(f'{t:>12.2f}' for t in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+# 推理基准测试套件：在 TestFiles/ 与 data/test/images 上扫描后端、批大小、线程数与 imgsz，
+# 记录吞吐量、各阶段耗时分位数与峰值内存，以及界面启动到窗口显示、模型就绪的用时，
+# 结果写入JSON并与基线对比，出现性能回退时退出码为1
+# 每组参数在独立的子进程中运行，峰值内存与线程设置互不影响
+# 用法:
+#   python benchmarks/bench_suite.py --save-baseline    # 在当前权重与代码上生成基线
+#   python benchmarks/bench_suite.py                    # 运行并与基线对比
+#   python benchmarks/bench_suite.py --backends torch,onnx --batch-sizes 1,8 --threads 1,4 --imgsz 320,416
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import Config
+
+SOURCES = ['TestFiles', 'data/test/images']
+BASELINE = os.path.join('benchmarks', 'baseline.json')
+# 子进程输出结果的行前缀
+RESULT_MARK = 'BENCH_RESULT '
+# 与基线对比的指标，True 表示越大越好
+METRICS = {'img_per_s': True, 'inference_p95_ms': False, 'peak_rss_mb': False, 'window_s': False, 'ready_s': False}
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存，MB"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def environment(model_path):
+    """运行环境与权重信息，基线只应与相同环境的结果对比"""
+    from result_cache import weights_digest
+
+    env = {'platform': platform.platform(), 'cpu': platform.processor() or platform.machine(),
+           'cpu_count': os.cpu_count(), 'python': platform.python_version()}
+    for module in ('numpy', 'cv2', 'torch', 'ultralytics', 'onnxruntime'):
+        try:
+            env[module] = __import__(module).__version__
+        except ImportError:
+            env[module] = None
+    try:
+        env['weights'] = weights_digest(model_path).hex()
+    except OSError:
+        env['weights'] = None
+    try:
+        env['commit'] = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                                stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        env['commit'] = None
+    return env
+
+
+def case_key(case):
+    if case.get('kind') == 'startup':
+        return 'startup'
+    return '{source}|{backend}|batch={batch_size}|threads={threads}|imgsz={imgsz}'.format(**case)
+
+
+def run_case(case):
+    """在当前进程中运行一组参数，返回结果字典"""
+    import torch
+
+    from batch_infer import PrefetchLoader, iter_batches, list_images
+    from detect_backends import load_backend
+    from latency import profiler
+
+    if case['threads']:
+        torch.set_num_threads(case['threads'])
+        Config.onnx_intra_threads = case['threads']
+
+    paths = list_images(case['source'])
+    if case['limit']:
+        paths = paths[:case['limit']]
+    imgs = [img for _, img, _, _ in PrefetchLoader(paths, workers=1) if img is not None]
+
+    t1 = time.perf_counter()
+    backend = load_backend(case['backend'], case['model'], 'cpu', case['imgsz'], case['batch_size'])
+    load_time = time.perf_counter() - t1
+    backend(imgs[:case['batch_size']], conf=Config.conf, iou=Config.iou)  # 预热
+
+    # 预热之后的统计只保留推理相关阶段，解码统计单独保留
+    decode = profiler.snapshot().get('decode')
+    profiler.reset()
+    total_time, total_imgs, total_boxes = 0.0, 0, 0
+    for _ in range(case['rounds']):
+        for batch in iter_batches(imgs, case['batch_size']):
+            t1 = time.perf_counter()
+            results = backend(batch, conf=Config.conf, iou=Config.iou)
+            total_time += time.perf_counter() - t1
+            total_imgs += len(batch)
+            total_boxes += sum(len(r.boxes) for r in results)
+
+    stages = profiler.snapshot()
+    if decode:
+        stages['decode'] = decode
+    result = dict(case, images=len(imgs), load_s=load_time,
+                  img_per_s=total_imgs / total_time, ms_per_img=total_time / total_imgs * 1000,
+                  boxes_per_img=total_boxes / total_imgs, peak_rss_mb=peak_rss_mb(),
+                  stages={name: {k: s[k] * 1000 for k in ('p50', 'p95', 'p99')} for name, s in stages.items()})
+    result['inference_p95_ms'] = result['stages'].get('inference', {}).get('p95', 0.0)
+    return result
+
+
+def run_startup(model_path):
+    """测量界面启动：从导入到窗口显示、到模型加载并预热完成的用时"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    t0 = time.perf_counter()
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication([])
+    import MainProgram
+    t_import = time.perf_counter()
+    Config.model_path = model_path
+    win = MainProgram.MainWindow()
+    win.show()
+    app.processEvents()
+    t_window = time.perf_counter()
+    while not win.detector.loaded.wait(0.01):
+        app.processEvents()
+    t_ready = time.perf_counter()
+    result = {'kind': 'startup', 'import_s': t_import - t0, 'window_s': t_window - t0, 'ready_s': t_ready - t0,
+              'peak_rss_mb': peak_rss_mb()}
+    if win.detector.model is None:
+        result['error'] = '模型加载失败'
+    win.detector.stop()
+    return result
+
+
+def spawn(args, case):
+    """在子进程中运行一项测试，失败时返回带错误信息的 case"""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__)] + args,
+                          cwd=ROOT, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARK):
+            return json.loads(line[len(RESULT_MARK):])
+    error = (proc.stderr.strip().splitlines() or ['未知错误'])[-1]
+    return dict(case, error=error)
+
+
+def compare(results, baseline, tolerance):
+    """
+    与基线逐项对比
+    :return: 回退项列表 (参数, 指标, 基线值, 当前值)
+    """
+    base = {case_key(r): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    for r in results:
+        old = base.get(case_key(r))
+        if old is None or 'error' in r:
+            continue
+        for metric, higher_better in METRICS.items():
+            if not old.get(metric):
+                continue
+            change = r[metric] / old[metric] - 1
+            if (-change if higher_better else change) > tolerance:
+                regressions.append((case_key(r), metric, old[metric], r[metric]))
+    return regressions
+
+
+def print_row(r):
+    if 'error' in r:
+        print(f'{case_key(r):<60} ✗ {r["error"]}')
+        return
+    if r.get('kind') == 'startup':
+        print(f'{"startup":<60}导入 {r["import_s"]:.2f} s, 窗口显示 {r["window_s"]:.2f} s, '
+              f'模型就绪 {r["ready_s"]:.2f} s {r["peak_rss_mb"]:7.0f} MB')
+        return
+    stages = ' '.join(f'{name} {s["p50"]:.1f}/{s["p95"]:.1f}' for name, s in r['stages'].items())
+    print(f'{case_key(r):<60}{r["img_per_s"]:8.1f} 张/秒 {r["peak_rss_mb"]:7.0f} MB  {stages}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='推理基准测试套件')
+    parser.add_argument('--sources', default=','.join(SOURCES), help='测试图片文件夹，逗号分隔')
+    parser.add_argument('--model', default=Config.model_path, help='.pt 权重路径')
+    parser.add_argument('--backends', default='torch,onnx', help='后端，逗号分隔')
+    parser.add_argument('--batch-sizes', default='1,8', help='批大小，逗号分隔')
+    parser.add_argument('--threads', default='0', help='CPU线程数，逗号分隔，0为默认')
+    parser.add_argument('--imgsz', default=str(Config.imgsz), help='推理输入尺寸，逗号分隔')
+    parser.add_argument('--rounds', type=int, default=2, help='每组参数重复的轮数')
+    parser.add_argument('--limit', type=int, default=0, help='每个文件夹最多使用的图片数，0为全部')
+    parser.add_argument('--output', default=None, help='结果JSON路径，默认 save_data/benchmarks/bench-时间.json')
+    parser.add_argument('--baseline', default=BASELINE, help='基线JSON路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='允许相对基线变差的比例')
+    parser.add_argument('--no-startup', action='store_true', help='不测量界面启动用时')
+    parser.add_argument('--case', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--startup-case', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(RESULT_MARK + json.dumps(run_case(json.loads(args.case))))
+        return
+    if args.startup_case:
+        print(RESULT_MARK + json.dumps(run_startup(args.model)))
+        return
+
+    def split(text, cast=str):
+        return [cast(v) for v in text.split(',') if v]
+
+    cases = [{'source': source, 'backend': backend, 'batch_size': batch_size, 'threads': threads,
+              'imgsz': imgsz, 'model': args.model, 'rounds': args.rounds, 'limit': args.limit}
+             for source, backend, batch_size, threads, imgsz in itertools.product(
+                 split(args.sources), split(args.backends), split(args.batch_sizes, int),
+                 split(args.threads, int), split(args.imgsz, int))]
+    env = environment(args.model)
+    print(f'{len(cases)} 组参数, 权重 {args.model}, 提交 {env["commit"]}')
+
+    results = []
+    if not args.no_startup:
+        results.append(spawn(['--startup-case', '--model', args.model], {'kind': 'startup'}))
+        print_row(results[-1])
+    for case in cases:
+        results.append(spawn(['--case', json.dumps(case)], case))
+        print_row(results[-1])
+
+    report = {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'environment': env, 'results': results}
+    output = args.output or os.path.join(Config.save_path, 'benchmarks', time.strftime('bench-%Y%m%d-%H%M%S.json'))
+    for path in [output] + ([args.baseline] if args.save_baseline else []):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'✓ 结果已保存到 {path}')
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    changed = [k for k in ('cpu', 'cpu_count', 'weights') if baseline['environment'].get(k) != env[k]]
+    if changed:
+        print(f'⚠ 基线的运行环境不同（{", ".join(changed)}），对比结果仅供参考')
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f'✓ 与基线 {args.baseline} 相比没有超过 {args.tolerance:.0%} 的性能回退')
+        return
+    print(f'✗ {len(regressions)} 项相对基线 {args.baseline} 回退超过 {args.tolerance:.0%}:')
+    for key, metric, old, new in regressions:
+        print(f'  {key} {metric}: {old:.2f} -> {new:.2f}')
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
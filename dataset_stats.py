@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# 数据集统计：按 data.yaml 中的 train/val/test 子集，用进程池并行读取全部图片与标注，一次遍历统计
+#   各类别框数与出现的图片数、框尺寸与宽高比分布（按类别）、每张图片的缺陷数与覆盖面积比例、
+#   图片尺寸与通道数、各通道像素分布，以及无法解码或被截断的图片与不合法的标注行，结果写入JSON报告
+# 标注从 label_index 的索引读取，子进程只负责解码图片与计算，按块汇总后在主进程合并，耗时随核数线性下降
+# 用法:
+#   python dataset_stats.py data/data.yaml --workers 8 --output save_data/dataset_stats.json
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+import Config
+from label_index import load_split
+
+# 框尺寸（框面积的平方根，像素）的分组边界，32 与 96 为 COCO 小/中/大目标的分界
+SIZE_BINS = [0, 8, 16, 32, 64, 96, 128, 192, 256, 384, 512, np.inf]
+# 宽高比（宽/高）的分组边界
+ASPECT_BINS = [0, 1 / 8, 1 / 4, 1 / 2, 2 / 3, 3 / 2, 2, 4, 8, np.inf]
+# 每张图片缺陷数的分组边界
+DENSITY_BINS = [0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, np.inf]
+# 框覆盖图片面积比例的分组边界（框可能重叠，比例可超过1）
+COVERAGE_BINS = [0, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, np.inf]
+# 每个子进程任务包含的图片数
+CHUNK_SIZE = 64
+# 标注坐标允许超出 [0, 1] 的误差
+EPS = 1e-6
+
+
+def read_data_yaml(path):
+    """
+    读取 data.yaml
+    :return: (类别名称列表, {子集: 子集目录})，子集目录包含 images/ 与 labels/
+    """
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    names = data['names']
+    names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+    root = os.path.dirname(os.path.abspath(path))
+    splits = {}
+    for split in ('train', 'val', 'test'):
+        images = data.get(split)
+        if not images:
+            continue
+        image_dir = os.path.normpath(os.path.join(root, data.get('path', ''), images))
+        if not os.path.isdir(image_dir):
+            # Roboflow 导出的 data.yaml 中路径为 ../train/images，实际与 data.yaml 位于同一目录
+            image_dir = os.path.join(root, images.lstrip('./'))
+        if os.path.isdir(image_dir):
+            splits[split] = os.path.dirname(image_dir)
+    return names, splits
+
+
+def empty_stats(nc):
+    """可逐项相加合并的统计量"""
+    return {
+        'images': 0, 'background_images': 0, 'boxes': 0, 'bytes': 0, 'pixels': 0,
+        'class_boxes': np.zeros(nc, np.int64),
+        'class_images': np.zeros(nc, np.int64),
+        'box_size': np.zeros((nc, len(SIZE_BINS) - 1), np.int64),
+        'aspect': np.zeros((nc, len(ASPECT_BINS) - 1), np.int64),
+        'boxes_per_image': np.zeros(len(DENSITY_BINS) - 1, np.int64),
+        'coverage': np.zeros(len(COVERAGE_BINS) - 1, np.int64),
+        'channel_hist': np.zeros((3, 256), np.int64),
+        'image_sizes': Counter(),
+        'channels': Counter(),
+        'corrupt': [],
+        'label_errors': [],
+        'orphan_labels': [],
+    }
+
+
+def merge(total, part):
+    for key, value in part.items():
+        if isinstance(value, list):
+            total[key].extend(value)
+        else:
+            total[key] += value
+    return total
+
+
+def class_hist(classes, values, bins, nc):
+    """按类别统计 values 落在各分组的数量，返回 nc×分组数"""
+    idx = np.digitize(values, bins[1:-1])
+    nbins = len(bins) - 1
+    return np.bincount(classes * nbins + idx, minlength=nc * nbins).reshape(nc, nbins)
+
+
+def decode(path):
+    """
+    读取并解码图片
+    :return: (图片, 文件字节数, 错误说明)，无法解码时图片为None
+    """
+    data = np.fromfile(path, dtype=np.uint8)
+    if not len(data):
+        return None, 0, '空文件'
+    img = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None, len(data), '无法解码'
+    # JPEG 被截断时 OpenCV 仍会返回图像（缺失部分为灰色），以结尾附近是否有 EOI 标记判断
+    if data[:2].tobytes() == b'\xff\xd8' and b'\xff\xd9' not in data[-64:].tobytes():
+        return img, len(data), 'JPEG 被截断'
+    return img, len(data), None
+
+
+def scan_chunk(task):
+    """
+    子进程中统计一组图片
+    :param task: (类别数, [(图片路径, 标注路径, 类别索引, 归一化坐标), ...])
+    """
+    nc, items = task
+    stats = empty_stats(nc)
+    for image_path, label_path, classes, boxes in items:
+        img, size, error = decode(image_path)
+        stats['images'] += 1
+        stats['bytes'] += size
+        if error:
+            stats['corrupt'].append({'image': image_path, 'error': error})
+        if img is not None:
+            h, w = img.shape[:2]
+            channels = 1 if img.ndim == 2 else img.shape[2]
+            stats['image_sizes'][f'{w}x{h}'] += 1
+            stats['channels'][channels] += 1
+            stats['pixels'] += w * h
+            if img.dtype != np.uint8:  # 16位等图片按8位统计分布
+                img = cv2.convertScaleAbs(img, alpha=255 / max(float(img.max()), 1))
+            for c in range(3):
+                hist = cv2.calcHist([img], [min(c, channels - 1)], None, [256], [0, 256])
+                stats['channel_hist'][c] += hist.ravel().astype(np.int64)
+
+        # 检查标注：类别越界、坐标超出图片、宽高不为正
+        bad = (classes < 0) | (classes >= nc) | (boxes[:, 2] <= 0) | (boxes[:, 3] <= 0) | \
+            (np.abs(boxes[:, :2] - 0.5) > 0.5 + EPS).any(axis=1) | (boxes[:, 2:] > 1 + EPS).any(axis=1)
+        for row in np.flatnonzero(bad).tolist():
+            stats['label_errors'].append({'label': label_path, 'row': row, 'class': int(classes[row]),
+                                          'box': boxes[row].tolist()})
+        classes, boxes = classes[~bad].astype(np.int64), boxes[~bad].astype(np.float64)
+
+        stats['boxes'] += len(boxes)
+        stats['boxes_per_image'] += np.histogram([len(boxes)], DENSITY_BINS)[0]
+        if not len(boxes):
+            stats['background_images'] += 1
+            continue
+        stats['class_boxes'] += np.bincount(classes, minlength=nc)
+        stats['class_images'][np.unique(classes)] += 1
+        if img is None:
+            continue
+        pixel_w, pixel_h = boxes[:, 2] * w, boxes[:, 3] * h
+        stats['box_size'] += class_hist(classes, np.sqrt(pixel_w * pixel_h), SIZE_BINS, nc)
+        stats['aspect'] += class_hist(classes, pixel_w / pixel_h, ASPECT_BINS, nc)
+        stats['coverage'] += np.histogram([(boxes[:, 2] * boxes[:, 3]).sum()], COVERAGE_BINS)[0]
+    return stats
+
+
+def iter_tasks(index, nc, chunk_size):
+    """按块生成子进程任务，标注从索引中切片，不逐个打开标注文件"""
+    for start in range(0, len(index), chunk_size):
+        yield nc, [(index.image_path(i), index.label_path(i)) + tuple(index[i])
+                   for i in range(start, min(start + chunk_size, len(index)))]
+
+
+def scan_split(split_dir, nc, pool, chunk_size=CHUNK_SIZE):
+    """统计一个子集，pool 为 None 时在当前进程中运行"""
+    index = load_split(split_dir)
+    stats = empty_stats(nc)
+    tasks = iter_tasks(index, nc, chunk_size)
+    for part in (pool.imap_unordered(scan_chunk, tasks) if pool else map(scan_chunk, tasks)):
+        merge(stats, part)
+    # 整个文件无法解析的标注（字段数不对或含非数字内容），索引中按没有框记录
+    for i in np.flatnonzero(index.errors != '').tolist():
+        stats['label_errors'].append({'label': index.label_path(i), 'row': None, 'error': str(index.errors[i])})
+    labels_dir = os.path.join(split_dir, 'labels')
+    if os.path.isdir(labels_dir):
+        # 没有对应图片的标注文件
+        names = set(index.names.tolist())
+        stats['orphan_labels'] += sorted(os.path.join(labels_dir, name) for name in os.listdir(labels_dir)
+                                         if name.endswith('.txt') and name[:-4] not in names)
+    return stats
+
+
+def bins_report(bins, counts):
+    """分组计数转为 [{'range': [下界, 上界], 'count': 数量}]，上界为 null 表示无穷大"""
+    return [{'range': [lo, None if np.isinf(hi) else hi], 'count': int(n)}
+            for lo, hi, n in zip(bins[:-1], bins[1:], counts)]
+
+
+def to_report(stats, names, elapsed=None):
+    """统计量转为可JSON序列化的报告"""
+    hist = stats['channel_hist']
+    levels = np.arange(256)
+    total = np.maximum(hist.sum(axis=1), 1)
+    mean = (hist * levels).sum(axis=1) / total
+    std = np.sqrt(np.maximum((hist * levels ** 2).sum(axis=1) / total - mean ** 2, 0))
+    report = {
+        'images': stats['images'],
+        'background_images': stats['background_images'],
+        'boxes': stats['boxes'],
+        'bytes': stats['bytes'],
+        'classes': [{'id': i, 'name': name, 'boxes': int(stats['class_boxes'][i]),
+                     'images': int(stats['class_images'][i]),
+                     'box_size': bins_report(SIZE_BINS, stats['box_size'][i]),
+                     'aspect': bins_report(ASPECT_BINS, stats['aspect'][i])} for i, name in enumerate(names)],
+        'box_size': bins_report(SIZE_BINS, stats['box_size'].sum(axis=0)),
+        'aspect': bins_report(ASPECT_BINS, stats['aspect'].sum(axis=0)),
+        'boxes_per_image': bins_report(DENSITY_BINS, stats['boxes_per_image']),
+        'mean_boxes_per_image': stats['boxes'] / max(stats['images'], 1),
+        'coverage': bins_report(COVERAGE_BINS, stats['coverage']),
+        'image_sizes': dict(stats['image_sizes'].most_common()),
+        'channels': {str(k): v for k, v in sorted(stats['channels'].items())},
+        # 通道顺序为 B, G, R，灰度图三个通道相同
+        'channel_mean': mean.tolist(),
+        'channel_std': std.tolist(),
+        'channel_hist': hist.tolist(),
+        'corrupt': stats['corrupt'],
+        'label_errors': stats['label_errors'],
+        'orphan_labels': stats['orphan_labels'],
+    }
+    if elapsed is not None:
+        report['elapsed_s'] = elapsed
+        report['images_per_s'] = stats['images'] / max(elapsed, 1e-9)
+    return report
+
+
+def print_summary(split, report):
+    print(f"✓ {split}: {report['images']} 张图片 {report['boxes']} 个框, 无缺陷 {report['background_images']} 张, "
+          f"平均 {report['mean_boxes_per_image']:.2f} 个/张, {report.get('images_per_s', 0):.0f} 张/秒")
+    print('   ' + ', '.join(f"{c['name']} {c['boxes']}" for c in report['classes']))
+    print('   尺寸 ' + ', '.join(f'{k} ({v})' for k, v in list(report['image_sizes'].items())[:3]) +
+          '  通道均值(BGR) ' + ' '.join(f'{v:.1f}' for v in report['channel_mean']))
+    problems = len(report['corrupt']) + len(report['label_errors']) + len(report['orphan_labels'])
+    if problems:
+        print(f"✗ 损坏图片 {len(report['corrupt'])}, 不合法标注 {len(report['label_errors'])}, "
+              f"无对应图片的标注 {len(report['orphan_labels'])}，详见报告")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据集统计')
+    parser.add_argument('data', nargs='?', default=os.path.join('data', 'data.yaml'), help='data.yaml 路径')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数，0为在当前进程中运行')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='每个进程任务的图片数')
+    parser.add_argument('--output', default=os.path.join(Config.save_path, 'dataset_stats.json'), help='报告JSON路径')
+    args = parser.parse_args()
+
+    names, splits = read_data_yaml(args.data)
+    report = {'data': os.path.abspath(args.data), 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+              'names': names, 'workers': args.workers, 'splits': {}}
+    total = empty_stats(len(names))
+    t0 = time.perf_counter()
+    pool = Pool(args.workers) if args.workers > 0 else None
+    try:
+        for split, split_dir in splits.items():
+            t1 = time.perf_counter()
+            stats = scan_split(split_dir, len(names), pool, args.chunk_size)
+            report['splits'][split] = to_report(stats, names, time.perf_counter() - t1)
+            print_summary(split, report['splits'][split])
+            merge(total, stats)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    report['total'] = to_report(total, names, time.perf_counter() - t0)
+    print_summary('total', report['total'])
+
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'✓ 报告已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# 推理后端：PyTorch（ultralytics YOLO）与 ONNX Runtime
+# 两种后端的调用方式相同，都返回 ultralytics 的 Results 列表，界面显示、表格与绘制代码无需区分
+import ast
+import os
+
+import cv2
+import numpy as np
+
+import Config
+import detect_core as core
+from latency import record, span
+from preprocess import LetterboxPool, letterbox_params
+
+BACKENDS = ['torch', 'onnx', 'openvino']
+
+
+def load_backend(name=None, model_path=None, device=None, imgsz=None, batch_size=1):
+    """
+    按名称创建推理后端，参数缺省时取 Config 中的设置
+    :param name: 'torch'、'onnx' 或 'openvino'（INT8量化模型，需先运行 quantize_int8.py）
+    :param model_path: .pt 权重路径，onnx后端会在其旁边缓存导出的 .onnx 文件
+    :param device: torch后端使用的设备，onnx后端固定使用CPU
+    :param imgsz: 推理输入尺寸
+    :param batch_size: 每次调用的最大图片数，按此预分配前处理缓冲区
+    """
+    name = name or Config.backend
+    model_path = model_path or Config.model_path
+    imgsz = imgsz or Config.imgsz
+    # 切片推理时实际后端每次处理一批切块
+    if Config.tile_size:
+        batch_size = max(batch_size, Config.tile_batch_size)
+    if name == 'torch':
+        backend = TorchBackend(model_path, device, imgsz, batch_size)
+    elif name == 'onnx':
+        backend = OnnxBackend(model_path, imgsz, Config.onnx_intra_threads, Config.onnx_inter_threads, batch_size)
+    elif name == 'openvino':
+        backend = OpenVINOBackend(model_path, imgsz, batch_size)
+    else:
+        raise ValueError(f'未知的推理后端: {name}，可选 {BACKENDS}')
+
+    # 开启切片推理时，大图由 TiledBackend 切块后交给实际后端
+    if Config.tile_size:
+        from tiled_infer import TiledBackend
+        backend = TiledBackend(backend, Config.tile_size, Config.tile_overlap, Config.tile_merge,
+                               Config.tile_merge_iou, Config.tile_batch_size)
+    return backend
+
+
+def letterbox(img, new_shape, color=(114, 114, 114)):
+    """
+    等比缩放并居中填充到 new_shape×new_shape，与 ultralytics LetterBox 的取整方式一致
+    :return: 填充后的图像
+    """
+    width, height, top, left = letterbox_params(img.shape[:2], new_shape)
+    if img.shape[:2] != (height, width):
+        img = cv2.resize(img, (width, height), interpolation=cv2.INTER_LINEAR)
+    bottom, right = new_shape - height - top, new_shape - width - left
+    return cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+
+
+def read_sources(source):
+    """
+    统一输入为(图像列表, 路径列表)，支持路径、图像及它们的列表
+    路径统一经 img_cvread 解码（支持中文路径），调用方已解码的图像直接使用，不会重复解码
+    """
+    sources = source if isinstance(source, (list, tuple)) else [source]
+    imgs, paths = [], []
+    for i, each in enumerate(sources):
+        if isinstance(each, str):
+            with span('decode'):
+                img = core.img_cvread(each)
+            if img is None:
+                raise FileNotFoundError(f'无法读取图片: {each}')
+            imgs.append(img)
+            paths.append(each)
+        else:
+            imgs.append(each)
+            paths.append(f'image{i}.jpg')
+    return imgs, paths
+
+
+def scale_det(det, imgsz, shape):
+    """将 imgsz×imgsz 输入上的检测框还原到原图坐标"""
+    from ultralytics.utils import ops
+    det[:, :4] = ops.scale_boxes((imgsz, imgsz), det[:, :4], shape)
+    return det
+
+
+class TorchBackend:
+    # PyTorch 推理，ultralytics YOLO 直接接收前处理好的张量，预处理不再由 ultralytics 逐次分配
+    # 注意：输入统一按 imgsz×imgsz 正方形 letterbox，与 ONNX/OpenVINO 后端的输入一致，
+    # 而不是 ultralytics 原先对单张图片使用的最小矩形填充；非正方形图片的框坐标与置信度可能与改造前略有差异
+    name = 'torch'
+
+    def __init__(self, model_path, device=None, imgsz=416, batch_size=1):
+        import torch
+        from ultralytics import YOLO
+        self.model = YOLO(model_path, task='detect')
+        self.device = device
+        self.imgsz = imgsz
+        self.names = self.model.names
+        # GPU推理时缓冲区使用锁页内存
+        pin = device not in (None, 'cpu') and torch.cuda.is_available()
+        self.preprocess = LetterboxPool(imgsz, batch_size, pin=pin)
+
+    def __call__(self, source, conf=0.25, iou=0.7):
+        import torch
+
+        # 文件读取与解码、前处理都不交给 ultralytics，张量与缓冲区共享内存
+        imgs, paths = read_sources(source)
+        batch = torch.from_numpy(self.preprocess(imgs))
+        outputs = self.model(batch, conf=conf, iou=iou, imgsz=self.imgsz, device=self.device, verbose=False)
+        # ultralytics 记录了每张图片的平均耗时（毫秒），乘以张数即为本次调用的耗时
+        if outputs:
+            record('inference', outputs[0].speed['inference'] * len(outputs) / 1000)
+            record('nms', outputs[0].speed['postprocess'] * len(outputs) / 1000)
+        # ultralytics 输出为推理模式张量，不能原地修改，复制后再还原坐标
+        return [make_results(img, path, self.names, scale_det(output.boxes.data.clone(), self.imgsz, img.shape))
+                for img, path, output in zip(imgs, paths, outputs)]
+
+
+class OpenVINOBackend(TorchBackend):
+    # OpenVINO INT8 推理，模型由 quantize_int8.py 量化并通过精度检查后发布
+    name = 'openvino'
+
+    def __init__(self, model_path, imgsz=416, batch_size=1):
+        model_dir = int8_model_dir(model_path)
+        if not os.path.isdir(model_dir):
+            raise FileNotFoundError(f'未找到INT8模型 {model_dir}，请先运行 quantize_int8.py')
+        super(OpenVINOBackend, self).__init__(model_dir, 'cpu', imgsz, batch_size)
+
+
+class OnnxBackend:
+    # ONNX Runtime CPU 推理，预处理与后处理和 ultralytics 保持一致
+    name = 'onnx'
+
+    def __init__(self, model_path, imgsz=416, intra_threads=0, inter_threads=0, batch_size=1):
+        import onnxruntime as ort
+
+        self.imgsz = imgsz
+        self.preprocess = LetterboxPool(imgsz, batch_size)
+        onnx_path = export_onnx(model_path, imgsz)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_threads
+        options.inter_op_num_threads = inter_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # 导出时类别名称写在模型元数据中
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta['names']) if 'names' in meta else dict(Config.names)
+
+    def __call__(self, source, conf=0.25, iou=0.7):
+        imgs, paths = read_sources(source)
+        batch = self.preprocess(imgs)
+        with span('inference'):
+            preds = self.session.run(None, {self.input_name: batch})[0]
+        with span('nms'):
+            return self.postprocess(preds, imgs, paths, conf, iou)
+
+    def postprocess(self, preds, imgs, paths, conf, iou):
+        """NMS 并将坐标还原到原图，封装为 ultralytics Results"""
+        import torch
+        try:
+            from ultralytics.utils.ops import non_max_suppression
+        except ImportError:  # 新版 ultralytics 将 NMS 移到了 nms 模块
+            from ultralytics.utils.nms import non_max_suppression
+
+        dets = non_max_suppression(torch.from_numpy(preds), conf, iou)
+        results = []
+        for det, img, path in zip(dets, imgs, paths):
+            results.append(make_results(img, path, self.names, scale_det(det, self.imgsz, img.shape)))
+        return results
+
+
+def make_results(img, path, names, det):
+    """
+    将检测框封装为 ultralytics Results，供表格、下拉框与绘制代码统一使用
+    :param det: N×6 数组或张量，每行为 x1, y1, x2, y2, conf, cls（原图坐标）
+    """
+    import torch
+    from ultralytics.engine.results import Results
+
+    if isinstance(det, np.ndarray):
+        det = torch.from_numpy(np.ascontiguousarray(det, dtype=np.float32))
+    return Results(img, path=path, names=names, boxes=det)
+
+
+def export_onnx(model_path, imgsz):
+    """
+    将 .pt 权重导出为 .onnx 并缓存在权重旁边，权重更新后自动重新导出
+    :return: onnx 文件路径
+    """
+    onnx_path = os.path.splitext(model_path)[0] + '.onnx'
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(model_path):
+        return onnx_path
+
+    from ultralytics import YOLO
+    print(f'导出ONNX模型: {onnx_path}')
+    # dynamic=True 使批大小可变，批量检测与单张检测共用一个模型文件
+    exported = YOLO(model_path, task='detect').export(format='onnx', imgsz=imgsz, dynamic=True)
+    if os.path.abspath(exported) != os.path.abspath(onnx_path):
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+
+def int8_model_dir(model_path):
+    """INT8 OpenVINO 模型的发布目录，位于权重旁边"""
+    return os.path.splitext(model_path)[0] + '_int8_openvino_model'
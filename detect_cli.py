@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# 无界面批量检测：输入文件夹、通配符或清单文件，多线程预读解码 + 按批推理，结果边检测边写入CSV
+# 不导入PyQt5，可直接在无显示环境的服务器上运行
+import argparse
+import glob
+import os
+import time
+
+from tqdm import tqdm
+
+import Config
+from batch_infer import IMG_SUFFIX, PrefetchLoader, auto_batch_size, list_images
+from detection_log import FORMATS, DetectionLog
+from latency import profiler
+
+
+def collect_sources(source):
+    """
+    解析检测输入
+    :param source: 图片文件夹、通配符（如 data/**/*.jpg）、单张图片或清单文件（每行一个图片路径）
+    :return: 图片路径列表
+    """
+    if os.path.isdir(source):
+        return list_images(source)
+    if any(c in source for c in '*?['):
+        return sorted(p for p in glob.glob(source, recursive=True) if p.split('.')[-1].lower() in IMG_SUFFIX)
+    if not os.path.isfile(source):
+        raise FileNotFoundError(f'找不到检测输入: {source}')
+    if source.split('.')[-1].lower() in IMG_SUFFIX:
+        return [source]
+
+    # 清单文件中的相对路径以清单所在目录为基准，#开头的行为注释
+    root = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    return [line if os.path.isabs(line) else os.path.join(root, line)
+            for line in lines if line and not line.startswith('#')]
+
+
+def run(args):
+    from detect_backends import load_backend
+
+    paths = collect_sources(args.source)
+    if not paths:
+        print('✗ 没有找到需要检测的图片')
+        return
+
+    batch_size = args.batch_size or auto_batch_size(args.imgsz)
+    print(f'图片数量: {len(paths)}  批大小: {batch_size}  解码线程: {args.workers}')
+
+    model = load_backend(args.backend, args.model, args.device, args.imgsz, batch_size)
+
+    # 列式格式输出为分片目录
+    output = args.output if args.format == 'csv' else os.path.splitext(args.output)[0]
+
+    failed = []
+    num_boxes = 0
+    infer_time = 0.0
+    t_start = time.time()
+    with DetectionLog(output, fmt=args.format, append=args.append) as log:
+        pbar = tqdm(total=len(paths), unit='img')
+        batch_paths, batch_imgs, batch_scales = [], [], []
+        # 预读深度至少两批，当前批推理时下一批已在解码
+        loader = PrefetchLoader(paths, args.workers, max(args.prefetch, batch_size * 2),
+                                imgsz=args.imgsz if args.reduced_decode else 0)
+        decoded = iter(loader)
+        while True:
+            item = next(decoded, None)
+            if item is not None:
+                path, img, _, scale = item
+                if img is None:
+                    failed.append(path)
+                    pbar.update(1)
+                else:
+                    batch_paths.append(path)
+                    batch_imgs.append(img)
+                    batch_scales.append(scale)
+            # 凑满一批或输入结束时执行推理
+            if batch_imgs and (len(batch_imgs) >= batch_size or item is None):
+                t1 = time.time()
+                results = model(batch_imgs, conf=args.conf, iou=args.iou)
+                infer_time += time.time() - t1
+                # 检测记录在后台线程中批量写入
+                for path, result, scale in zip(batch_paths, results, batch_scales):
+                    det = result.boxes.data.cpu().numpy()
+                    if scale != 1.0:
+                        # 缩小解码的图片，检测框换算回原图坐标
+                        det[:, :4] *= scale
+                    log.append(det, path)
+                    num_boxes += len(det)
+
+                pbar.update(len(batch_imgs))
+                elapsed = time.time() - t_start
+                pbar.set_postfix(fps='%.1f' % (pbar.n / elapsed), boxes=num_boxes)
+                batch_paths, batch_imgs, batch_scales = [], [], []
+            if item is None:
+                break
+        pbar.close()
+
+    elapsed = time.time() - t_start
+    done = len(paths) - len(failed)
+    print(f'✓ 检测完成: {done} 张图片, {num_boxes} 个目标, 结果已保存到 {output}')
+    print(f'  总用时 {elapsed:.2f} s, 吞吐量 {done / elapsed:.1f} 张/秒, '
+          f'推理占比 {infer_time / elapsed * 100:.1f}%')
+    print(f'  {loader.summary(elapsed)}')
+    if loader.reduced:
+        print(f'  {loader.reduced} 张大图按 IMREAD_REDUCED_* 缩小解码')
+    if failed:
+        print(f'✗ {len(failed)} 张图片无法读取，例如: {failed[0]}')
+    print(profiler.table())
+    if args.stats:
+        profiler.export(args.stats)
+        print(f'✓ 耗时统计已保存到 {args.stats}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='钢材表面缺陷无界面批量检测')
+    parser.add_argument('source', help='图片文件夹、通配符或清单文件')
+    parser.add_argument('--model', default=Config.model_path, help='模型路径')
+    parser.add_argument('--output', default=os.path.join(Config.save_path, 'batch_results.csv'), help='结果CSV路径')
+    parser.add_argument('--format', default='csv', choices=FORMATS,
+                        help='结果格式，npz / parquet 为列式分片，写入 --output 去掉扩展名的目录')
+    parser.add_argument('--append', action='store_true', help='追加到已有结果之后，序号接续')
+    parser.add_argument('--conf', type=float, default=Config.conf, help='置信度阈值')
+    parser.add_argument('--iou', type=float, default=Config.iou, help='NMS的IOU阈值')
+    parser.add_argument('--imgsz', type=int, default=Config.imgsz, help='推理输入尺寸')
+    parser.add_argument('--batch-size', type=int, default=Config.batch_size, help='每批图片数量，0为自动')
+    parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1), help='解码线程数')
+    parser.add_argument('--prefetch', type=int, default=Config.prefetch_depth, help='预读深度（提前解码的图片数）')
+    parser.add_argument('--reduced-decode', action='store_true',
+                        help='长边达到 imgsz 2/4/8 倍的JPEG缩小解码，检测框换算回原图坐标')
+    parser.add_argument('--stats', default='', help='各阶段耗时统计的导出路径，.prom 为 Prometheus 文本格式，其他为JSON')
+    parser.add_argument('--backend', default=Config.backend, help='推理后端: torch 或 onnx')
+    parser.add_argument('--device', default=None, help='推理设备，如 0 或 cpu')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    run(parse_args())
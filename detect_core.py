@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# 无界面的检测工具：读图解码、YOLO标注读取与坐标转换、颜色表与结果表格写入，只依赖 OpenCV 与 numpy，
+# 批量检测、命令行与其他后台进程直接导入本模块，不会加载 PyQt5 与 PIL；
+# 界面仍可通过 detect_tools 使用这些函数，Qt 相关的转换在 detect_qt 中
+import csv
+import os
+
+import cv2
+import numpy as np
+
+
+# 绘图展示
+def cv_show(name, img):
+    cv2.imshow(name, img)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
+
+
+def img_cvread(path, reduce=1):
+    # 读取含中文名的图片文件
+    # img = cv2.imread(path)
+    img = img_decode(np.fromfile(path, dtype=np.uint8), reduce)
+    return img
+
+
+# 缩小解码的倍数对应的读取标志，JPEG 由 libjpeg 在解码时直接按 1/2、1/4、1/8 缩放
+REDUCED_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+def img_decode(data, reduce=1):
+    # 从文件内容解码图片，所有读图入口共用，失败时返回None；reduce 为缩小解码的倍数
+    return cv2.imdecode(data, REDUCED_FLAGS[reduce])
+
+
+def draw_boxes(img, boxes):
+    for each in boxes:
+        x1 = each[0]
+        y1 = each[1]
+        x2 = each[2]
+        y2 = each[3]
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    return img
+
+
+def insert_rows(path, lines, header):
+    """
+    将n行数据写入csv文件
+    :param path:
+    :param lines:
+    :return:
+    """
+    # 已写入的行数保存在旁路计数文件中，不再每次读取整个文件
+    from detection_log import read_counter, write_counter
+    no_header = not os.path.exists(path)
+    start_num = read_counter(path) + 1
+
+    csv_head = header
+    with open(path, 'a', newline='') as f:
+        csv_write = csv.writer(f)
+        if no_header:
+            csv_write.writerow(csv_head)  # 写入表头
+
+        for each_list in lines:
+            # 添加序号
+            each_list = [start_num] + each_list
+            csv_write.writerow(each_list)
+            # 序号 + 1
+            start_num += 1
+    write_counter(path, start_num - 1)
+
+
+class Colors:
+    # 用于绘制不同颜色
+    def __init__(self):
+        """Initialize colors as hex = matplotlib.colors.TABLEAU_COLORS.values()."""
+        hexs = ('FF3838', 'FF9D97', 'FF701F', 'FFB21D', 'CFD231', '48F90A', '92CC17', '3DDB86', '1A9334', '00D4BB',
+                '2C99A8', '00C2FF', '344593', '6473FF', '0018EC', '8438FF', '520085', 'CB38FF', 'FF95C8', 'FF37C7')
+        self.palette = [self.hex2rgb(f'#{c}') for c in hexs]
+        self.n = len(self.palette)
+        self.pose_palette = np.array([[255, 128, 0], [255, 153, 51], [255, 178, 102], [230, 230, 0], [255, 153, 255],
+                                      [153, 204, 255], [255, 102, 255], [255, 51, 255], [102, 178, 255], [51, 153, 255],
+                                      [255, 153, 153], [255, 102, 102], [255, 51, 51], [153, 255, 153], [102, 255, 102],
+                                      [51, 255, 51], [0, 255, 0], [0, 0, 255], [255, 0, 0], [255, 255, 255]],
+                                     dtype=np.uint8)
+
+    def __call__(self, i, bgr=False):
+        """Converts hex color codes to rgb values."""
+        c = self.palette[int(i) % self.n]
+        return (c[2], c[1], c[0]) if bgr else c
+
+    @staticmethod
+    def hex2rgb(h):  # rgb order (PIL)
+        return tuple(int(h[1 + i:1 + i + 2], 16) for i in (0, 2, 4))
+
+
+def yolo_to_xyxy(boxes, w, h, clip=False, as_int=False):
+    """
+    YOLO 归一化坐标 (中心x, 中心y, 宽, 高) 批量转为两点坐标 (x1, y1, x2, y2)
+    :param boxes: N×4 数组
+    :param w: 图像宽度
+    :param h: 图像高度
+    :param clip: 为True时裁剪到图像范围内
+    :param as_int: 为True时与 int() 一样向零取整，返回 int32 数组，画图时使用
+    :return: N×4 数组
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    size = np.array([w, h], dtype=np.float64)
+    center = boxes[:, :2] * size
+    half = 0.5 * size * boxes[:, 2:]
+    out = np.concatenate([center - half, center + half], axis=1)
+    if clip:
+        np.clip(out, 0, np.tile(size, 2), out=out)
+    return out.astype(np.int32) if as_int else out
+
+
+def xyxy_to_yolo(boxes, w, h, clip=False, decimals=5):
+    """
+    两点坐标 (x1, y1, x2, y2) 批量转为 YOLO 归一化坐标 (中心x, 中心y, 宽, 高)
+    :param boxes: N×4 数组
+    :param clip: 为True时先把两点坐标裁剪到图像范围内
+    :param decimals: 保留的小数位数，None 为不取舍
+    :return: N×4 float64 数组
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    size = np.array([w, h], dtype=np.float64)
+    if clip:
+        boxes = np.clip(boxes, 0, np.tile(size, 2))
+    out = np.concatenate([(boxes[:, :2] + boxes[:, 2:]) / 2 / size, (boxes[:, 2:] - boxes[:, :2]) / size], axis=1)
+    return out if decimals is None else np.round(out, decimals)
+
+
+def yolo_to_location(w, h, yolo_data):
+    # yolo文件转两点坐标，注意画图坐标要转换成int格式
+    return yolo_to_xyxy(yolo_data, w, h, as_int=True)[0].tolist()
+
+
+def location_to_yolo(w, h, locations):
+    # x1,y1左上角坐标，x2,y2右上角坐标
+    return xyxy_to_yolo(locations, w, h)[0].tolist()
+
+
+def read_yolo_labels(path):
+    """
+    读取YOLO标注文件，每行均为5个字段时整个文件一次解析为数组
+    分割标注的多边形行 (类别 x1 y1 x2 y2 ...) 取外接框，与 ultralytics 训练时的处理一致
+    :return: (N 类别索引 int32, N×4 归一化坐标 (中心x, 中心y, 宽, 高) float32)，空文件时 N 为0
+    :raises ValueError: 某行的字段数既不是5，也不是不少于7的奇数（多边形），或含有非数字内容
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    lines = data.splitlines()
+    # 逐行核对字段数，总数是5的倍数不代表每行都是5个字段
+    counts = [len(line.split()) for line in lines]
+    if all(count in (0, 5) for count in counts):
+        try:
+            values = np.fromstring(data, sep=' ')
+        except ValueError:  # 含非数字内容，逐行解析时报告所在行
+            values = None
+        if values is not None and values.size == 5 * (len(counts) - counts.count(0)):
+            values = values.reshape(-1, 5)
+            return values[:, 0].astype(np.int32), values[:, 1:].astype(np.float32)
+
+    boxes = []
+    for n, line in enumerate(lines, 1):
+        fields = line.split()
+        if not fields:
+            continue
+        try:
+            values = np.array(fields, dtype=np.float64)
+        except ValueError:
+            raise ValueError(f'{path} 第 {n} 行含有非数字内容') from None
+        if len(values) == 5:
+            boxes.append(values)
+        elif len(values) >= 7 and len(values) % 2:
+            points = values[1:].reshape(-1, 2)
+            (x1, y1), (x2, y2) = points.min(axis=0), points.max(axis=0)
+            boxes.append([values[0], (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+        else:
+            raise ValueError(f'{path} 第 {n} 行有 {len(values)} 个字段，应为5个（框）或不少于7的奇数个（多边形）')
+    values = np.array(boxes, dtype=np.float64).reshape(-1, 5)
+    return values[:, 0].astype(np.int32), values[:, 1:].astype(np.float32)
+
+
+def read_yolo_label_dir(label_dir):
+    """
+    读取文件夹内的全部YOLO标注文件
+    :return: {文件名(不含扩展名): (类别索引, 归一化坐标)}，按文件名排序
+    """
+    names = sorted(name for name in os.listdir(label_dir) if name.endswith('.txt'))
+    return {os.path.splitext(name)[0]: read_yolo_labels(os.path.join(label_dir, name)) for name in names}
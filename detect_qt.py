@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+# Qt 显示相关工具：OpenCV 图像到 QLabel 的显示通道
+import cv2
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PyQt5.QtGui import QImage, QPixmap
+
+import Config
+from detection_store import DetectionStore
+from latency import span
+
+# Format_RGB32 在(小端)内存中的排列为 B,G,R,0xFF，与 OpenCV 的 BGRA 一致，
+# 且是 QPixmap 的原生格式，fromImage 时不做逐像素转换（RGB888/BGR888 都需要），
+# 得到的 QPixmap 直接共享这块内存，因此显示期间必须保持其有效且不被改写
+BUFFER_FORMAT = QImage.Format_RGB32
+
+
+def fit_size(shape, max_width, max_height):
+    """保持宽高比缩放到显示区域内的尺寸 (宽, 高)"""
+    img_height, img_width = shape[:2]
+    ratio = img_width / img_height
+    if ratio >= max_width / max_height:
+        return max_width, int(max_width / ratio)
+    return int(max_height * ratio), max_height
+
+
+def to_display(img, dst=None):
+    """BGR图像转为显示缓冲区格式(BGRA)，可在非GUI线程中调用"""
+    return cv2.cvtColor(img, cv2.COLOR_BGR2BGRA, dst=dst)
+
+
+def cvimg_to_qpiximg(cvimg):
+    height, width, depth = cvimg.shape
+    cvimg = cv2.cvtColor(cvimg, cv2.COLOR_BGR2RGB)
+    qimg = QImage(cvimg.data, width, height, width * depth, QImage.Format_RGB888)
+    qpix_img = QPixmap(qimg)
+    return qpix_img
+
+
+def wrap_qimage(img):
+    """不拷贝数据，直接用显示格式的图像内存构造QImage，调用方需保证图像在使用期间有效"""
+    height, width = img.shape[:2]
+    return QImage(img.data, width, height, img.strides[0], BUFFER_FORMAT)
+
+
+class FrameDisplay:
+    # 显示通道：缩放结果写入复用的中间缓冲区，格式转换结果写入复用的显示缓冲区并直接作为 QPixmap 的像素内存，
+    # 不再有 copy → resize → cvtColor → QImage → QPixmap 的多次拷贝与逐像素转换，也不再逐帧分配
+    def __init__(self, label, max_width, max_height, qt_scale=False):
+        """
+        :param label: 显示用的 QLabel
+        :param max_width: 显示区域宽
+        :param max_height: 显示区域高
+        :param qt_scale: 为True时不在OpenCV中缩放，由Qt在绘制端缩放原图
+        """
+        self.label = label
+        self.max_width = max_width
+        self.max_height = max_height
+        self.qt_scale = qt_scale
+        self.resized = None
+        # 显示格式缓冲区及包装它的QImage，只在GUI线程中写入，尺寸变化时才重新创建
+        self.display_buf = None
+        self.display_qimage = None
+        self.shown = None  # 当前QPixmap共享的像素内存
+
+    def fit_size(self, shape):
+        return fit_size(shape, self.max_width, self.max_height)
+
+    def prepare(self, img):
+        """
+        缩放到显示尺寸，供视频流绘制线程提前完成；格式转换留给 show() 写入显示缓冲区，
+        绘制线程可能领先界面数帧，不能改写正在显示的缓冲区
+        """
+        with span('resize'):
+            return cv2.resize(img, self.fit_size(img.shape))
+
+    def show(self, img):
+        """
+        显示一张图像
+        :param img: BGR图像，prepare() 得到的已缩放图像，或显示尺寸的显示格式图像
+        :return: 显示尺寸 (宽, 高)
+        """
+        width, height = self.fit_size(img.shape)
+        if img.shape[2] == 4 and img.shape[:2] == (height, width) and img.flags['C_CONTIGUOUS']:
+            # 已是显示尺寸和格式的图像（如绘制缓存中的图像），直接包装
+            shown = img
+        elif self.qt_scale:
+            shown = img
+        else:
+            with span('resize'):
+                shown = self.resize_into_buffer(img, width, height)
+        with span('qt_convert'):
+            if shown.shape[2] != 4:
+                shown = self.convert_into_buffer(shown)
+            qimage = self.display_qimage if shown is self.display_buf else wrap_qimage(shown)
+            pixmap = QPixmap.fromImage(qimage)
+            if self.qt_scale and shown.shape[:2] != (height, width):
+                pixmap = pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.label.setPixmap(pixmap)
+        # 旧QPixmap已被替换，此后才能释放其像素内存
+        self.shown = shown
+        return width, height
+
+    def resize_into_buffer(self, img, width, height):
+        """缩放到复用的中间缓冲区，尺寸不变时不重新分配"""
+        if img.shape[:2] == (height, width):
+            return img
+        if self.resized is None or self.resized.shape[:2] != (height, width):
+            self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        return cv2.resize(img, (width, height), dst=self.resized)
+
+    def convert_into_buffer(self, img):
+        """转换到复用的显示缓冲区，尺寸不变时不重新分配，包装它的QImage也只创建一次"""
+        if self.display_buf is None or self.display_buf.shape[:2] != img.shape[:2]:
+            self.display_buf = np.empty(img.shape[:2] + (4,), dtype=np.uint8)
+            self.display_qimage = wrap_qimage(self.display_buf)
+        to_display(img, dst=self.display_buf)
+        return self.display_buf
+
+
+class DetectionTableModel(QAbstractTableModel):
+    # 检测结果表格的数据模型：数据保存在列式的 DetectionStore 中，视图只为可见行取数据；
+    # 新结果先暂存，由定时器合并为一次行插入通知，视频流每帧追加时视图也不会逐帧重排
+    HEADER = ['序号', '文件路径', '类别', '置信度', '坐标位置']
+    CENTER_COLUMNS = (0, 2, 3)
+
+    def __init__(self, capacity=0, flush_interval=100, parent=None):
+        """
+        :param capacity: 最多保留的行数，0 为不限
+        :param flush_interval: 合并刷新间隔，毫秒
+        """
+        super(DetectionTableModel, self).__init__(parent)
+        self.store = DetectionStore(capacity)
+        self.rows = 0  # 视图已知的行数
+        self.pending = []
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(flush_interval)
+        self.timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADER)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADER[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole and index.column() in self.CENTER_COLUMNS:
+            return Qt.AlignHCenter | Qt.AlignVCenter
+        if role != Qt.DisplayRole:
+            return None
+        number, path, cls, conf, box = self.store.row(index.row())
+        return [str(number), path, Config.CH_names[cls], '%.2f %%' % (conf * 100), str(box)][index.column()]
+
+    def append(self, det, path=None):
+        """
+        追加一张图片或一帧的检测结果，稍后合并刷新
+        :param det: N×6 数组，每行为 x1, y1, x2, y2, conf, cls
+        """
+        if len(det):
+            self.pending.append((det, path))
+            if not self.timer.isActive():
+                self.timer.start()
+
+    def flush(self):
+        """将暂存的结果写入存储，每次最多发出一次移除与一次插入通知"""
+        self.timer.stop()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        num = sum(len(det) for det, _ in pending)
+        capacity = self.store.capacity
+
+        if capacity:
+            # 只有最后 capacity 行能保留下来，更早的行不写入，只占用序号
+            skipped = max(num - capacity, 0)
+            self.store.skip(skipped)
+            while skipped:
+                det, path = pending[0]
+                if len(det) <= skipped:
+                    pending.pop(0)
+                    skipped -= len(det)
+                else:
+                    pending[0] = (det[skipped:], path)
+                    skipped = 0
+            num = min(num, capacity)
+            # 先移除最旧的行腾出位置，再追加，追加时不会覆盖已有行
+            removed = max(self.rows + num - capacity, 0)
+            if removed:
+                self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+                self.store.discard(removed)
+                self.rows -= removed
+                self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), self.rows, self.rows + num - 1)
+        for det, path in pending:
+            self.store.append(det, path)
+        self.rows += num
+        self.endInsertRows()
+
+    def set_capacity(self, capacity):
+        """修改保留行数，与当前不同时清空表格"""
+        if capacity != self.store.capacity:
+            self.clear(capacity)
+
+    def clear(self, capacity=None):
+        """
+        清空表格
+        :param capacity: 同时修改保留行数，None 为不变
+        """
+        self.timer.stop()
+        self.pending = []
+        self.beginResetModel()
+        if capacity is None:
+            self.store.clear()
+        else:
+            self.store.set_capacity(capacity)
+        self.rows = 0
+        self.endResetModel()
@@ -1,20 +1,23 @@
 # encoding:utf-8
 import cv2
-from PyQt5.QtGui import QPixmap, QImage
 import numpy as np
-from PIL import Image,ImageDraw,ImageFont
-import csv
-import os
 
-# fontC = ImageFont.truetype("Font/platech.ttf", 20, 0)
+# 无界面的部分（读图解码、标注坐标转换、颜色表等）在 detect_core 中，这里一并导出，tools.xxx 的用法不变；
+# cvimg_to_qpiximg 在 Qt 适配模块 detect_qt 中，首次使用时才导入，只用到核心函数的进程不加载 PyQt5 与 PIL
+from detect_core import (REDUCED_FLAGS, Colors, cv_show, draw_boxes, img_cvread, img_decode, insert_rows,
+                         location_to_yolo, read_yolo_label_dir, read_yolo_labels, xyxy_to_yolo, yolo_to_location,
+                         yolo_to_xyxy)
+
 
-# 绘图展示
-def cv_show(name,img):
-	cv2.imshow(name, img)
-	cv2.waitKey(0)
-	cv2.destroyAllWindows()
+def __getattr__(name):
+    if name == 'cvimg_to_qpiximg':
+        from detect_qt import cvimg_to_qpiximg
+        return cvimg_to_qpiximg
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
+# fontC = ImageFont.truetype("Font/platech.ttf", 20, 0)
+
 def drawRectBox(image, rect, addText, fontC, color):
     """
     绘制矩形框与结果
@@ -34,37 +37,15 @@ def drawRectBox(image, rect, addText, fontC, color):
     # 图片 添加的文字 位置 字体 字体大小 字体颜色 字体粗细
     # cv2.putText(image, addText, (int(rect[0])+2, int(rect[1])-3), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
 
-    img = Image.fromarray(image)
-    draw = ImageDraw.Draw(img)
-    draw.text((rect[0]+2, rect[1]-27), addText, (255, 255, 255), font=fontC)
-    imagex = np.array(img)
-    return imagex
-
-
-def img_cvread(path):
-    # 读取含中文名的图片文件
-    # img = cv2.imread(path)
-    img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
-    return img
-
-
-def draw_boxes(img, boxes):
-    for each in boxes:
-        x1 = each[0]
-        y1 = each[1]
-        x2 = each[2]
-        y2 = each[3]
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-    return img
-
-
-
-def cvimg_to_qpiximg(cvimg):
-    height, width, depth = cvimg.shape
-    cvimg = cv2.cvtColor(cvimg, cv2.COLOR_BGR2RGB)
-    qimg = QImage(cvimg.data, width, height, width * depth, QImage.Format_RGB888)
-    qpix_img = QPixmap(qimg)
-    return qpix_img
+    # 文字栅格化结果按(字体, 文字)缓存，只在文字区域内混合，不再把整幅图像转为PIL
+    from overlay import blend_text, text_mask
+    mask = text_mask(fontC, addText)
+    x, y = rect[0] + 2, rect[1] - 27
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + mask.shape[1], image.shape[1]), min(y + mask.shape[0], image.shape[0])
+    if x2 > x1 and y2 > y1:
+        blend_text(image[y1:y2, x1:x2], mask[y1 - y:y2 - y, x1 - x:x2 - x], (255, 255, 255))
+    return image
 
 
 def save_video():
@@ -108,6 +89,7 @@ def save_video():
 
 # 封装函数:图片上显示中文
 def cv2AddChineseText(img, text, position, textColor=(0, 255, 0), textSize=50):
+    from PIL import Image, ImageDraw, ImageFont
     if (isinstance(img, np.ndarray)):  # 判断是否OpenCV图片类型
         img = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
     # 创建一个可以在给定图像上绘图的对象
@@ -121,96 +103,17 @@ def cv2AddChineseText(img, text, position, textColor=(0, 255, 0), textSize=50):
     return cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
 
 
-def insert_rows(path, lines ,header):
-    """
-    将n行数据写入csv文件
-    :param path:
-    :param lines:
-    :return:
-    """
-    no_header = False
-    if not os.path.exists(path):
-        no_header = True
-        start_num = 1
-    else:
-        start_num = len(open(path).readlines())
-
-    csv_head = header
-    with open(path, 'a', newline='') as f:
-        csv_write = csv.writer(f)
-        if no_header:
-            csv_write.writerow(csv_head)  # 写入表头
-
-        for each_list in lines:
-            # 添加序号
-            each_list = [start_num] + each_list
-            csv_write.writerow(each_list)
-            # 序号 + 1
-            start_num += 1
-
-class Colors:
-    # 用于绘制不同颜色
-    def __init__(self):
-        """Initialize colors as hex = matplotlib.colors.TABLEAU_COLORS.values()."""
-        hexs = ('FF3838', 'FF9D97', 'FF701F', 'FFB21D', 'CFD231', '48F90A', '92CC17', '3DDB86', '1A9334', '00D4BB',
-                '2C99A8', '00C2FF', '344593', '6473FF', '0018EC', '8438FF', '520085', 'CB38FF', 'FF95C8', 'FF37C7')
-        self.palette = [self.hex2rgb(f'#{c}') for c in hexs]
-        self.n = len(self.palette)
-        self.pose_palette = np.array([[255, 128, 0], [255, 153, 51], [255, 178, 102], [230, 230, 0], [255, 153, 255],
-                                      [153, 204, 255], [255, 102, 255], [255, 51, 255], [102, 178, 255], [51, 153, 255],
-                                      [255, 153, 153], [255, 102, 102], [255, 51, 51], [153, 255, 153], [102, 255, 102],
-                                      [51, 255, 51], [0, 255, 0], [0, 0, 255], [255, 0, 0], [255, 255, 255]],
-                                     dtype=np.uint8)
-
-    def __call__(self, i, bgr=False):
-        """Converts hex color codes to rgb values."""
-        c = self.palette[int(i) % self.n]
-        return (c[2], c[1], c[0]) if bgr else c
-
-    @staticmethod
-    def hex2rgb(h):  # rgb order (PIL)
-        return tuple(int(h[1 + i:1 + i + 2], 16) for i in (0, 2, 4))
-
-
-def yolo_to_location(w,h,yolo_data):
-    # yolo文件转两点坐标，注意画图坐标要转换成int格式
-    x_, y_, w_, h_ = yolo_data
-    x1 = int(w * x_ - 0.5 * w * w_)
-    x2 = int(w * x_ + 0.5 * w * w_)
-    y1 = int(h * y_ - 0.5 * h * h_)
-    y2 = int(h * y_ + 0.5 * h * h_)
-    # cv2.rectangle(img, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0))
-    return [x1,y1,x2,y2]
-
-def location_to_yolo(w, h, locations):
-    # x1,y1左上角坐标，x2,y2右上角坐标
-    x1, y1, x2, y2 = locations
-    x_ = (x1 + x2) / 2 / w
-    x_ = float('%.5f' % x_)
-    y_ = (y1 + y2) / 2 / h
-    y_ = float('%.5f' % y_)
-    w_ = (x2 - x1) / w
-    w_ = float('%.5f' % w_)
-    h_ = (y2 - y1) / h
-    h_ = float('%.5f' % h_)
-    return [x_,y_,w_,h_]
-
 def draw_yolo_data(img_path, yolo_file_path):
     # 读取yolo标注数据并显示
-    img = cv2.imread(img_path)
+    img = img_cvread(img_path)
     h, w, _ = img.shape
     print(img.shape)
-    # yolo标注数据文件名为786_rgb_0616.txt
-    with open(yolo_file_path, 'r') as f:
-        data = f.readlines()
-        for each in data:
-            temp = each.split()
-            # ['1', '0.43906', '0.52083', '0.34687', '0.15']
-            # YOLO转换为两点坐标x1, x2, y1, y2
-            x_, y_, w_, h_ = eval(temp[1]), eval(temp[2]), eval(temp[3]), eval(temp[4])
-            x1, y1, x2, y2 = yolo_to_location(w,h,[x_, y_, w_, h_])
-            # 画图验证框是否正确
-            cv2.rectangle(img, (x1, y1), (x2, y2), (0, 0, 255))
+    # yolo标注数据文件名为786_rgb_0616.txt，每行 ['1', '0.43906', '0.52083', '0.34687', '0.15']
+    _, boxes = read_yolo_labels(yolo_file_path)
+    # YOLO转换为两点坐标x1, y1, x2, y2
+    for x1, y1, x2, y2 in yolo_to_xyxy(boxes, w, h, as_int=True).tolist():
+        # 画图验证框是否正确
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 0, 255))
 
     cv2.imshow('windows', img)
     cv2.waitKey(0)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# 检测工作线程：模型由后台线程持有，界面线程只负责提交任务和显示结果
+import queue
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import Config
+from batch_infer import BatchPrefetcher, auto_batch_size, read_batch
+from detect_backends import load_backend, make_results
+from latency import profiler, span
+from overlay import OverlayRenderer
+from result_cache import ResultCache
+
+
+class DetectWorker(QThread):
+    # 检测完成信号，参数为结果字典
+    detected = pyqtSignal(dict)
+    # 检测失败信号，参数为任务字典和错误信息
+    failed = pyqtSignal(dict, str)
+    # 模型加载并预热完成，参数为后端、设备与用时
+    ready = pyqtSignal(dict)
+    # 模型加载失败，参数为错误信息
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, model_path, device=None, conf=0.3, iou=0.7, backend=None, parent=None):
+        """
+        :param device: 推理设备，为None时有GPU则使用GPU
+        :param backend: 推理后端，为None时由 Config.backend 选择
+        """
+        super(DetectWorker, self).__init__(parent)
+        self.model_path = model_path
+        self.backend = backend
+        self.device = device
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = Config.imgsz
+        self.batch_size = Config.batch_size or auto_batch_size(self.imgsz)
+        self.jobs = queue.Queue()
+        # 视频流水线的推理线程也会调用模型，用锁保证同一时刻只有一个推理
+        self.lock = threading.Lock()
+        # 任务代号，清空队列时加一，界面据此丢弃过期结果
+        self.generation = 0
+        # 检测结果绘制，标签贴图在各帧间复用
+        self.renderer = OverlayRenderer()
+
+        # 模型在线程启动后加载，界面无需等待；加载结束（无论成功与否）后置位
+        self.model = None
+        self.cache = None
+        self.load_error = None
+        self.loaded = threading.Event()
+
+    def load(self):
+        """加载检测模型并在实际输入尺寸上预热，在检测线程中执行"""
+        t1 = time.time()
+        if self.device is None:
+            import torch
+            self.device = 0 if torch.cuda.is_available() else 'cpu'
+        print(f"使用设备: {self.device}")
+        model = load_backend(self.backend, self.model_path, self.device, self.imgsz, self.batch_size)
+        # 按实际输入尺寸预热，算子初始化与内存分配不再落在第一次检测上
+        model(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8))
+        # 预热耗时远高于正常检测，不计入耗时统计
+        profiler.reset()
+
+        # 检测结果磁盘缓存，未变化的图片再次检测时不经过模型；Config.result_cache_mb 为0时关闭
+        if Config.result_cache_mb:
+            tile = f'{Config.tile_size},{Config.tile_overlap},{Config.tile_merge},{Config.tile_merge_iou}'
+            try:
+                self.cache = ResultCache.for_model(Config.result_cache_dir, Config.result_cache_mb << 20,
+                                                   self.model_path, model.name, extra=tile)
+            except OSError as e:
+                print(f"✗ 结果缓存不可用: {e}")
+        self.model = model
+        return {'backend': model.name, 'device': str(self.device), 'load_time': time.time() - t1}
+
+    @property
+    def busy(self):
+        """是否还有未处理完的任务"""
+        return self.jobs.unfinished_tasks > 0
+
+    def submit(self, mode, path=None, img=None, paths=None):
+        """
+        提交检测任务
+        :param mode: 'image' 单张图片, 'batch' 批量图片, 'frame' 视频帧
+        :param path: 图片路径，视频帧时为显示用的来源说明
+        :param img: 已读取的图像，为None时由工作线程读取
+        :param paths: 批量检测的图片路径列表，按批返回结果
+        """
+        self.jobs.put({'mode': mode, 'path': path, 'img': img, 'paths': paths, 'gen': self.generation})
+
+    def clear(self):
+        """丢弃尚未开始的任务，已提交任务的结果也会被界面忽略"""
+        self.generation += 1
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            self.jobs.task_done()
+
+    def stop(self):
+        """结束线程"""
+        self.clear()
+        self.jobs.put(None)
+        self.wait()
+        if self.cache:
+            self.cache.close()
+
+    def run(self):
+        try:
+            self.ready.emit(self.load())
+        except Exception as e:
+            self.load_error = str(e)
+            self.load_failed.emit(self.load_error)
+        finally:
+            self.loaded.set()
+
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                break
+            try:
+                if job['gen'] != self.generation:
+                    continue
+                self.check_loaded()
+                if job['mode'] == 'batch':
+                    self.detect_batch(job)
+                else:
+                    self.detected.emit(self.detect(job))
+            except Exception as e:
+                self.failed.emit(job, str(e))
+            finally:
+                self.jobs.task_done()
+
+    def detect(self, job):
+        """执行一次检测，返回包含检测结果与绘制图像的字典"""
+        if job['img'] is None:
+            batch = read_batch([job['path']], digest=self.cache is not None)
+            paths, imgs = batch[:2]
+            if not imgs:
+                raise ValueError('无法读取图片')
+            job['img'] = imgs[0]
+            results, take_times = self.infer_cached(imgs, paths, batch[2] if len(batch) > 2 else None)
+            return self.pack_result(job, results[0], take_times[0])
+
+        results, take_time = self.infer(job['img'])
+        return self.pack_result(job, results[0], take_time)
+
+    def check_loaded(self):
+        if self.model is None:
+            raise RuntimeError(f'模型加载失败: {self.load_error}' if self.load_error else '模型未加载')
+
+    def infer(self, source, cancelled=None):
+        """
+        调用模型推理，返回结果列表与用时；模型尚在加载时等待加载完成
+        :param cancelled: 等待期间定期调用，返回True时放弃等待，视频流停止时不会阻塞在这里
+        """
+        while not self.loaded.wait(0.1):
+            if cancelled is not None and cancelled():
+                raise InterruptedError('检测已停止，模型尚未加载完成')
+        self.check_loaded()
+        with self.lock:
+            t1 = time.time()
+            results = self.model(source, conf=self.conf, iou=self.iou)
+            t2 = time.time()
+        return results, t2 - t1
+
+    def infer_cached(self, imgs, paths, digests=None):
+        """
+        推理一组图片，命中结果缓存的图片不经过模型
+        :param digests: 各图片文件内容的哈希，为None时不使用缓存
+        :return: 结果列表与每张图片的推理用时
+        """
+        keys = [None] * len(imgs)
+        if self.cache is not None and digests is not None:
+            keys = [self.cache.key(d, self.conf, self.iou, self.imgsz) for d in digests]
+        results = [None] * len(imgs)
+        for i, key in enumerate(keys):
+            det = self.cache.get(key) if key is not None else None
+            if det is not None:
+                results[i] = make_results(imgs[i], paths[i], self.model.names, det)
+
+        take_times = [0.0] * len(imgs)
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            outputs, take_time = self.infer([imgs[i] for i in misses])
+            for i, result in zip(misses, outputs):
+                results[i] = result
+                take_times[i] = take_time / len(misses)
+                if keys[i] is not None:
+                    self.cache.put(keys[i], result.boxes.data.cpu().numpy())
+        return results, take_times
+
+    def detect_batch(self, job):
+        """批量检测，每批图片合并为一次模型调用，每批发送一次结果"""
+        t_start = time.time()
+        prefetcher = BatchPrefetcher(job['paths'], self.batch_size, digest=self.cache is not None,
+                                     workers=Config.decode_workers, depth=Config.prefetch_depth)
+        for batch in prefetcher:
+            # 任务被清空时停止剩余批次
+            if job['gen'] != self.generation:
+                break
+            paths, imgs = batch[:2]
+            if not imgs:
+                continue
+            results, take_times = self.infer_cached(imgs, paths, batch[2] if len(batch) > 2 else None)
+            items = []
+            for path, img, result, take_time in zip(paths, imgs, results, take_times):
+                item = {'mode': 'batch', 'path': path, 'img': img, 'gen': job['gen']}
+                items.append(self.pack_result(item, result, take_time))
+            self.detected.emit({'mode': 'batch', 'items': items, 'gen': job['gen']})
+        print(f"✓ 批量检测 {prefetcher.loader.summary(time.time() - t_start)}")
+
+    def pack_result(self, job, results, take_time):
+        """整理检测结果，并在工作线程中完成绘制"""
+        det = results.boxes.data.cpu().numpy()
+
+        job['results'] = results
+        job['take_time'] = take_time
+        job['det'] = det
+        job['location_list'] = det[:, :4].astype(int).tolist()
+        job['cls_list'] = det[:, 5].astype(int).tolist()
+        job['conf_list'] = ['%.2f %%' % (each * 100) for each in det[:, 4].tolist()]
+        with span('draw'):
+            job['draw_img'] = self.renderer.draw_results(results)
+        return job
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# 检测记录：序号保存在内存和旁路计数文件中，不再每次读取整个CSV统计行数；
+# 写入先在内存中缓冲，由后台线程批量落盘，除CSV外还支持按分片写入的列式格式（npz / Parquet）
+import csv
+import glob
+import os
+import queue
+import threading
+
+import numpy as np
+
+import Config
+
+CSV_HEADER = ['序号', '文件路径', '类别', '置信度', '坐标位置']
+FORMATS = ['csv', 'npz', 'parquet']
+
+
+def counter_path(path):
+    """旁路计数文件：记录已写入的行数，以及写入时日志的大小用于校验"""
+    return path.rstrip('/\\') + '.count'
+
+
+def log_size(path):
+    """CSV 为文件字节数，列式格式为分片数量"""
+    if os.path.isdir(path):
+        return len(glob.glob(os.path.join(path, 'part-*')))
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def read_counter(path):
+    """
+    读取已写入的数据行数
+    旁路计数与日志大小一致时直接使用，否则（如日志被手动修改）重新统计一次
+    """
+    if not os.path.exists(path):
+        return 0
+    try:
+        with open(counter_path(path), 'r') as f:
+            count, size = map(int, f.read().split())
+        if size == log_size(path):
+            return count
+    except (OSError, ValueError):
+        pass
+    if os.path.isdir(path):
+        return sum(len(load_shard(p)['number']) for p in sorted(glob.glob(os.path.join(path, 'part-*'))))
+    # 按块统计换行数，不把整个文件读成行列表
+    with open(path, 'rb') as f:
+        lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+    return max(lines - 1, 0)
+
+
+def write_counter(path, count):
+    tmp = counter_path(path) + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(f'{count} {log_size(path)}')
+    os.replace(tmp, counter_path(path))
+
+
+def load_shard(path):
+    """读取一个列式分片，返回列名到数组的字典"""
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {k: data[k] for k in data.files}
+    import pyarrow.parquet as pq
+    table = pq.read_table(path)
+    columns = {k: table.column(k).to_numpy() for k in ('number', 'source', 'cls', 'conf')}
+    columns['boxes'] = np.stack([table.column(k).to_numpy() for k in ('x1', 'y1', 'x2', 'y2')], axis=1)
+    return columns
+
+
+class CsvSink:
+    def __init__(self, path, names, append):
+        self.names = names
+        new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a' if not new else 'w', newline='', encoding='utf-8-sig' if new else 'utf-8')
+        self.writer = csv.writer(self.file)
+        if new:
+            self.writer.writerow(CSV_HEADER)
+
+    def write(self, columns):
+        boxes = columns['boxes'].tolist()
+        confs = columns['conf'].tolist()
+        for number, source, cls, conf, box in zip(columns['number'].tolist(), columns['source'],
+                                                  columns['cls'].tolist(), confs, boxes):
+            self.writer.writerow([number, source, self.names[cls], '%.2f %%' % (conf * 100), box])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ShardSink:
+    # 列式输出：目录下按批写入 part-00000.npz / part-00000.parquet 分片，追加时从已有分片之后继续编号
+    def __init__(self, path, fmt, append):
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError('写入Parquet需要安装pyarrow: pip install pyarrow')
+        self.path = path
+        self.fmt = fmt
+        os.makedirs(path, exist_ok=True)
+        if not append:
+            for old in glob.glob(os.path.join(path, 'part-*')):
+                os.remove(old)
+        self.index = log_size(path)
+
+    def write(self, columns):
+        name = os.path.join(self.path, 'part-%05d.%s' % (self.index, self.fmt))
+        if self.fmt == 'npz':
+            np.savez(name, **columns)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            boxes = columns['boxes']
+            table = pa.table({'number': columns['number'], 'source': columns['source'],
+                              'cls': columns['cls'], 'conf': columns['conf'],
+                              'x1': boxes[:, 0], 'y1': boxes[:, 1], 'x2': boxes[:, 2], 'y2': boxes[:, 3]})
+            pq.write_table(table, name)
+        self.index += 1
+
+    def close(self):
+        pass
+
+
+class DetectionLog:
+    # 用法:
+    #   with DetectionLog('save_data/log.csv') as log:
+    #       log.append(det, path)
+    def __init__(self, path, fmt='csv', names=None, append=True, flush_rows=5000, flush_interval=1.0):
+        """
+        :param path: CSV 文件路径，列式格式时为分片目录
+        :param fmt: 'csv'、'npz' 或 'parquet'
+        :param names: 类别名称，CSV 中写入名称，默认 Config.names
+        :param append: 为True时在已有日志后追加，序号接续
+        :param flush_rows: 缓冲行数达到该值时交给后台线程写入
+        :param flush_interval: 缓冲的最长停留时间，秒
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f'未知的日志格式: {fmt}，可选 {FORMATS}')
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.count = read_counter(path) if append else 0
+        if fmt == 'csv':
+            self.sink = CsvSink(path, Config.names if names is None else names, append)
+        else:
+            self.sink = ShardSink(path, fmt, append)
+
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_rows = 0
+        self.chunks = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def append(self, det, path=None):
+        """
+        记录一张图片或一帧的检测结果，序号在内存中连续分配
+        :param det: N×6 数组，每行为 x1, y1, x2, y2, conf, cls
+        :param path: 来源路径
+        """
+        det = np.asarray(det, dtype=np.float32).reshape(-1, 6)
+        if not len(det):
+            return
+        with self.lock:
+            numbers = np.arange(self.count + 1, self.count + len(det) + 1, dtype=np.int64)
+            self.count += len(det)
+            self.pending.append((numbers, path or '', det))
+            self.pending_rows += len(det)
+            full = self.pending_rows >= self.flush_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的记录交给后台线程"""
+        # 在锁内入队，保证后台线程按序号顺序写入
+        with self.lock:
+            if self.pending:
+                self.chunks.put(self.pending)
+            self.pending, self.pending_rows = [], 0
+
+    def run(self):
+        while True:
+            try:
+                pending = self.chunks.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # 检测间隙较长时，定时把缓冲写入，不必等到攒满
+                self.flush()
+                continue
+            if pending is None:
+                break
+            if self.error is None:
+                try:
+                    self.sink.write(self.columns(pending))
+                    write_counter(self.path, int(pending[-1][0][-1]))
+                except Exception as e:
+                    self.error = e
+
+    @staticmethod
+    def columns(pending):
+        """把一批记录整理为列"""
+        det = np.concatenate([d for _, _, d in pending])
+        return {'number': np.concatenate([n for n, _, _ in pending]),
+                'source': np.array([p for n, p, _ in pending for _ in range(len(n))]),
+                'cls': det[:, 5].astype(np.int16),
+                'conf': det[:, 4],
+                'boxes': det[:, :4].astype(np.int32)}
+
+    def close(self):
+        """写入剩余记录并结束后台线程"""
+        self.flush()
+        self.chunks.put(None)
+        self.thread.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
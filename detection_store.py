@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# 检测结果的列式存储：坐标、类别、置信度、来源编号各为一个 numpy 数组，每行约 30 字节，
+# 代替每个单元格一个 QTableWidgetItem；capacity > 0 时为环形缓冲区，只保留最近 capacity 行
+import numpy as np
+
+
+class DetectionStore:
+    def __init__(self, capacity=0):
+        """
+        :param capacity: 最多保留的行数，0 为不限
+        """
+        self.capacity = capacity
+        self.sources = []
+        self.source_ids = {}
+        self.clear()
+
+    def clear(self):
+        size = self.capacity or 1024
+        self.boxes = np.zeros((size, 4), dtype=np.int32)
+        self.cls = np.zeros(size, dtype=np.int16)
+        self.conf = np.zeros(size, dtype=np.float32)
+        self.source = np.zeros(size, dtype=np.int32)
+        self.number = np.zeros(size, dtype=np.int64)
+        self.start = 0  # 第0行在数组中的位置（环形缓冲区）
+        self.count = 0  # 当前保留的行数
+        self.total = 0  # 累计写入的行数，用于生成序号
+        self.sources.clear()
+        self.source_ids.clear()
+
+    def set_capacity(self, capacity):
+        """修改保留行数并清空"""
+        self.capacity = capacity
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    def source_id(self, path):
+        """来源路径只保存一次，各行记录其编号"""
+        path = path or ''
+        sid = self.source_ids.get(path)
+        if sid is None:
+            sid = self.source_ids[path] = len(self.sources)
+            self.sources.append(path)
+        return sid
+
+    def append(self, det, path=None):
+        """
+        追加一张图片或一帧的检测结果
+        :param det: N×6 数组，每行为 x1, y1, x2, y2, conf, cls
+        :param path: 来源路径
+        :return: 因超出容量被移除的最旧行数
+        """
+        det = np.asarray(det, dtype=np.float32).reshape(-1, 6)
+        num = len(det)
+        if num == 0:
+            return 0
+        sid = self.source_id(path)
+
+        if not self.capacity:
+            if self.count + num > len(self.cls):
+                self.grow(self.count + num)
+            self.write(np.arange(self.count, self.count + num), det, sid)
+            self.count += num
+            return 0
+
+        # 环形缓冲区：一次写入超过容量时只保留最后 capacity 行，最旧的行被覆盖
+        self.skip(num - self.capacity)
+        det = det[-self.capacity:]
+        num = len(det)
+        removed = max(self.count + num - self.capacity, 0)
+        self.discard(removed)
+        self.write((self.start + self.count + np.arange(num)) % self.capacity, det, sid)
+        self.count += num
+        return removed
+
+    def write(self, index, det, sid):
+        self.boxes[index] = det[:, :4]
+        self.conf[index] = det[:, 4]
+        self.cls[index] = det[:, 5]
+        self.source[index] = sid
+        self.number[index] = np.arange(self.total + 1, self.total + len(det) + 1)
+        self.total += len(det)
+
+    def discard(self, num):
+        """移除最旧的 num 行"""
+        num = min(max(num, 0), self.count)
+        if self.capacity:
+            self.start = (self.start + num) % self.capacity
+        else:
+            # 不限行数时很少移除，直接整体前移
+            for name in ('boxes', 'cls', 'conf', 'source', 'number'):
+                column = getattr(self, name)
+                column[:self.count - num] = column[num:self.count]
+        self.count -= num
+
+    def skip(self, num):
+        """跳过 num 个序号，用于未写入就被覆盖的行"""
+        self.total += max(num, 0)
+
+    def grow(self, size):
+        """不限行数时按倍数扩容"""
+        size = max(size, len(self.cls) * 2)
+        for name in ('boxes', 'cls', 'conf', 'source', 'number'):
+            old = getattr(self, name)
+            new = np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def index(self, row):
+        """第 row 行在数组中的位置"""
+        return (self.start + row) % self.capacity if self.capacity else row
+
+    def row(self, row):
+        """
+        读取一行
+        :return: (序号, 来源路径, 类别, 置信度, [x1, y1, x2, y2])
+        """
+        i = self.index(row)
+        return int(self.number[i]), self.sources[self.source[i]], int(self.cls[i]), float(self.conf[i]), \
+            self.boxes[i].tolist()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# YOLO数据集标注索引：把 data/{train,valid,test}/labels/*.txt 汇总为每个子集一个 .npz 文件，
+# 数据集统计、标注检查与评估只需打开一个文件，不再逐个解析几千个小文本文件
+#
+# 索引文件 <子集>/labels.index.npz 中的数组：
+#   names    N      图片文件名（不含扩展名），按文件名排序
+#   suffixes N      图片扩展名
+#   offsets  N+1    第 i 张图片的框为 boxes[offsets[i]:offsets[i+1]]
+#   boxes    M×4    所有框的归一化坐标 (中心x, 中心y, 宽, 高)，float32 连续存放
+#   classes  M      类别索引
+#   sizes    N×2    图片 (宽, 高)
+#   stamps   N×4    指纹 (图片修改时间ns, 图片字节数, 标注修改时间ns, 标注字节数)，没有标注文件时后两项为 -1
+#   errors   N      标注文件无法解析时的错误信息，正常为空字符串；无法解析的标注按没有框记录
+# 重新建立索引时只解析指纹变化的图片与标注，其余直接沿用
+# 用法:
+#   python label_index.py data                 # 建立或更新 train/valid/test 的索引
+#   index = load_split('data/train')          # 在代码中读取（必要时自动更新）
+#   classes, boxes = index[0]
+import argparse
+import os
+import time
+
+import numpy as np
+
+import detect_core as core
+from batch_infer import IMG_SUFFIX, jpeg_size
+
+SPLITS = ('train', 'valid', 'test')
+INDEX_NAME = 'labels.index.npz'
+# 索引格式版本，格式变化时旧索引整体重建
+VERSION = 2
+
+
+def image_path(split_dir, name, suffix):
+    return os.path.join(split_dir, 'images', name + suffix)
+
+
+def label_path(split_dir, name):
+    return os.path.join(split_dir, 'labels', name + '.txt')
+
+
+def image_size(path):
+    """图片 (宽, 高)，JPEG 只扫描文件头，其他格式解码获取"""
+    data = np.fromfile(path, dtype=np.uint8)
+    size = jpeg_size(data)
+    if size is None:
+        img = core.img_decode(data)
+        size = (0, 0) if img is None else (img.shape[1], img.shape[0])
+    return size
+
+
+def scan_split(split_dir):
+    """
+    列出子集中的图片与对应标注文件的指纹
+    :return: (文件名列表, 扩展名列表, N×4 指纹数组)
+    """
+    image_dir, label_dir = os.path.join(split_dir, 'images'), os.path.join(split_dir, 'labels')
+    labels = {}
+    if os.path.isdir(label_dir):
+        for entry in os.scandir(label_dir):
+            if entry.name.endswith('.txt'):
+                stat = entry.stat()
+                labels[entry.name[:-4]] = (stat.st_mtime_ns, stat.st_size)
+    images = []
+    for entry in os.scandir(image_dir):
+        stem, ext = os.path.splitext(entry.name)
+        if ext[1:].lower() in IMG_SUFFIX and entry.is_file():
+            stat = entry.stat()
+            images.append((stem, ext, (stat.st_mtime_ns, stat.st_size) + labels.get(stem, (-1, -1))))
+    images.sort()
+    stamps = np.array([s for _, _, s in images], dtype=np.int64).reshape(-1, 4)
+    return [n for n, _, _ in images], [e for _, e, _ in images], stamps
+
+
+class LabelIndex:
+    # 一个子集的标注索引，index[i] 返回第 i 张图片的 (类别索引, 归一化坐标)
+    def __init__(self, split_dir, names, suffixes, offsets, boxes, classes, sizes, stamps, errors):
+        self.split_dir = split_dir
+        self.names = np.asarray(names, dtype=str)
+        self.suffixes = np.asarray(suffixes, dtype=str)
+        self.offsets = offsets
+        self.boxes = boxes
+        self.classes = classes
+        self.sizes = sizes
+        self.stamps = stamps
+        self.errors = np.asarray(errors, dtype=str)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.classes[start:end], self.boxes[start:end]
+
+    @property
+    def counts(self):
+        """每张图片的框数"""
+        return np.diff(self.offsets)
+
+    @property
+    def image_ids(self):
+        """每个框所属图片的序号，与 boxes 对齐，便于按图片分组统计"""
+        return np.repeat(np.arange(len(self)), self.counts)
+
+    def image_path(self, i):
+        return image_path(self.split_dir, self.names[i], self.suffixes[i])
+
+    def label_path(self, i):
+        return label_path(self.split_dir, self.names[i])
+
+    def xyxy(self, i, clip=False, as_int=False):
+        """第 i 张图片的框在原图上的两点坐标"""
+        w, h = self.sizes[i]
+        return core.yolo_to_xyxy(self[i][1], w, h, clip=clip, as_int=as_int)
+
+    def save(self, path):
+        # 先写临时文件再替换，中断时不会留下写了一半的索引
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=VERSION, names=self.names, suffixes=self.suffixes, offsets=self.offsets,
+                     boxes=self.boxes, classes=self.classes, sizes=self.sizes, stamps=self.stamps,
+                     errors=self.errors)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, split_dir, path):
+        """读取索引文件，文件不存在、损坏或版本不符时返回None"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != VERSION:
+                    return None
+                return cls(split_dir, data['names'], data['suffixes'], data['offsets'], data['boxes'],
+                           data['classes'], data['sizes'], data['stamps'], data['errors'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def build_index(split_dir, path=None, rebuild=False):
+    """
+    建立或增量更新一个子集的索引，只解析新增或指纹变化的图片与标注
+    :param split_dir: 子集目录，包含 images/ 与 labels/
+    :param path: 索引文件路径，默认 <子集>/labels.index.npz
+    :param rebuild: 为True时忽略已有索引全部重新解析
+    :return: (LabelIndex, {'images': 图片数, 'parsed': 重新解析数, 'removed': 移除数, 'errors': 无法解析的标注数})
+    """
+    path = path or os.path.join(split_dir, INDEX_NAME)
+    names, suffixes, stamps = scan_split(split_dir)
+    old = None if rebuild else LabelIndex.load(split_dir, path)
+    if old is not None and old.names.tolist() == names and np.array_equal(old.stamps, stamps):
+        return old, {'images': len(names), 'parsed': 0, 'removed': 0, 'errors': int((old.errors != '').sum())}
+    old_pos = {} if old is None else {name: i for i, name in enumerate(old.names.tolist())}
+
+    counts = np.zeros(len(names), dtype=np.int64)
+    sizes = np.zeros((len(names), 2), dtype=np.int32)
+    errors = [''] * len(names)
+    class_parts, box_parts = [], []
+    parsed = 0
+    for i, name in enumerate(names):
+        j = old_pos.pop(name, None)
+        if j is not None and (old.stamps[j] == stamps[i]).all():
+            classes, boxes = old[j]
+            sizes[i] = old.sizes[j]
+            errors[i] = old.errors[j]
+        else:
+            classes, boxes = np.zeros(0, np.int32), np.zeros((0, 4), np.float32)
+            # 没有标注文件的图片视为没有缺陷
+            if stamps[i, 3] >= 0:
+                try:
+                    classes, boxes = core.read_yolo_labels(label_path(split_dir, name))
+                except ValueError as e:
+                    errors[i] = str(e)
+            sizes[i] = image_size(image_path(split_dir, name, suffixes[i]))
+            parsed += 1
+        counts[i] = len(boxes)
+        class_parts.append(classes)
+        box_parts.append(boxes)
+
+    stats = {'images': len(names), 'parsed': parsed, 'removed': len(old_pos),
+             'errors': sum(1 for e in errors if e)}
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    index = LabelIndex(split_dir, names, suffixes, offsets,
+                       np.concatenate(box_parts).astype(np.float32) if box_parts else np.zeros((0, 4), np.float32),
+                       np.concatenate(class_parts).astype(np.int16) if class_parts else np.zeros(0, np.int16),
+                       sizes, stamps, errors)
+    index.save(path)
+    return index, stats
+
+
+def load_split(split_dir, path=None, check=True):
+    """
+    读取一个子集的索引
+    :param check: 为True时先检查文件指纹，有变化时增量更新；为False时只读取索引文件，不存在时才建立
+    """
+    if not check:
+        index = LabelIndex.load(split_dir, path or os.path.join(split_dir, INDEX_NAME))
+        if index is not None:
+            return index
+    return build_index(split_dir, path)[0]
+
+
+def load_dataset(data_dir='data', splits=SPLITS, check=True):
+    """读取数据集各子集的索引，不存在的子集跳过"""
+    return {split: load_split(os.path.join(data_dir, split), check=check) for split in splits
+            if os.path.isdir(os.path.join(data_dir, split, 'images'))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='建立或更新YOLO数据集的标注索引')
+    parser.add_argument('data_dir', nargs='?', default='data', help='数据集目录，包含 train/valid/test')
+    parser.add_argument('--splits', default=','.join(SPLITS), help='子集，逗号分隔')
+    parser.add_argument('--rebuild', action='store_true', help='忽略已有索引全部重新解析')
+    args = parser.parse_args()
+
+    for split in args.splits.split(','):
+        split_dir = os.path.join(args.data_dir, split)
+        if not os.path.isdir(os.path.join(split_dir, 'images')):
+            print(f'✗ {split_dir} 中没有 images 目录，跳过')
+            continue
+        t1 = time.perf_counter()
+        index, stats = build_index(split_dir, rebuild=args.rebuild)
+        print(f'✓ {split}: {stats["images"]} 张图片 {len(index.boxes)} 个框, 重新解析 {stats["parsed"]}, '
+              f'移除 {stats["removed"]}, 用时 {(time.perf_counter() - t1) * 1000:.1f} ms')
+        for error in index.errors[index.errors != ''].tolist():
+            print(f'✗ {error}')
+
+
+if __name__ == '__main__':
+    main()
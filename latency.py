@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# 检测流程耗时统计：各阶段用命名区段计时，保留最近 window 次耗时计算 p50/p95/p99，
+# 界面与命令行共用同一个全局 profiler；统计可导出为 JSON 或 Prometheus 文本格式供监控采集
+# 用法:
+#   from latency import span
+#   with span('decode'):
+#       img = core.img_cvread(path)
+import json
+import os
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+import Config
+
+# 各阶段在统计表中的顺序与显示名称，未列出的阶段排在后面
+STAGES = {'capture': '采集', 'decode': '解码', 'preprocess': '前处理', 'inference': '推理', 'nms': 'NMS',
+          'draw': '绘制', 'resize': '缩放', 'qt_convert': 'Qt转换'}
+QUANTILES = (50, 95, 99)
+
+
+def ljust(text, width):
+    """按显示宽度左对齐，中文字符占两列"""
+    shown = sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+    return text + ' ' * max(width - shown, 0)
+
+
+class StageStats:
+    # 一个阶段最近 window 次耗时的环形缓冲区，以及累计次数与总耗时
+    def __init__(self, window):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        """累计次数、总耗时与最近 window 次的均值和分位数，单位秒"""
+        recent = self.samples[:min(self.count, len(self.samples))]
+        values = np.percentile(recent, QUANTILES).tolist() if len(recent) else [0.0] * len(QUANTILES)
+        summary = {'count': self.count, 'sum': self.total, 'mean': float(recent.mean()) if len(recent) else 0.0}
+        summary.update({f'p{q}': v for q, v in zip(QUANTILES, values)})
+        return summary
+
+
+class Span:
+    # with 语句计时，退出时记录到 profiler
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    def __init__(self, window=1024, enabled=True):
+        """
+        :param window: 每个阶段保留的最近耗时数量，分位数按这些耗时计算
+        :param enabled: 为False时不记录
+        """
+        self.window = window
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def span(self, name):
+        return Span(self, name)
+
+    def record(self, name, seconds):
+        """记录一次耗时，秒"""
+        if not self.enabled:
+            return
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageStats(self.window)
+            stage.add(seconds)
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+
+    def snapshot(self):
+        """各阶段统计，按 STAGES 顺序，单位秒"""
+        with self.lock:
+            names = sorted(self.stages, key=lambda k: list(STAGES).index(k) if k in STAGES else len(STAGES))
+            return {name: self.stages[name].summary() for name in names}
+
+    def table(self):
+        """文本表格，单位毫秒"""
+        lines = [ljust('阶段', 10) + '%6s%10s%10s%10s' % ('次数', 'p50 ms', 'p95 ms', 'p99 ms')]
+        for name, s in self.snapshot().items():
+            lines.append(ljust(STAGES.get(name, name), 10) + '%8d%10.1f%10.1f%10.1f' % (
+                s['count'], s['p50'] * 1000, s['p95'] * 1000, s['p99'] * 1000))
+        return '\n'.join(lines)
+
+    def to_json(self):
+        return json.dumps({'time': time.time(), 'unit': 'seconds', 'stages': self.snapshot()},
+                          ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, metric='steel_detect_stage_seconds'):
+        """Prometheus 文本格式（summary 类型），可由 node_exporter 的 textfile 收集器采集"""
+        lines = [f'# HELP {metric} Latency of each detection stage.', f'# TYPE {metric} summary']
+        for name, s in self.snapshot().items():
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q / 100:g}"}} {s[f"p{q}"]:.6g}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {s["sum"]:.6g}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {s["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """
+        导出统计，扩展名为 .prom 或 .txt 时为 Prometheus 文本格式，否则为JSON
+        先写临时文件再替换，采集方不会读到写了一半的文件
+        """
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+profiler = Profiler(Config.latency_window, Config.latency_stats)
+span = profiler.span
+record = profiler.record
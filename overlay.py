@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# 检测结果绘制：一次遍历绘制全部检测框，标签文字预先栅格化为贴图并缓存，
+# 替代 results.plot() 以及逐框把整幅图像转为 PIL 再写字的 drawRectBox
+from collections import OrderedDict
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+import Config
+from detect_core import Colors
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path, size):
+    """加载字体，失败时返回None"""
+    # PIL 只在首次绘制标签时导入，不计入界面启动与无界面进程的导入耗时
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype(font_path, size, 0)
+    except OSError:
+        return None
+
+
+def default_font(size):
+    # Pillow 10.1 起 load_default 支持指定字号
+    from PIL import ImageFont
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1024)
+def text_mask(font, text):
+    """
+    栅格化一段文字
+    :return: 文字的灰度掩码，0~1 浮点，高度为字体的 ascent + descent
+    """
+    from PIL import Image, ImageDraw
+    if hasattr(font, 'getmetrics'):
+        ascent, descent = font.getmetrics()
+        height = ascent + descent
+    else:
+        # 旧版 Pillow 的默认位图字体没有 getmetrics
+        height = font.getbbox('Ag0')[3]
+    width = max(int(np.ceil(font.getlength(text))), 1)
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).text((0, 0), text, fill=255, font=font)
+    return np.asarray(mask, dtype=np.float32)[..., None] / 255.0
+
+
+def blend_text(region, mask, color):
+    """按掩码把文字颜色混合到图像区域上，原地修改"""
+    region[:] = region * (1 - mask) + np.asarray(color, dtype=np.float32) * mask
+
+
+class OverlayRenderer:
+    # 标签贴图按 (字号, 类别, 置信度文本) 缓存：类别名与数字字形只栅格化一次，
+    # 之后每个框只是一次数组切片赋值，与图像分辨率和框数量基本无关
+    def __init__(self, labels=None, font_path=None, fallback_labels=None, colors=None):
+        """
+        :param labels: 类别显示名称，默认 Config.CH_names
+        :param font_path: 标签字体，默认 Config.label_font
+        :param fallback_labels: 字体无法加载时使用的名称（默认字体不含中文），默认 Config.names
+        :param colors: 颜色表，默认 detect_core.Colors()
+        """
+        self.labels = list(Config.CH_names if labels is None else labels)
+        self.font_path = Config.label_font if font_path is None else font_path
+        fallback_labels = Config.names if fallback_labels is None else fallback_labels
+        if isinstance(fallback_labels, dict):
+            fallback_labels = [fallback_labels[i] for i in sorted(fallback_labels)]
+        self.fallback_labels = list(fallback_labels)
+
+        colors = colors or Colors()
+        self.palette = np.array([colors(i, bgr=True) for i in range(colors.n)], dtype=np.uint8)
+        self.sprites = {}
+        self.rows = None
+
+    @staticmethod
+    def line_width(shape):
+        """线宽随图像尺寸缩放，与 results.plot() 一致"""
+        return max(round(sum(shape[:2]) / 2 * 0.003), 2)
+
+    def font_for(self, size):
+        """返回 (字体, 类别名称列表)"""
+        font = load_font(self.font_path, size)
+        if font is not None:
+            return font, self.labels
+        return default_font(size), self.fallback_labels
+
+    def sprite(self, size, cls, conf_text):
+        """取得一个标签贴图：类别颜色背景 + 白色文字"""
+        key = (size, cls, conf_text)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            font, labels = self.font_for(size)
+            name = labels[cls] if cls < len(labels) else str(cls)
+            # 类别名与每个数字分别栅格化后拼接，置信度变化时不必重新绘制类别名
+            masks = [text_mask(font, name + ' ')] + [text_mask(font, c) for c in conf_text]
+            mask = np.concatenate(masks, axis=1)
+            pad = max(size // 8, 1)
+            mask = np.pad(mask, ((pad, pad), (pad, pad), (0, 0)))
+            color = self.palette[cls % len(self.palette)]
+            sprite = np.empty(mask.shape[:2] + (3,), dtype=np.float32)
+            sprite[:] = color
+            blend_text(sprite, mask, (255, 255, 255))
+            sprite = sprite.astype(np.uint8)
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw(self, img, boxes, cls, conf, copy=True):
+        """
+        绘制检测框与标签
+        :param img: BGR图像
+        :param boxes: N×4 的 x1, y1, x2, y2
+        :param cls: N 个类别编号
+        :param conf: N 个置信度
+        :param copy: 为False时直接在 img 上绘制（img 不连续时仍会拷贝）
+        :return: 绘制后的图像
+        """
+        img = img.copy() if copy else np.ascontiguousarray(img)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if not len(boxes):
+            return img
+
+        height, width = img.shape[:2]
+        lw = self.line_width(img.shape)
+        # 字号随线宽缩放，与 results.plot() 的 OpenCV 绘制方式文字大小相当
+        size = max(lw * 6, 12)
+
+        # 一次性计算全部框的整数坐标、颜色与置信度文本，坐标换算为按行展开后的字节偏移
+        boxes = np.round(boxes).astype(np.int64)
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width - 1)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height - 1)
+        cls = np.asarray(cls).astype(np.int64).reshape(-1)
+        conf_texts = ['%.2f' % c for c in np.asarray(conf, dtype=np.float32).reshape(-1)]
+        rows = self.color_rows(width)[cls % len(self.palette)]
+
+        # 每行像素连续的二维视图：边框与标签都按整行连续内存写入，
+        # 比按像素广播颜色快一个数量级
+        flat = img.reshape(height, -1)
+        for (x1, y1, x2, y2), c, row, conf_text in zip(boxes, cls, rows, conf_texts):
+            bx1, bx2 = x1 * 3, (x2 + 1) * 3
+            flat[y1:y1 + lw, bx1:bx2] = row[:bx2 - bx1]
+            flat[max(y2 - lw + 1, y1):y2 + 1, bx1:bx2] = row[:bx2 - bx1]
+            flat[y1:y2 + 1, bx1:min(bx1 + lw * 3, bx2)] = row[:min(lw * 3, bx2 - bx1)]
+            flat[y1:y2 + 1, max(bx2 - lw * 3, bx1):bx2] = row[:min(lw * 3, bx2 - bx1)]
+
+            sprite = self.sprite(size, int(c), conf_text)
+            sh, sw = min(sprite.shape[0], height), min(sprite.shape[1], width)
+            # 标签放在框上方，放不下时放在框内
+            top = y1 - sh if y1 >= sh else y1
+            top = min(top, height - sh)
+            left = min(x1, width - sw)
+            flat[top:top + sh, left * 3:(left + sw) * 3] = sprite[:sh, :sw].reshape(sh, -1)
+        return img
+
+    def color_rows(self, width):
+        """各颜色重复 width 次得到的一行像素，用于按行写入边框"""
+        if self.rows is None or self.rows.shape[1] < width * 3:
+            self.rows = np.tile(self.palette, (1, width))
+        return self.rows
+
+    def draw_results(self, results, index=None):
+        """
+        在 Results 的原图上绘制
+        :param index: 只绘制第 index 个目标，None 时绘制全部
+        """
+        data = results.boxes.data.cpu().numpy()
+        if index is not None:
+            data = data[index:index + 1]
+        return self.draw(results.orig_img, data[:, :4], data[:, 5], data[:, 4])
+
+
+class RenderCache:
+    # 目标下拉框的绘制缓存：原图按显示尺寸只缩放一次，单个目标的绘制结果按需生成，
+    # 以 (检测结果, 选中目标, 显示尺寸) 为键缓存，超出容量时淘汰最久未使用的项
+    def __init__(self, renderer, convert=None, maxsize=64):
+        """
+        :param renderer: OverlayRenderer
+        :param convert: 绘制后的图像转换，如转换为显示格式，None 为不转换
+        :param maxsize: 最多缓存的图像数量
+        """
+        self.renderer = renderer
+        self.convert = convert
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, results, index, size):
+        """
+        取得绘制结果
+        :param results: 一张图片的 Results
+        :param index: 选中目标的序号，None 为全部目标
+        :param size: 显示尺寸 (宽, 高)
+        """
+        key = (id(results), index, size)
+        img = self.lookup(key, results)
+        if img is not None:
+            self.hits += 1
+            return img
+        self.misses += 1
+
+        base = self.base(results, size)
+        data = results.boxes.data.cpu().numpy()
+        if index is not None:
+            data = data[index:index + 1]
+        height, width = results.orig_img.shape[:2]
+        scale = np.array([size[0] / width, size[1] / height] * 2, dtype=np.float32)
+        img = self.renderer.draw(base, data[:, :4] * scale, data[:, 5], data[:, 4])
+        if self.convert is not None:
+            img = self.convert(img)
+        self.store(key, results, img)
+        return img
+
+    def base(self, results, size):
+        """缩放到显示尺寸的原图，同一结果只缩放一次"""
+        key = (id(results), 'base', size)
+        img = self.lookup(key, results)
+        if img is None:
+            img = cv2.resize(results.orig_img, size)
+            self.store(key, results, img)
+        return img
+
+    def lookup(self, key, results):
+        entry = self.entries.get(key)
+        # 条目中保存了 results 本身，id 在条目存在期间不会被其他对象复用
+        if entry is None or entry[0] is not results:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def store(self, key, results, img):
+        self.entries[key] = (results, img)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
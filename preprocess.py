@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# 推理前处理：等比缩放、居中填充、BGR转RGB、HWC转CHW与归一化直接写入预先分配的 float32 缓冲区，
+# 缓冲区按 imgsz 与批大小分配后反复使用，稳态推理时前处理不再分配新的数组
+import threading
+
+import cv2
+import numpy as np
+
+from latency import span
+
+# uint8 转 0~1 浮点的系数，与输入相乘时直接写入输出缓冲区
+SCALE = np.float32(1 / 255)
+
+
+def letterbox_params(shape, new_shape):
+    """
+    等比缩放到 new_shape×new_shape 并居中填充的尺寸，与 ultralytics LetterBox 的取整方式一致
+    :param shape: 原图 (高, 宽)
+    :return: (缩放后宽, 缩放后高, 上边填充, 左边填充)
+    """
+    r = min(new_shape / shape[0], new_shape / shape[1])
+    width, height = int(round(shape[1] * r)), int(round(shape[0] * r))
+    top = int(round((new_shape - height) / 2 - 0.1))
+    left = int(round((new_shape - width) / 2 - 0.1))
+    return width, height, top, left
+
+
+def allocate(batch_size, imgsz, pin=False):
+    """分配 N×3×imgsz×imgsz 的 float32 缓冲区，pin 为True时分配在锁页内存中，拷贝到GPU时可异步传输"""
+    shape = (batch_size, 3, imgsz, imgsz)
+    if pin:
+        import torch
+        return torch.empty(shape, dtype=torch.float32, pin_memory=True).numpy()
+    return np.empty(shape, dtype=np.float32)
+
+
+class LetterboxSlot:
+    # 一个槽位：uint8 画布、按通道拆分的 uint8 平面与输出缓冲区
+    def __init__(self, imgsz, batch_size, color, pin):
+        self.canvas = np.full((imgsz, imgsz, 3), color, dtype=np.uint8)
+        self.planes = np.empty((3, imgsz, imgsz), dtype=np.uint8)
+        self.geometry = None  # 画布上次写入的图像区域，区域不变时填充部分无需重写
+        self.buffer = allocate(batch_size, imgsz, pin)
+
+
+class LetterboxPool:
+    # 用法:
+    #   pool = LetterboxPool(416, batch_size=8)
+    #   batch = pool([img1, img2])  # 2×3×416×416 float32，RGB，0~1
+    # 返回的数组是缓冲区的视图，槽位轮流使用，结果在之后 slots-1 次调用内保持有效；
+    # 多个线程同时前处理时各自取用不同槽位
+    def __init__(self, imgsz, batch_size=1, slots=2, color=114, pin=False):
+        """
+        :param imgsz: 模型输入尺寸
+        :param batch_size: 预分配的批大小，更大的批到来时扩容一次后继续复用
+        :param slots: 槽位数量，至少为1
+        :param color: 填充颜色
+        :param pin: 为True时缓冲区分配在锁页内存中（GPU推理时使用）
+        """
+        self.imgsz = imgsz
+        self.color = color
+        self.pin = pin
+        self.lock = threading.Lock()
+        self.free = [LetterboxSlot(imgsz, batch_size, color, pin) for _ in range(max(1, slots))]
+
+    def acquire(self, batch_size):
+        with self.lock:
+            # 槽位都在使用中（更多线程同时前处理）时新建一个，之后一并复用
+            slot = self.free.pop(0) if self.free else LetterboxSlot(self.imgsz, batch_size, self.color, self.pin)
+        if len(slot.buffer) < batch_size:
+            slot.buffer = allocate(batch_size, self.imgsz, self.pin)
+        return slot
+
+    def release(self, slot):
+        with self.lock:
+            self.free.append(slot)
+
+    def letterbox(self, img, slot):
+        """把一张图片等比缩放并居中写入槽位画布"""
+        width, height, top, left = geometry = letterbox_params(img.shape[:2], self.imgsz)
+        if slot.geometry != geometry:
+            slot.canvas[:] = self.color
+            slot.geometry = geometry
+        region = slot.canvas[top:top + height, left:left + width]
+        if img.shape[:2] == (height, width):
+            region[:] = img
+        else:
+            cv2.resize(img, (width, height), dst=region, interpolation=cv2.INTER_LINEAR)
+        return slot.canvas
+
+    def __call__(self, imgs):
+        """
+        前处理一批BGR图像
+        :return: N×3×imgsz×imgsz float32 数组，RGB，0~1
+        """
+        with span('preprocess'):
+            slot = self.acquire(len(imgs))
+            batch = slot.buffer[:len(imgs)]
+            for img, out in zip(imgs, batch):
+                # HWC转CHW由 cv2.split 写入预分配的平面，BGR转RGB为平面倒序的视图，归一化结果直接写入输出缓冲区
+                cv2.split(self.letterbox(img, slot), list(slot.planes))
+                np.multiply(slot.planes[::-1], SCALE, out=out)
+            self.release(slot)
+        return batch
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# OpenVINO INT8 量化：用训练集图片做训练后校准，在验证集上评估精度，
+# 精度下降超过阈值时不发布量化模型
+# 用法: python quantize_int8.py --model models/best.pt
+import argparse
+import csv
+import glob
+import os
+import random
+import shutil
+
+import numpy as np
+
+import Config
+import detect_core as core
+from batch_infer import list_images
+from detect_backends import int8_model_dir, letterbox
+
+
+def load_reference_metrics(results_csv):
+    """
+    读取训练记录中 best.pt 对应轮次的 mAP50 与 mAP50-95
+    ultralytics 以 0.1*mAP50 + 0.9*mAP50-95 作为 best.pt 的选取标准
+    """
+    with open(results_csv, 'r', encoding='utf-8') as f:
+        rows = [{k.strip(): v.strip() for k, v in row.items()} for row in csv.DictReader(f)]
+    best = max(rows, key=lambda r: 0.1 * float(r['metrics/mAP50(B)']) + 0.9 * float(r['metrics/mAP50-95(B)']))
+    return {'epoch': int(best['epoch']),
+            'map50': float(best['metrics/mAP50(B)']),
+            'map': float(best['metrics/mAP50-95(B)'])}
+
+
+def calibration_images(calib_dir, num, imgsz, seed=0):
+    """从训练集随机抽取校准图片，预处理方式与推理时一致"""
+    paths = list_images(calib_dir)
+    random.Random(seed).shuffle(paths)
+    for path in paths[:num]:
+        img = core.img_cvread(path)
+        if img is None:
+            continue
+        img = letterbox(img, imgsz)[..., ::-1].transpose(2, 0, 1)
+        yield np.ascontiguousarray(img, dtype=np.float32)[None] / 255.0
+
+
+def export_fp32(model_path, imgsz):
+    """导出 FP32 OpenVINO 模型，返回模型目录"""
+    from ultralytics import YOLO
+    return YOLO(model_path, task='detect').export(format='openvino', imgsz=imgsz, half=False)
+
+
+def quantize(fp32_dir, out_dir, calib_dir, calib_size, imgsz):
+    """对 FP32 模型做训练后量化，检测头与 Sigmoid 保持浮点以减少精度损失"""
+    import nncf
+    import openvino as ov
+
+    xml_path = glob.glob(os.path.join(fp32_dir, '*.xml'))[0]
+    ov_model = ov.Core().read_model(xml_path)
+
+    operations = ov_model.get_ordered_ops()
+    sigmoid_names = [op.get_friendly_name() for op in operations if op.get_type_name() == 'Sigmoid']
+    head_scope = sigmoid_names[-1].split('/', 1)[0] if sigmoid_names else None
+    ignored = [op.get_friendly_name() for op in operations
+               if op.get_type_name() == 'Sigmoid'
+               or (head_scope and op.get_friendly_name().startswith((f'{head_scope}/', f'{head_scope}.dfl')))]
+
+    calib_data = list(calibration_images(calib_dir, calib_size, imgsz))
+    print(f'校准图片: {len(calib_data)} 张')
+    quantized = nncf.quantize(
+        ov_model,
+        nncf.Dataset(calib_data),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(calib_data),
+        ignored_scope=nncf.IgnoredScope(names=ignored, validate=False),
+    )
+
+    os.makedirs(out_dir, exist_ok=True)
+    ov.save_model(quantized, os.path.join(out_dir, os.path.basename(xml_path)), compress_to_fp16=False)
+    # ultralytics 加载 OpenVINO 模型时从 metadata.yaml 读取类别名称和输入尺寸
+    shutil.copy(os.path.join(fp32_dir, 'metadata.yaml'), out_dir)
+
+
+def evaluate(model_dir, data, imgsz):
+    """在验证集上评估，返回 mAP50 与 mAP50-95"""
+    from ultralytics import YOLO
+    metrics = YOLO(model_dir, task='detect').val(data=data, split='val', imgsz=imgsz, batch=1, plots=False)
+    return {'map50': float(metrics.box.map50), 'map': float(metrics.box.map)}
+
+
+def run(args):
+    out_dir = int8_model_dir(args.model)
+    staging_dir = out_dir + '_staging'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    reference = load_reference_metrics(args.results_csv)
+    print('训练记录 (epoch {epoch}): mAP50={map50:.4f} mAP50-95={map:.4f}'.format(**reference))
+
+    fp32_dir = export_fp32(args.model, args.imgsz)
+    quantize(fp32_dir, staging_dir, args.calib_dir, args.calib_size, args.imgsz)
+
+    int8 = evaluate(staging_dir, args.data, args.imgsz)
+    drop50 = reference['map50'] - int8['map50']
+    drop = reference['map'] - int8['map']
+    print(f"INT8: mAP50={int8['map50']:.4f} (下降 {drop50:+.4f})  mAP50-95={int8['map']:.4f} (下降 {drop:+.4f})")
+
+    if drop50 > args.max_drop or drop > args.max_drop:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        print(f'✗ 精度下降超过允许值 {args.max_drop}，未发布INT8模型')
+        return False
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(staging_dir, out_dir)
+    print(f'✓ INT8模型已发布到 {out_dir}，在 Config.py 中设置 backend = \'openvino\' 即可使用')
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='OpenVINO INT8 训练后量化')
+    parser.add_argument('--model', default=Config.model_path, help='.pt 权重路径')
+    parser.add_argument('--data', default='data/data.yaml', help='数据集配置，用于验证集评估')
+    parser.add_argument('--calib-dir', default='data/train/images', help='校准图片文件夹')
+    parser.add_argument('--calib-size', type=int, default=Config.int8_calib_images, help='校准图片数量')
+    parser.add_argument('--results-csv', default=Config.train_results_csv, help='训练记录 results.csv')
+    parser.add_argument('--max-drop', type=float, default=Config.int8_max_map_drop,
+                        help='允许的 mAP50 / mAP50-95 最大下降值')
+    parser.add_argument('--imgsz', type=int, default=Config.imgsz, help='推理输入尺寸')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    raise SystemExit(0 if run(parse_args()) else 1)
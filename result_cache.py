@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# 检测结果磁盘缓存：以 (图片内容哈希, 权重哈希, 后端, conf, iou, imgsz) 为键保存检测框，
+# 重新打开或重新批量检测未变化的图片时直接返回缓存结果，只需哈希与磁盘读取，不经过模型
+#
+# 缓存目录中为同一代号的一对文件：
+#   records-<代号>.bin  依次存放各条结果的 N×6 float32 检测框
+#   index-<代号>.bin    定长索引项 (键, 偏移, 框数, 最近使用时间)，新结果只追加不改写
+# 超出容量时按最近使用时间保留一部分，写入新代号的一对文件后再删除旧文件
+import glob
+import hashlib
+import os
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+
+DIGEST_SIZE = 16
+INDEX_DTYPE = np.dtype([('key', f'S{DIGEST_SIZE}'), ('offset', '<u8'), ('count', '<u4'), ('atime', '<f8')])
+RECORD_DTYPE = np.dtype('<f4')
+ROW_BYTES = 6 * RECORD_DTYPE.itemsize
+
+
+def pad_key(key):
+    # numpy 的定长字节串读出时会去掉末尾的 \x00，补齐为原始键
+    return key.ljust(DIGEST_SIZE, b'\0')
+
+
+def bytes_digest(data):
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """文件内容哈希"""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+def weights_digest(model_path):
+    """权重哈希，权重为目录（如 OpenVINO 模型）时对目录中全部文件哈希"""
+    if not os.path.isdir(model_path):
+        return file_digest(model_path)
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for path in sorted(glob.glob(os.path.join(model_path, '**', '*'), recursive=True)):
+        if os.path.isfile(path):
+            h.update(os.path.relpath(path, model_path).encode('utf-8'))
+            h.update(file_digest(path))
+    return h.digest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes, model_tag):
+        """
+        :param cache_dir: 缓存目录
+        :param max_bytes: 检测框数据的容量上限，字节
+        :param model_tag: 模型标识（权重哈希与后端设置），不同模型的结果互不混用
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.model_tag = model_tag
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load()
+
+    @classmethod
+    def for_model(cls, cache_dir, max_bytes, model_path, backend_name, extra=''):
+        """按权重文件与后端设置创建缓存"""
+        tag = bytes_digest(weights_digest(model_path) + f'|{backend_name}|{extra}'.encode('utf-8'))
+        return cls(cache_dir, max_bytes, tag)
+
+    def key(self, content_digest, conf, iou, imgsz):
+        """一次检测的缓存键"""
+        return bytes_digest(content_digest + self.model_tag + struct.pack('<ddi', conf, iou, imgsz))
+
+    def paths(self, gen):
+        return (os.path.join(self.cache_dir, f'records-{gen}.bin'),
+                os.path.join(self.cache_dir, f'index-{gen}.bin'))
+
+    def load(self):
+        """打开最新一代缓存文件，没有时新建"""
+        gens = sorted(int(m.group(1)) for m in
+                      (re.match(r'index-(\d+)\.bin$', os.path.basename(p))
+                       for p in glob.glob(os.path.join(self.cache_dir, 'index-*.bin'))) if m)
+        self.gen = gens[-1] if gens else 0
+        records_path, index_path = self.paths(self.gen)
+        self.entries = {}
+        if os.path.exists(records_path) and os.path.exists(index_path):
+            size = os.path.getsize(records_path)
+            # 索引只追加，同一键以最后一项为准；指向不完整数据的项（如写入时中断）丢弃
+            usable = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+            for key, offset, count, atime in np.fromfile(index_path, dtype=INDEX_DTYPE, count=usable).tolist():
+                if offset + count * ROW_BYTES <= size:
+                    self.entries[pad_key(key)] = [offset, count, atime]
+        self.records = open(records_path, 'ab+')
+        self.index = open(index_path, 'ab')
+        self.size = self.records.seek(0, os.SEEK_END)
+
+    def get(self, key):
+        """
+        查询缓存
+        :return: N×6 检测框数组，未命中时返回None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            offset, count, _ = entry
+            entry[2] = time.time()
+            self.hits += 1
+            if not count:
+                return np.zeros((0, 6), dtype=np.float32)
+            self.records.seek(offset)
+            data = self.records.read(count * ROW_BYTES)
+        return np.frombuffer(data, dtype=RECORD_DTYPE).reshape(count, 6).astype(np.float32)
+
+    def put(self, key, det):
+        """保存一次检测的检测框"""
+        det = np.ascontiguousarray(det, dtype=RECORD_DTYPE).reshape(-1, 6)
+        with self.lock:
+            if key in self.entries:
+                return
+            # 先写数据再写索引，中断时索引不会指向未写完的数据
+            offset = self.records.seek(0, os.SEEK_END)
+            self.records.write(det.tobytes())
+            self.records.flush()
+            entry = np.array([(key, offset, len(det), time.time())], dtype=INDEX_DTYPE)
+            self.index.write(entry.tobytes())
+            self.index.flush()
+            self.entries[key] = [offset, len(det), time.time()]
+            self.size = offset + det.nbytes
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self, keep_fraction=0.7):
+        """按最近使用时间保留约 keep_fraction 容量的结果，写入新一代文件"""
+        order = sorted(self.entries.items(), key=lambda kv: kv[1][2], reverse=True)
+        budget = self.max_bytes * keep_fraction
+        records_path, index_path = self.paths(self.gen + 1)
+        kept, offset = [], 0
+        with open(records_path, 'wb') as records:
+            for key, (old_offset, count, atime) in order:
+                nbytes = count * ROW_BYTES
+                if offset + nbytes > budget:
+                    break
+                self.records.seek(old_offset)
+                records.write(self.records.read(nbytes))
+                kept.append((key, offset, count, atime))
+                offset += nbytes
+        np.array(kept, dtype=INDEX_DTYPE).tofile(index_path)
+        self.switch(self.gen + 1)
+
+    def save(self):
+        """写入最近使用时间，退出程序时调用"""
+        with self.lock:
+            records_path, index_path = self.paths(self.gen)
+            entries = [(k, o, c, t) for k, (o, c, t) in self.entries.items()]
+            tmp = index_path + '.tmp'
+            np.array(entries, dtype=INDEX_DTYPE).tofile(tmp)
+            self.index.close()
+            os.replace(tmp, index_path)
+            self.index = open(index_path, 'ab')
+
+    def switch(self, gen):
+        """切换到新一代文件并删除旧文件"""
+        old_paths = self.paths(self.gen)
+        self.records.close()
+        self.index.close()
+        self.gen = gen
+        records_path, index_path = self.paths(gen)
+        self.entries = {pad_key(key): [offset, count, atime] for key, offset, count, atime in
+                        np.fromfile(index_path, dtype=INDEX_DTYPE).tolist()}
+        self.records = open(records_path, 'ab+')
+        self.index = open(index_path, 'ab')
+        self.size = self.records.seek(0, os.SEEK_END)
+        for path in old_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        self.save()
+        self.records.close()
+        self.index.close()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# 视频/摄像头流水线：采集、推理、绘制三个线程通过有界队列衔接，队列满时按策略丢帧
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from latency import span
+
+# 丢帧策略
+DROP_OLDEST = 'drop_oldest'  # 丢弃队列中最旧的帧，保证显示最新画面
+DROP_NEWEST = 'drop_newest'  # 丢弃新到的帧，已排队的帧照常处理
+EVERY_N = 'every_n'  # 每N帧处理一帧，队列满时等待下游，不丢弃
+POLICIES = [DROP_OLDEST, DROP_NEWEST, EVERY_N]
+
+
+class FpsMeter:
+    # 滑动窗口统计帧率
+    def __init__(self, window=30):
+        self.times = deque(maxlen=window)
+
+    def tick(self):
+        self.times.append(time.time())
+
+    @property
+    def fps(self):
+        if len(self.times) < 2:
+            return 0.0
+        span = self.times[-1] - self.times[0]
+        return (len(self.times) - 1) / span if span > 0 else 0.0
+
+
+class FrameQueue:
+    # 有界帧队列
+    def __init__(self, maxsize=2, policy=DROP_OLDEST):
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        """放入一帧，返回是否入队"""
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self.items.popleft()
+                    self.dropped += 1
+                elif self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.cond.wait(0.1)
+            if self.closed:
+                return False
+            self.items.append(item)
+            self.cond.notify_all()
+            return True
+
+    def get(self, timeout=0.1):
+        """取出一帧，超时返回None"""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class StreamPipeline:
+    def __init__(self, cap, detect_fn, render_fn, policy=DROP_OLDEST, every_n=1, queue_size=2, fps=None):
+        """
+        :param cap: cv2.VideoCapture
+        :param detect_fn: 推理函数，输入帧图像，返回结果字典
+        :param render_fn: 绘制函数，输入结果字典，返回用于显示的结果字典
+        :param policy: 丢帧策略，见 POLICIES
+        :param every_n: EVERY_N 策略下每N帧处理一帧
+        :param queue_size: 各级队列长度
+        :param fps: 视频文件的原始帧率，用于按原速读取；摄像头传None
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'未知的丢帧策略: {policy}')
+        self.cap = cap
+        self.detect_fn = detect_fn
+        self.render_fn = render_fn
+        self.policy = policy
+        self.every_n = max(1, every_n)
+        self.interval = 1.0 / fps if fps else 0
+
+        self.infer_q = FrameQueue(queue_size, policy)
+        self.render_q = FrameQueue(queue_size, policy)
+        self.meters = {'capture': FpsMeter(), 'infer': FpsMeter(), 'render': FpsMeter()}
+        self.skipped = 0
+
+        # 最新一帧绘制结果，界面线程取走后置空
+        self.output = None
+        self.output_lock = threading.Lock()
+
+        self.running = False
+        self.threads = []
+        self.done = {'capture': False, 'infer': False, 'render': False}
+        # 推理或绘制抛出的异常，出错后各线程退出，由调用方读取后停止并释放视频源
+        self.error = None
+
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self.capture_loop, daemon=True),
+                        threading.Thread(target=self.infer_loop, daemon=True),
+                        threading.Thread(target=self.render_loop, daemon=True)]
+        for t in self.threads:
+            t.start()
+
+    def stop(self):
+        """停止所有线程，采集线程退出后才可释放cap"""
+        self.running = False
+        self.infer_q.close()
+        self.render_q.close()
+        for t in self.threads:
+            t.join()
+        self.threads = []
+
+    @property
+    def finished(self):
+        """视频读取完毕且所有帧都已显示"""
+        return self.done['render'] and self.output is None
+
+    def fail(self, error):
+        """记录第一个异常并让所有线程退出，不在工作线程中 join"""
+        if self.error is None:
+            self.error = error
+        self.running = False
+        self.infer_q.close()
+        self.render_q.close()
+
+    def latest(self):
+        """取走最新的绘制结果，没有新结果时返回None"""
+        with self.output_lock:
+            item, self.output = self.output, None
+        return item
+
+    def stats(self):
+        """各阶段帧率与丢帧数"""
+        return {
+            'capture_fps': self.meters['capture'].fps,
+            'infer_fps': self.meters['infer'].fps,
+            'render_fps': self.meters['render'].fps,
+            'dropped': self.infer_q.dropped + self.render_q.dropped + self.skipped,
+        }
+
+    def capture_loop(self):
+        index = 0
+        next_time = time.time()
+        while self.running:
+            with span('capture'):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.meters['capture'].tick()
+            index += 1
+            if self.policy == EVERY_N and (index - 1) % self.every_n:
+                self.skipped += 1
+            else:
+                self.infer_q.put(frame)
+            # 视频文件按原始帧率读取，摄像头由驱动控制节奏
+            if self.interval:
+                next_time += self.interval
+                delay = next_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.time()
+        self.done['capture'] = True
+
+    def infer_loop(self):
+        while self.running:
+            frame = self.infer_q.get()
+            if frame is None:
+                if self.done['capture'] and not len(self.infer_q):
+                    break
+                continue
+            try:
+                item = self.detect_fn(frame)
+            except Exception as e:
+                self.fail(e)
+                break
+            self.meters['infer'].tick()
+            self.render_q.put(item)
+        self.done['infer'] = True
+
+    def render_loop(self):
+        while self.running:
+            item = self.render_q.get()
+            if item is None:
+                if self.done['infer'] and not len(self.render_q):
+                    break
+                continue
+            try:
+                item = self.render_fn(item)
+            except Exception as e:
+                self.fail(e)
+                break
+            self.meters['render'].tick()
+            with self.output_lock:
+                self.output = item
+        self.done['render'] = True
+
+
+def source_fps(cap):
+    """视频文件的帧率，读取失败时返回None"""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return fps if fps and fps > 0 else None
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# 视频/摄像头检测会话：统一管理视频源、流水线线程、显示定时器与模型绑定
+import cv2
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import Config
+from stream_pipeline import StreamPipeline, source_fps
+
+
+class StreamSession(QObject):
+    # 新的一帧绘制结果
+    frame_ready = pyqtSignal(dict)
+    # 流水线各阶段帧率与丢帧数
+    stats_ready = pyqtSignal(dict)
+    # 视频读取完毕，会话已自动停止
+    finished = pyqtSignal()
+    # 推理或绘制出错，会话已停止并释放视频源，参数为错误信息
+    failed = pyqtSignal(str)
+
+    def __init__(self, detector, render_fn, interval=30, parent=None):
+        """
+        :param detector: 检测线程，会话期间借用其模型推理
+        :param render_fn: 绘制函数，在流水线绘制线程中调用
+        :param interval: 界面取帧间隔，毫秒
+        """
+        super(StreamSession, self).__init__(parent)
+        self.detector = detector
+        self.render_fn = render_fn
+        self.interval = interval
+        self.cap = None
+        self.pipeline = None
+        self.source = None
+
+        # 定时器信号只在此处连接一次，反复开始/停止不会重复触发
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+
+    @property
+    def active(self):
+        return self.pipeline is not None
+
+    @property
+    def is_camera(self):
+        return isinstance(self.source, int)
+
+    def start(self, source):
+        """
+        打开视频源并开始检测，已有会话会先停止
+        :param source: 视频文件路径，或摄像头编号
+        :return: 是否成功打开
+        """
+        self.stop()
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            cap.release()
+            return False
+
+        self.cap = cap
+        self.source = source
+        self.pipeline = StreamPipeline(cap, self.detect_frame, self.render_fn,
+                                       policy=Config.stream_policy, every_n=Config.stream_every_n,
+                                       queue_size=Config.stream_queue_size,
+                                       fps=None if self.is_camera else source_fps(cap))
+        self.pipeline.start()
+        self.timer.start(self.interval)
+        return True
+
+    def switch(self, source):
+        """切换到另一个视频源"""
+        return self.start(source)
+
+    def stop(self):
+        """停止定时器与流水线线程，线程退出后再释放视频源"""
+        self.timer.stop()
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+        self.source = None
+
+    def detect_frame(self, frame):
+        # 流水线推理线程中调用；模型仍在加载时，会话停止即放弃等待，停止操作不会卡住界面线程
+        pipeline = self.pipeline
+        results, take_time = self.detector.infer(frame, cancelled=lambda: not pipeline.running)
+        return {'mode': 'frame', 'path': "实时检测", 'img': frame, 'results': results[0], 'take_time': take_time}
+
+    def poll(self):
+        if self.pipeline.error is not None:
+            error = self.pipeline.error
+            self.stop()
+            self.failed.emit(f'{type(error).__name__}: {error}')
+            return
+        item = self.pipeline.latest()
+        if item is not None:
+            self.frame_ready.emit(item)
+            self.stats_ready.emit(self.pipeline.stats())
+        elif self.pipeline.finished:
+            self.stop()
+            self.finished.emit()
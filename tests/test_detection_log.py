@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# 检测记录的序号、旁路计数文件与 CSV / npz 分片输出
+import csv
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from detection_log import DetectionLog, counter_path, load_shard, read_counter
+
+NAMES = ['crazing', 'inclusion']
+
+
+def dets(num, cls=0):
+    det = np.zeros((num, 6), dtype=np.float32)
+    det[:, :4] = [1, 2, 3, 4]
+    det[:, 4] = 0.5
+    det[:, 5] = cls
+    return det
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+
+def write_log(path, batches, **kwargs):
+    with DetectionLog(path, names=NAMES, **kwargs) as log:
+        for det, source in batches:
+            log.append(det, source)
+    return log
+
+
+def test_csv_append_continues_numbering(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(dets(2), 'a.jpg'), (dets(0), 'empty.jpg'), (dets(1, cls=1), 'b.jpg')])
+    rows = read_csv(path)
+    assert rows[0] == ['序号', '文件路径', '类别', '置信度', '坐标位置']
+    assert [r[:4] for r in rows[1:]] == [['1', 'a.jpg', 'crazing', '50.00 %'], ['2', 'a.jpg', 'crazing', '50.00 %'],
+                                         ['3', 'b.jpg', 'inclusion', '50.00 %']]
+    assert rows[1][4] == '[1, 2, 3, 4]'
+    with open(counter_path(path)) as f:
+        assert f.read() == f'3 {os.path.getsize(path)}'
+
+    log = write_log(path, [(dets(2), 'c.jpg')], append=True)
+    assert log.count == 5
+    rows = read_csv(path)
+    # 追加时不重复写表头
+    assert len(rows) == 6
+    assert [r[0] for r in rows[1:]] == ['1', '2', '3', '4', '5']
+    assert read_counter(path) == 5
+
+
+def test_csv_overwrite(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_log(path, [(dets(3), 'a.jpg')])
+    log = write_log(path, [(dets(1), 'b.jpg')], append=False)
+    assert log.count == 1
+    assert [r[0] for r in read_csv(path)[1:]] == ['1']
+    assert read_counter(path) == 1
+
+
+def test_counter_recounts_modified_log(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    assert read_counter(path) == 0
+    write_log(path, [(dets(3), 'a.jpg')])
+    # 日志被手动修改后大小与旁路计数不一致，重新统计
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        f.write('4,x.jpg,crazing,50.00 %,"[1, 2, 3, 4]"\r\n')
+    assert read_counter(path) == 4
+    os.remove(counter_path(path))
+    assert read_counter(path) == 4
+    with open(counter_path(path), 'w') as f:
+        f.write('broken')
+    assert read_counter(path) == 4
+
+
+def test_npz_shards(tmp_path):
+    path = str(tmp_path / 'log')
+    write_log(path, [(dets(2), 'a.jpg'), (dets(2), 'b.jpg'), (dets(1, cls=1), 'c.jpg')], fmt='npz', flush_rows=2)
+    shards = sorted(glob.glob(os.path.join(path, 'part-*.npz')))
+    assert [os.path.basename(p) for p in shards] == ['part-00000.npz', 'part-00001.npz', 'part-00002.npz']
+    columns = [load_shard(p) for p in shards]
+    assert np.concatenate([c['number'] for c in columns]).tolist() == [1, 2, 3, 4, 5]
+    assert np.concatenate([c['source'] for c in columns]).tolist() == ['a.jpg'] * 2 + ['b.jpg'] * 2 + ['c.jpg']
+    assert columns[2]['cls'].tolist() == [1]
+    assert columns[0]['boxes'].tolist() == [[1, 2, 3, 4]] * 2
+    assert read_counter(path) == 5
+
+    # 追加时分片与序号都接续
+    write_log(path, [(dets(1), 'd.jpg')], fmt='npz', append=True)
+    assert load_shard(os.path.join(path, 'part-00003.npz'))['number'].tolist() == [6]
+    assert read_counter(path) == 6
+    # 没有旁路计数文件时从分片统计
+    os.remove(counter_path(path))
+    assert read_counter(path) == 6
+
+    write_log(path, [(dets(1), 'e.jpg')], fmt='npz', append=False)
+    assert [os.path.basename(p) for p in glob.glob(os.path.join(path, 'part-*'))] == ['part-00000.npz']
+    assert read_counter(path) == 1
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        DetectionLog(str(tmp_path / 'log.txt'), fmt='txt')
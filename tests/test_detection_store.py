@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# 检测结果列式存储的环形缓冲区、扩容与移除，以及表格模型的合并刷新
+import numpy as np
+import pytest
+
+from detection_store import DetectionStore
+
+
+def dets(first, num, cls=0):
+    """num 个框，x1 依次为 first, first+1, ...，便于核对行的先后顺序"""
+    det = np.zeros((num, 6), dtype=np.float32)
+    det[:, 0] = np.arange(first, first + num)
+    det[:, 2:4] = 100
+    det[:, 4] = 0.5
+    det[:, 5] = cls
+    return det
+
+
+def column(store, index=0):
+    """各行的 (序号, 来源路径, 类别, 置信度, 坐标) 中的一项"""
+    return [store.row(i)[index] for i in range(len(store))]
+
+
+def x1(store):
+    return [box[0] for box in column(store, 4)]
+
+
+def test_unlimited_grows():
+    store = DetectionStore()
+    assert store.append(dets(0, 1000), 'a.jpg') == 0
+    assert store.append(dets(1000, 100), 'b.jpg') == 0
+    assert len(store) == 1100
+    assert len(store.cls) >= 1100
+    assert x1(store) == list(range(1100))
+    assert column(store) == list(range(1, 1101))
+    assert store.row(999)[1] == 'a.jpg' and store.row(1000)[1] == 'b.jpg'
+
+
+def test_empty_append():
+    store = DetectionStore(3)
+    assert store.append(np.zeros((0, 6)), 'a.jpg') == 0
+    assert len(store) == 0 and store.total == 0
+    assert store.sources == []
+
+
+def test_ring_keeps_latest():
+    store = DetectionStore(3)
+    assert store.append(dets(0, 2)) == 0
+    assert store.append(dets(2, 2)) == 1
+    assert x1(store) == [1, 2, 3]
+    assert column(store) == [2, 3, 4]
+    # 环形写入跨过数组末尾
+    assert store.append(dets(4, 2)) == 2
+    assert x1(store) == [3, 4, 5]
+    assert column(store) == [4, 5, 6]
+
+
+def test_ring_single_append_over_capacity():
+    store = DetectionStore(3)
+    store.append(dets(0, 1))
+    assert store.append(dets(1, 5)) == 1
+    # 只保留最后3行，被跳过的行也占用序号
+    assert x1(store) == [3, 4, 5]
+    assert column(store) == [4, 5, 6]
+
+
+def test_discard():
+    store = DetectionStore()
+    store.append(dets(0, 5))
+    store.discard(2)
+    assert x1(store) == [2, 3, 4]
+    store.discard(10)
+    assert len(store) == 0
+
+    ring = DetectionStore(4)
+    ring.append(dets(0, 4))
+    ring.discard(3)
+    ring.append(dets(4, 2))
+    assert x1(ring) == [3, 4, 5]
+
+
+def test_sources_and_clear():
+    store = DetectionStore(2)
+    store.append(dets(0, 1), 'a.jpg')
+    store.append(dets(1, 1), 'a.jpg')
+    store.append(dets(2, 1))
+    assert store.sources == ['a.jpg', '']
+    assert column(store, 1) == ['a.jpg', '']
+    store.set_capacity(0)
+    assert len(store) == 0 and store.total == 0 and store.sources == []
+    store.append(dets(0, 1))
+    assert column(store) == [1]
+
+
+@pytest.fixture
+def table_model():
+    pytest.importorskip('PyQt5')
+    from PyQt5.QtCore import QCoreApplication
+    from detect_qt import DetectionTableModel
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    model = DetectionTableModel(capacity=3)
+    model.events = []
+    model.rowsRemoved.connect(lambda parent, first, last: model.events.append(('removed', first, last)))
+    model.rowsInserted.connect(lambda parent, first, last: model.events.append(('inserted', first, last)))
+    yield model
+    model.timer.stop()
+
+
+def test_table_flush_merges(table_model):
+    model = table_model
+    model.append(dets(0, 1), 'a.jpg')
+    model.append(np.zeros((0, 6)), 'b.jpg')
+    model.append(dets(1, 1), 'c.jpg')
+    assert model.rowCount() == 0
+    model.flush()
+    assert model.rowCount() == 2
+    assert model.events == [('inserted', 0, 1)]
+    assert model.data(model.index(1, 0)) == '2'
+    assert model.data(model.index(1, 1)) == 'c.jpg'
+    assert model.data(model.index(1, 3)) == '50.00 %'
+    model.flush()
+    assert model.events == [('inserted', 0, 1)]
+
+
+def test_table_flush_with_capacity(table_model):
+    model = table_model
+    model.append(dets(0, 2), 'a.jpg')
+    model.flush()
+    # 一次刷新超过容量：更早的行不写入，只占用序号；已有行一次移除
+    model.append(dets(2, 2), 'b.jpg')
+    model.append(dets(4, 2), 'c.jpg')
+    model.flush()
+    assert model.events == [('inserted', 0, 1), ('removed', 0, 1), ('inserted', 0, 2)]
+    assert model.rowCount() == len(model.store) == 3
+    assert x1(model.store) == [3, 4, 5]
+    assert [model.data(model.index(row, 0)) for row in range(3)] == ['4', '5', '6']
+    assert [model.data(model.index(row, 1)) for row in range(3)] == ['b.jpg', 'c.jpg', 'c.jpg']
+
+
+def test_table_set_capacity(table_model):
+    model = table_model
+    model.append(dets(0, 2))
+    model.flush()
+    model.append(dets(2, 1))
+    model.set_capacity(3)
+    assert model.rowCount() == 2 and model.pending
+    model.set_capacity(0)
+    assert model.rowCount() == 0 and not model.pending
+    model.append(dets(0, 5))
+    model.flush()
+    assert model.rowCount() == 5
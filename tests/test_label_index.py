@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# 标注索引的建立与增量更新
+import os
+
+import cv2
+import numpy as np
+
+import label_index
+
+
+def make_split(root, items):
+    """
+    :param items: {图片名: 标注文本}，标注为None时不写标注文件
+    """
+    os.makedirs(root / 'images')
+    os.makedirs(root / 'labels')
+    for i, (name, text) in enumerate(items.items()):
+        cv2.imwrite(str(root / 'images' / f'{name}.jpg'), np.full((40 + i, 60, 3), 128, np.uint8))
+        if text is not None:
+            (root / 'labels' / f'{name}.txt').write_text(text)
+    return str(root)
+
+
+def touch(path, text):
+    # 修改内容并推后修改时间，文件系统时间精度较低时指纹也一定变化
+    path.write_text(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_build_and_reload(tmp_path):
+    split = make_split(tmp_path, {'a': '0 0.5 0.5 0.2 0.2\n1 0.3 0.3 0.1 0.1\n', 'b': '', 'c': None})
+    index, stats = label_index.build_index(split)
+    assert stats == {'images': 3, 'parsed': 3, 'removed': 0, 'errors': 0}
+    assert index.names.tolist() == ['a', 'b', 'c']
+    assert index.counts.tolist() == [2, 0, 0]
+    assert index.sizes.tolist() == [[60, 40], [60, 41], [60, 42]]
+    assert index[0][0].tolist() == [0, 1]
+    assert index.image_ids.tolist() == [0, 0]
+    assert os.path.exists(os.path.join(split, label_index.INDEX_NAME))
+
+    again, stats = label_index.build_index(split)
+    assert stats['parsed'] == 0
+    np.testing.assert_array_equal(again.boxes, index.boxes)
+    np.testing.assert_array_equal(label_index.load_split(split, check=False).offsets, index.offsets)
+
+
+def test_incremental_update(tmp_path):
+    split = make_split(tmp_path, {'a': '0 0.5 0.5 0.2 0.2\n', 'b': '1 0.5 0.5 0.2 0.2\n', 'c': None})
+    label_index.build_index(split)
+
+    touch(tmp_path / 'labels' / 'a.txt', '2 0.5 0.5 0.2 0.2\n2 0.1 0.1 0.1 0.1\n')
+    os.remove(tmp_path / 'images' / 'b.jpg')
+    (tmp_path / 'labels' / 'c.txt').write_text('3 0.5 0.5 0.4 0.4\n')
+    index, stats = label_index.build_index(split)
+    assert stats['parsed'] == 2 and stats['removed'] == 1
+    assert index.names.tolist() == ['a', 'c']
+    assert index[0][0].tolist() == [2, 2]
+    assert index[1][0].tolist() == [3]
+
+    fresh, _ = label_index.build_index(split, rebuild=True)
+    np.testing.assert_array_equal(fresh.boxes, index.boxes)
+    np.testing.assert_array_equal(fresh.offsets, index.offsets)
+
+
+def test_polygon_and_invalid_labels(tmp_path):
+    split = make_split(tmp_path, {'poly': '1 0.1 0.1 0.3 0.1 0.3 0.3 0.1 0.3\n',
+                                  'six': '0 0.5 0.5 0.2 0.2 0.9\n' * 5})
+    index, stats = label_index.build_index(split)
+    assert stats['errors'] == 1
+    np.testing.assert_allclose(index[0][1], [[0.2, 0.2, 0.2, 0.2]], rtol=1e-6)
+    assert index.counts.tolist() == [1, 0]
+    assert index.errors[0] == '' and '6 个字段' in index.errors[1]
+    # 未变化时错误信息随索引保留
+    assert label_index.build_index(split)[0].errors[1] == index.errors[1]
+
+
+def test_corrupt_index_is_rebuilt(tmp_path):
+    split = make_split(tmp_path, {'a': '0 0.5 0.5 0.2 0.2\n'})
+    (tmp_path / label_index.INDEX_NAME).write_bytes(b'not an npz')
+    index, stats = label_index.build_index(split)
+    assert stats['parsed'] == 1 and len(index.boxes) == 1
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# YOLO标注读取与坐标转换
+import numpy as np
+import pytest
+
+import detect_core as core
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_read_boxes(tmp_path):
+    classes, boxes = core.read_yolo_labels(write(tmp_path / 'a.txt', '0 0.5 0.5 0.2 0.4\n3 0.1 0.2 0.3 0.4\n'))
+    assert classes.tolist() == [0, 3]
+    np.testing.assert_allclose(boxes, [[0.5, 0.5, 0.2, 0.4], [0.1, 0.2, 0.3, 0.4]], rtol=1e-6)
+
+
+def test_read_without_trailing_newline_and_blank_lines(tmp_path):
+    classes, boxes = core.read_yolo_labels(write(tmp_path / 'a.txt', '\n1 0.5 0.5 0.2 0.2\n\n2 0.3 0.3 0.1 0.1'))
+    assert classes.tolist() == [1, 2]
+    assert boxes.shape == (2, 4)
+
+
+def test_read_empty(tmp_path):
+    classes, boxes = core.read_yolo_labels(write(tmp_path / 'a.txt', ''))
+    assert classes.shape == (0,) and boxes.shape == (0, 4)
+    assert classes.dtype == np.int32 and boxes.dtype == np.float32
+
+
+def test_polygon_row_becomes_bounding_box(tmp_path):
+    # 15个字段：类别 + 7个点，字段总数是5的倍数
+    polygon = '2 0.1 0.2 0.3 0.2 0.4 0.5 0.3 0.6 0.2 0.6 0.1 0.5 0.1 0.3'
+    classes, boxes = core.read_yolo_labels(write(tmp_path / 'a.txt', polygon + '\n'))
+    assert classes.tolist() == [2]
+    np.testing.assert_allclose(boxes, [[0.25, 0.4, 0.3, 0.4]], rtol=1e-6)
+
+
+def test_mixed_box_and_polygon_rows(tmp_path):
+    text = '0 0.5 0.5 0.2 0.2\n1 0.1 0.1 0.3 0.1 0.3 0.3 0.1 0.3\n'
+    classes, boxes = core.read_yolo_labels(write(tmp_path / 'a.txt', text))
+    assert classes.tolist() == [0, 1]
+    np.testing.assert_allclose(boxes[1], [0.2, 0.2, 0.2, 0.2], rtol=1e-6)
+
+
+def test_six_column_rows_rejected(tmp_path):
+    # 5行6个字段共30个值，不能被当作6个框
+    path = write(tmp_path / 'a.txt', '0 0.5 0.5 0.2 0.2 0.9\n' * 5)
+    with pytest.raises(ValueError, match='第 1 行有 6 个字段'):
+        core.read_yolo_labels(path)
+
+
+def test_rows_with_offsetting_field_counts_rejected(tmp_path):
+    # 4 + 6 个字段，总数仍是5的倍数
+    with pytest.raises(ValueError):
+        core.read_yolo_labels(write(tmp_path / 'a.txt', '0 0.5 0.5 0.2\n0 0.5 0.5 0.2 0.2 0.9\n'))
+
+
+def test_non_numeric_rejected(tmp_path):
+    with pytest.raises(ValueError, match='第 2 行'):
+        core.read_yolo_labels(write(tmp_path / 'a.txt', '0 0.5 0.5 0.2 0.2\n0 0.5 x 0.2 0.2\n'))
+
+
+def test_read_label_dir(tmp_path):
+    write(tmp_path / 'b.txt', '1 0.5 0.5 0.2 0.2\n')
+    write(tmp_path / 'a.txt', '')
+    write(tmp_path / 'notes.md', 'ignored')
+    labels = core.read_yolo_label_dir(str(tmp_path))
+    assert list(labels) == ['a', 'b']
+    assert labels['b'][0].tolist() == [1]
+
+
+def legacy_yolo_to_location(w, h, yolo_data):
+    x_, y_, w_, h_ = yolo_data
+    return [int(w * x_ - 0.5 * w * w_), int(h * y_ - 0.5 * h * h_),
+            int(w * x_ + 0.5 * w * w_), int(h * y_ + 0.5 * h * h_)]
+
+
+def test_yolo_to_location_matches_legacy():
+    rng = np.random.default_rng(0)
+    for _ in range(1000):
+        w, h = rng.integers(10, 2000, 2).tolist()
+        box = rng.random(4).tolist()
+        assert core.yolo_to_location(w, h, box) == legacy_yolo_to_location(w, h, box)
+
+
+def test_yolo_to_xyxy_clip_and_int():
+    boxes = [[0.05, 0.5, 0.2, 0.2], [0.5, 0.5, 0.5, 0.5]]
+    assert core.yolo_to_xyxy(boxes, 100, 200, clip=True, as_int=True).tolist() == [[0, 80, 15, 120],
+                                                                                  [25, 50, 75, 150]]
+    assert core.yolo_to_xyxy(np.zeros((0, 4)), 100, 100).shape == (0, 4)
+
+
+def test_xyxy_round_trip():
+    rng = np.random.default_rng(1)
+    yolo = rng.random((50, 4)) * 0.5 + 0.25
+    back = core.xyxy_to_yolo(core.yolo_to_xyxy(yolo, 640, 480), 640, 480, decimals=None)
+    np.testing.assert_allclose(back, yolo, atol=1e-12)
+    assert core.location_to_yolo(100, 100, [10, 20, 30, 60]) == [0.2, 0.4, 0.2, 0.4]
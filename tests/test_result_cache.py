@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# 检测结果磁盘缓存的读写、重新打开与按最近使用时间淘汰
+import os
+
+import numpy as np
+
+from result_cache import ROW_BYTES, ResultCache, bytes_digest
+
+TAG = bytes_digest(b'weights|torch|')
+
+
+def det(num, value=1.0):
+    return np.full((num, 6), value, dtype=np.float32)
+
+
+def key(i):
+    return bytes_digest(str(i).encode())
+
+
+def files(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_put_get(tmp_path):
+    cache = ResultCache(str(tmp_path), 1 << 20, TAG)
+    assert cache.get(key(0)) is None
+    cache.put(key(0), det(3, 2.5))
+    cache.put(key(1), det(0))
+    assert np.array_equal(cache.get(key(0)), det(3, 2.5))
+    assert cache.get(key(1)).shape == (0, 6)
+    # 已有的键不重复写入
+    cache.put(key(0), det(5))
+    assert len(cache.get(key(0))) == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.size == 3 * ROW_BYTES
+    cache.close()
+
+
+def test_key_separates_settings(tmp_path):
+    cache = ResultCache(str(tmp_path), 1 << 20, TAG)
+    other = ResultCache(str(tmp_path), 1 << 20, bytes_digest(b'weights|onnx|'))
+    content = bytes_digest(b'image')
+    keys = {cache.key(content, 0.25, 0.7, 416), cache.key(content, 0.3, 0.7, 416),
+            cache.key(content, 0.25, 0.7, 640), other.key(content, 0.25, 0.7, 416)}
+    assert len(keys) == 4
+    assert cache.key(content, 0.25, 0.7, 416) == cache.key(content, 0.25, 0.7, 416)
+    other.close()
+    cache.close()
+
+
+def test_reopen(tmp_path):
+    cache = ResultCache(str(tmp_path), 1 << 20, TAG)
+    for i in range(3):
+        cache.put(key(i), det(i + 1, i))
+    cache.close()
+
+    cache = ResultCache(str(tmp_path), 1 << 20, TAG)
+    for i in range(3):
+        assert np.array_equal(cache.get(key(i)), det(i + 1, i))
+    assert cache.size == 6 * ROW_BYTES
+    # 重新打开后继续追加
+    cache.put(key(3), det(1, 3))
+    cache.close()
+    assert np.array_equal(ResultCache(str(tmp_path), 1 << 20, TAG).get(key(3)), det(1, 3))
+
+
+def test_reopen_drops_truncated_entries(tmp_path):
+    cache = ResultCache(str(tmp_path), 1 << 20, TAG)
+    cache.put(key(0), det(2))
+    cache.put(key(1), det(2))
+    cache.close()
+    # 模拟写入数据时中断：最后一条结果的数据不完整
+    records = tmp_path / 'records-0.bin'
+    os.truncate(records, os.path.getsize(records) - ROW_BYTES)
+
+    cache = ResultCache(str(tmp_path), 1 << 20, TAG)
+    assert cache.get(key(0)) is not None
+    assert cache.get(key(1)) is None
+    cache.close()
+
+
+def test_evict_to_new_generation(tmp_path):
+    # 每条结果 2 行，容量放得下 4 条，淘汰后保留约 70%，即 2 条
+    cache = ResultCache(str(tmp_path), 8 * ROW_BYTES, TAG)
+    for i in range(4):
+        cache.put(key(i), det(2, i))
+        cache.entries[key(i)][2] = i
+    # 最早写入的结果刚被使用过，应当保留
+    cache.entries[key(0)][2] = 10
+    assert cache.gen == 0
+
+    cache.put(key(4), det(2, 4))
+    assert cache.gen == 1
+    assert files(tmp_path) == ['index-1.bin', 'records-1.bin']
+    assert sorted(cache.entries) == sorted([key(0), key(4)])
+    assert np.array_equal(cache.get(key(0)), det(2, 0))
+    assert np.array_equal(cache.get(key(4)), det(2, 4))
+    assert cache.get(key(1)) is None
+    assert cache.size == 4 * ROW_BYTES
+    cache.close()
+
+    # 重新打开时读取最新一代
+    cache = ResultCache(str(tmp_path), 8 * ROW_BYTES, TAG)
+    assert cache.gen == 1
+    assert np.array_equal(cache.get(key(4)), det(2, 4))
+    cache.close()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# 有界帧队列的丢帧策略，以及流水线按 every_n 抽帧
+import threading
+import time
+
+import pytest
+
+from stream_pipeline import DROP_NEWEST, DROP_OLDEST, EVERY_N, FrameQueue, StreamPipeline
+
+
+class FakeCapture:
+    # 依次返回 0, 1, 2, ... 作为帧，读完后返回失败
+    def __init__(self, frames):
+        self.frames = iter(range(frames))
+
+    def read(self):
+        frame = next(self.frames, None)
+        return frame is not None, frame
+
+
+def drain(q):
+    items = []
+    while len(q):
+        items.append(q.get())
+    return items
+
+
+def test_drop_oldest():
+    q = FrameQueue(2, DROP_OLDEST)
+    assert all(q.put(i) for i in range(5))
+    assert q.dropped == 3
+    assert drain(q) == [3, 4]
+
+
+def test_drop_newest():
+    q = FrameQueue(2, DROP_NEWEST)
+    assert [q.put(i) for i in range(5)] == [True, True, False, False, False]
+    assert q.dropped == 3
+    assert drain(q) == [0, 1]
+
+
+def test_every_n_waits_for_consumer():
+    q = FrameQueue(1, EVERY_N)
+    q.put(0)
+    result = []
+    producer = threading.Thread(target=lambda: result.append(q.put(1)))
+    producer.start()
+    time.sleep(0.2)
+    # 队列满时不丢帧，等待下游取走
+    assert producer.is_alive() and not result
+    assert q.get() == 0
+    producer.join(2)
+    assert result == [True]
+    assert q.dropped == 0
+    assert drain(q) == [1]
+
+
+def test_close_releases_waiting_put_and_get():
+    q = FrameQueue(1, EVERY_N)
+    q.put(0)
+    result = []
+    producer = threading.Thread(target=lambda: result.append(q.put(1)))
+    producer.start()
+    q.close()
+    producer.join(2)
+    assert result == [False]
+    # 关闭后已排队的帧仍可取出，取空后立即返回None
+    assert q.get() == 0
+    t = time.time()
+    assert q.get(timeout=5) is None
+    assert time.time() - t < 1
+
+
+def test_get_timeout():
+    q = FrameQueue(2)
+    t = time.time()
+    assert q.get(timeout=0.05) is None
+    assert time.time() - t >= 0.04
+
+
+def run_pipeline(pipeline, timeout=10):
+    shown = []
+    pipeline.start()
+    deadline = time.time() + timeout
+    while not pipeline.finished and time.time() < deadline:
+        item = pipeline.latest()
+        if item is not None:
+            shown.append(item)
+        time.sleep(0.005)
+    pipeline.stop()
+    return shown
+
+
+def test_pipeline_every_n():
+    detected = []
+
+    def detect(frame):
+        detected.append(frame)
+        return {'frame': frame}
+
+    pipeline = StreamPipeline(FakeCapture(10), detect, lambda item: item, policy=EVERY_N, every_n=3, queue_size=1)
+    shown = run_pipeline(pipeline)
+    assert pipeline.finished and pipeline.error is None
+    # EVERY_N 不丢帧，每3帧推理一帧
+    assert detected == [0, 3, 6, 9]
+    assert pipeline.skipped == 6
+    assert pipeline.stats()['dropped'] == 6
+    assert shown[-1] == {'frame': 9}
+
+
+def test_pipeline_unknown_policy():
+    with pytest.raises(ValueError):
+        StreamPipeline(FakeCapture(1), None, None, policy='drop_all')
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# 切片推理的切块坐标与跨块合并（按类别 NMS / 加权框融合）
+import numpy as np
+import pytest
+
+from tiled_infer import make_tiles, merge_detections, nms, wbf
+
+
+def dets(*rows):
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def test_make_tiles():
+    assert make_tiles(100, 80, 128, 0.2) == [(0, 0, 80, 100)]
+    tiles = make_tiles(100, 250, 100, 0.2)
+    # 步长 80，最后一列与右边缘对齐
+    assert tiles == [(0, 0, 100, 100), (80, 0, 180, 100), (150, 0, 250, 100)]
+
+
+def test_nms_same_class():
+    result = nms(dets([0, 0, 10, 10, 0.6, 0], [1, 1, 11, 11, 0.9, 0], [50, 50, 60, 60, 0.5, 0]), 0.5)
+    assert result[:, 4].tolist() == pytest.approx([0.9, 0.5])
+
+
+def test_nms_class_offset():
+    # 不同类别的框完全重合也不互相抑制
+    result = nms(dets([0, 0, 10, 10, 0.9, 0], [0, 0, 10, 10, 0.8, 1], [0, 0, 10, 10, 0.7, 1]), 0.5)
+    assert sorted(result[:, 5].tolist()) == [0, 1]
+    assert result[:, 4].tolist() == pytest.approx([0.9, 0.8])
+    # 平移后相邻类别的区域互不重叠：类别0 的最右侧框与类别1 的最左侧框不会相交
+    result = nms(dets([90, 0, 100, 10, 0.9, 0], [0, 0, 10, 10, 0.8, 1], [0, 0, 10, 10, 0.7, 2]), 0.1)
+    assert len(result) == 3
+
+
+def test_nms_empty():
+    assert nms(np.zeros((0, 6), np.float32), 0.5).shape == (0, 6)
+
+
+def test_wbf_fuses_overlapping():
+    result = wbf(dets([0, 0, 10, 10, 0.75, 0], [2, 2, 12, 12, 0.25, 0]), 0.3)
+    assert len(result) == 1
+    # 坐标按置信度加权平均，置信度取最大值
+    assert result[0].tolist() == pytest.approx([0.5, 0.5, 10.5, 10.5, 0.75, 0])
+
+
+def test_wbf_per_class():
+    result = wbf(dets([0, 0, 10, 10, 0.9, 0], [0, 0, 10, 10, 0.8, 1], [50, 50, 60, 60, 0.7, 0]), 0.3)
+    assert len(result) == 3
+    assert sorted(result[:, 5].tolist()) == [0, 0, 1]
+
+
+def test_merge_detections():
+    merged = merge_detections(dets([50, 50, 60, 60, 0.5, 0], [0, 0, 10, 10, 0.9, 1], [1, 1, 10, 10, 0.6, 1]), 0.5)
+    assert merged[:, 4].tolist() == pytest.approx([0.9, 0.5])
+    merged = merge_detections(dets([50, 50, 60, 60, 0.5, 0], [0, 0, 10, 10, 0.9, 1]), 0.5, method='wbf')
+    assert merged[:, 4].tolist() == pytest.approx([0.9, 0.5])
+    assert merge_detections(np.zeros((0, 6), np.float32), 0.5).shape == (0, 6)
+    with pytest.raises(ValueError):
+        merge_detections(dets([0, 0, 10, 10, 0.9, 0]), 0.5, method='soft')
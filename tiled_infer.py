@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# 切片推理：高分辨率带钢图像切成相互重叠的小块分批检测，检测框映射回原图坐标后跨块合并
+# 避免整幅大图缩小到 imgsz 后细小的点蚀、夹杂等缺陷消失
+import numpy as np
+
+from detect_backends import make_results, read_sources
+
+MERGE_METHODS = ['nms', 'wbf']
+
+
+def make_tiles(height, width, tile, overlap):
+    """
+    计算切块坐标，最后一行/列与图像边缘对齐
+    :param tile: 切块边长
+    :param overlap: 相邻切块的重叠比例
+    :return: [(x1, y1, x2, y2), ...]
+    """
+    stride = max(1, int(tile * (1 - overlap)))
+
+    def starts(size):
+        if size <= tile:
+            return [0]
+        return list(range(0, size - tile, stride)) + [size - tile]
+
+    return [(x, y, min(x + tile, width), min(y + tile, height)) for y in starts(height) for x in starts(width)]
+
+
+def box_iou(box, boxes):
+    """一个框与N个框的IOU"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = (box[2] - box[0]) * (box[3] - box[1])
+    area2 = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / (area1 + area2 - inter + 1e-9)
+
+
+def nms(dets, iou_thres):
+    """
+    按类别的NMS
+    :param dets: N×6 数组，每行为 x1, y1, x2, y2, conf, cls
+    """
+    if len(dets) == 0:
+        return dets
+    # 不同类别的框平移到互不重叠的区域，一次NMS即可按类别处理
+    offset = dets[:, 5:6] * (dets[:, :4].max() + 1)
+    boxes = dets[:, :4] + offset
+    order = np.argsort(-dets[:, 4])
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        order = order[1:][box_iou(boxes[i], boxes[order[1:]]) <= iou_thres]
+    return dets[keep]
+
+
+def wbf(dets, iou_thres):
+    """
+    加权框融合：同类且重叠的框按置信度加权平均坐标，置信度取簇内最大值
+    :param dets: N×6 数组，每行为 x1, y1, x2, y2, conf, cls
+    """
+    fused = []
+    for cls in np.unique(dets[:, 5]):
+        cls_dets = dets[dets[:, 5] == cls]
+        cls_dets = cls_dets[np.argsort(-cls_dets[:, 4])]
+        clusters, boxes = [], np.zeros((0, 6), dtype=np.float32)
+        for det in cls_dets:
+            ious = box_iou(det, boxes) if len(boxes) else np.zeros(0)
+            if len(ious) and ious.max() > iou_thres:
+                k = int(ious.argmax())
+                clusters[k].append(det)
+                members = np.array(clusters[k])
+                weights = members[:, 4:5]
+                boxes[k, :4] = (members[:, :4] * weights).sum(0) / weights.sum()
+            else:
+                clusters.append([det])
+                boxes = np.vstack([boxes, det[None]])
+        fused.append(boxes)
+    if not fused:
+        return dets
+    return np.concatenate(fused)[:, :6]
+
+
+def merge_detections(dets, iou_thres, method='nms'):
+    """合并各切块的检测结果，去除重叠区域的重复框"""
+    if method not in MERGE_METHODS:
+        raise ValueError(f'未知的合并方式: {method}，可选 {MERGE_METHODS}')
+    if len(dets) == 0:
+        return dets
+    merged = nms(dets, iou_thres) if method == 'nms' else wbf(dets, iou_thres)
+    return merged[np.argsort(-merged[:, 4])]
+
+
+class TiledBackend:
+    # 包装任意推理后端：边长超过 tile_size 的图像切片检测，其余图像照常整图检测
+    def __init__(self, backend, tile_size, overlap=0.2, merge='nms', merge_iou=0.5, batch_size=8):
+        self.backend = backend
+        self.name = backend.name
+        self.names = backend.names
+        self.imgsz = backend.imgsz
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.merge = merge
+        self.merge_iou = merge_iou
+        self.batch_size = batch_size
+
+    def __call__(self, source, conf=0.25, iou=0.7):
+        imgs, paths = read_sources(source)
+        results = [None] * len(imgs)
+
+        small = [i for i, img in enumerate(imgs) if max(img.shape[:2]) <= self.tile_size]
+        if small:
+            for i, result in zip(small, self.backend([imgs[i] for i in small], conf=conf, iou=iou)):
+                results[i] = result
+        for i, img in enumerate(imgs):
+            if results[i] is None:
+                results[i] = self.detect_tiled(img, paths[i], conf, iou)
+        return results
+
+    def detect_tiled(self, img, path, conf, iou):
+        """切片检测一张大图，返回原图坐标下的 Results"""
+        tiles = make_tiles(img.shape[0], img.shape[1], self.tile_size, self.overlap)
+        dets = []
+        for k in range(0, len(tiles), self.batch_size):
+            batch_tiles = tiles[k:k + self.batch_size]
+            crops = [np.ascontiguousarray(img[y1:y2, x1:x2]) for x1, y1, x2, y2 in batch_tiles]
+            for (x1, y1, _, _), result in zip(batch_tiles, self.backend(crops, conf=conf, iou=iou)):
+                det = result.boxes.data.cpu().numpy().copy()
+                det[:, [0, 2]] += x1
+                det[:, [1, 3]] += y1
+                dets.append(det)
+        dets = np.concatenate(dets) if dets else np.zeros((0, 6), dtype=np.float32)
+        return make_results(img, path, self.names, merge_detections(dets, self.merge_iou, self.merge))
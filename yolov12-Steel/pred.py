@@ -1,11 +1,22 @@
-import numpy as np
-from ultralytics import YOLO
+import itertools
+import threading
+
 import cv2
-import math
+import numpy as np
 
-# 设置字体样式
+# 设置文字字体
 font = cv2.FONT_HERSHEY_DUPLEX
 
+# 默认权重路径，模型在第一次预测时才加载，导入本模块不会加载 ultralytics
+MODEL_PATH = "./runs/detect/yolov12s_300e/weights/best.pt"
+
+# 定义类别名称
+classNames = ['crazing', 'inclusion', 'patches', 'pitted_surface', 'rolled-in_scale', 'scratches']
+
+# 已加载的模型，按权重路径缓存
+_models = {}
+_lock = threading.Lock()
+
 
 # 在图像上添加带背景的文本
 def add_text_with_background(
@@ -55,78 +66,122 @@ def get_optimal_font_scale(text, width):
     return 1
 
 
-# 加载YOLO模型
-model = YOLO("./runs/detect/yolov12s_300e/weights/best.pt")
+# 获取YOLO模型，第一次调用时加载并缓存，多线程同时调用时只加载一次
+def get_model(model_path=MODEL_PATH):
+    model = _models.get(model_path)
+    if model is None:
+        with _lock:
+            model = _models.get(model_path)
+            if model is None:
+                from ultralytics import YOLO
+                model = _models[model_path] = YOLO(model_path)
+    return model
 
-# 定义类别名称
-classNames = ['crazing', 'inclusion', 'patches', 'pitted_surface', 'rolled-in_scale', 'scratches']
+
+# 读取图像，输入为图片路径或图像数组，读取失败返回None
+def load_image(img_path):
+    if isinstance(img_path, str):
+        return cv2.imread(img_path)
+    return img_path
+
+
+# 整体处理一张图的检测结果：所有框一次拷贝到CPU，坐标、置信度、类别按数组计算
+def postprocess(result):
+    """
+    :return: (N×4 int32 坐标 x1,y1,x2,y2, N 置信度（向上取两位小数）, N int 类别索引)
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), np.int32), np.zeros(0, np.float32), np.zeros(0, np.int32)
+    data = boxes.data.cpu().numpy()  # 整批只同步一次
+    xyxy = data[:, :4].astype(np.int32)
+    conf = np.ceil(data[:, 4] * 100).astype(np.float64) / 100
+    cls = data[:, 5].astype(np.int32)
+    return xyxy, conf, cls
+
+
+# 在图像上绘制检测框与标签
+def draw_detections(img, xyxy, conf, cls):
+    labels = [f"{classNames[c]} {p}" for c, p in zip(cls.tolist(), conf.tolist())]
+    thicks = np.where(xyxy[:, 2] - xyxy[:, 0] < 210, 1, 2).tolist()
+    for (x1, y1, x2, y2), label, thick in zip(xyxy.tolist(), labels, thicks):
+        # 根据类别名称选择颜色并绘制边界框和文本
+        cv2.rectangle(
+            img=img,
+            pt1=(x1, y1),
+            pt2=(x2, y2),
+            color=(0, 102, 255),  # bgr
+            thickness=2,
+        )
+        add_text_with_background(
+            img,
+            label,
+            (x1, y1),
+            font,
+            1.1,
+            (255, 255, 255),
+            (0, 102, 255),  # bgr
+            thick,
+            5,
+        )
+    return img
 
 
 # 进行预测
-def pred(img_path, stream=False):
-    # 检查输入是图片路径还是图像数组
-    if isinstance(img_path, str):
-        # 如果是字符串，则加载图像
-        img = cv2.imread(img_path)
-        if img is None:
-            print(f"错误：无法加载图像 {img_path}")
-            return None, None
-    else:
-        # 如果已经是图像数组，直接使用
-        img = img_path
+def pred(img_path, stream=False, model_path=MODEL_PATH, verbose=False, **kwargs):
+    """
+    :param img_path: 图片路径或BGR图像数组
+    :param verbose: 为True时打印每个检测结果
+    :param kwargs: 传给模型的预测参数，如 conf、iou
+    :return: (原图, 绘制了检测框的图)，图像读取失败时为 (None, None)
+    """
+    img = load_image(img_path)
+    if img is None:
+        print(f"错误：无法加载图像 {img_path}")
+        return None, None
 
     orig = img.copy()
 
     # 使用YOLO模型进行预测
-    results = model(img, stream=stream)
+    results = get_model(model_path)(img, stream=stream, verbose=False, **kwargs)
     for r in results:
-        boxes = r.boxes
-        if boxes is not None:  # 添加检查，确保有检测结果
-            for box in boxes:
-                # 获取边界框的坐标
-                x1, y1, x2, y2 = box.xyxy[0]
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                w, h = x2 - x1, y2 - y1
-
-                # 获取置信度并进行四舍五入
-                conf = math.ceil((box.conf[0] * 100)) / 100
-
-                # 获取类别索引并转换为类别名称
-                cls = box.cls[0]
-                name = classNames[int(cls)]
-                print(f"{name} {conf}")
-
-                # 获取适合文本的最优字体大小
-                # font_scale = get_optimal_font_scale(f"{name} {conf}", w)
-                thick = 1 if w < 210 else 2
-
-                # 根据类别名称选择颜色并绘制边界框和文本
-                cv2.rectangle(
-                    img=img,
-                    pt1=(x1, y1),
-                    pt2=(x1 + w, y1 + h),
-                    color=(0, 102, 255),  # bgr
-                    thickness=2,
-                )
-                add_text_with_background(
-                    img,
-                    f"{name} {conf}",
-                    (x1, y1),
-                    font,
-                    1.1,
-                    (255, 255, 255),
-                    (0, 102, 255),  # bgr
-                    thick,
-                    5,
-                )
+        xyxy, conf, cls = postprocess(r)
+        if verbose:
+            print("\n".join(f"{classNames[c]} {p}" for c, p in zip(cls.tolist(), conf.tolist())))
+        draw_detections(img, xyxy, conf, cls)
 
     return orig, img
 
 
+# 批量预测
+def pred_many(images, batch_size=8, model_path=MODEL_PATH, **kwargs):
+    """
+    按批推理一组图像，逐张返回结果
+    :param images: 图片路径或BGR图像数组组成的列表或生成器，按批读取，不会一次全部载入内存
+    :param batch_size: 每批送入模型的图片数量
+    :param kwargs: 传给模型的预测参数，如 conf、iou
+    :return: 生成器，按输入顺序逐张返回 (原图, 绘制了检测框的图)，读取失败的图片为 (None, None)
+    """
+    model = get_model(model_path)
+    images = iter(images)
+    while True:
+        batch = [load_image(x) for x in itertools.islice(images, batch_size)]
+        if not batch:
+            return
+        valid = [img for img in batch if img is not None]
+        results = iter(model(valid, verbose=False, **kwargs) if valid else [])
+        for img in batch:
+            if img is None:
+                yield None, None
+                continue
+            orig = img.copy()
+            yield orig, draw_detections(img, *postprocess(next(results)))
+
+
 # 主程序入口
 if __name__ == "__main__":
     # 进行预测
-    original_img, result_img = pred("/Users/luojiehao/Desktop/服务器/Steel-defect-model-based-on-yolov12/yolov12钢材检测/data/test/images/crazing_21_jpg.rf.ba60da711d22af5e1933388cca662731.jpg")
+    original_img, result_img = pred("/Users/luojiehao/Desktop/服务器/Steel-defect-model-based-on-yolov12/yolov12钢材检测/data/test/images/crazing_21_jpg.rf.ba60da711d22af5e1933388cca662731.jpg", verbose=True)
 
     if result_img is not None:
         # 显示结果（可选）